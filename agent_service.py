@@ -118,17 +118,26 @@ class AgentService:
                 'description': body['description'],
                 'confidence': body['confidence'],
                 'osha_regulation': body['osha_regulation'],
-                'bbox': tuple(body['bbox'])
+                'bbox': tuple(body['bbox']),
+                'duration': body.get('duration'),
+                'detection_count': body.get('detection_count')
             }
             
-            # Download violation image from S3
-            image_s3_url = body['image_s3_url']
-            local_image_path = f"violations/{os.path.basename(image_s3_url)}"
+            # Download violation image from S3, plus the other evidence profiles the PDF uses
+            # (violations whose evidence was dropped arrive without an image URL)
+            image_s3_url = body.get('image_s3_url')
+            local_image_path = f"violations/{os.path.basename(image_s3_url)}" if image_s3_url else ""
             
-            if not self.download_from_s3(image_s3_url, local_image_path):
+            if not local_image_path or not self.download_from_s3(image_s3_url, local_image_path):
                 print("⚠️  Proceeding without image")
                 local_image_path = ""
             
+            image_s3_urls = body.get('image_s3_urls', {})
+            for profile in config.PDF_EVIDENCE_PROFILES:
+                profile_url = image_s3_urls.get(profile)
+                if profile_url and profile_url != image_s3_url:
+                    self.download_from_s3(profile_url, f"violations/{os.path.basename(profile_url)}")
+            
             # Generate AI report
             print("📝 Generating AI incident report...")
             report_text = self.agent.generate_incident_report(violation)
@@ -153,7 +162,7 @@ class AgentService:
             
             # Log to database
             print("💾 Logging to database...")
-            self.database.log_violation(violation, image_s3_url, pdf_s3_url or pdf_path, email_sent)
+            self.database.log_violation(violation, image_s3_url or "", pdf_s3_url or pdf_path, email_sent)
             
             self.reports_generated += 1
             
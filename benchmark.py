@@ -0,0 +1,412 @@
+"""
+Benchmark - Reproducible detector benchmark with regression baselines
+Purpose: speed_test.py times one (often random) frame, which produces no
+detections and never exercises post-processing. This harness replays fixed
+frame sets through ViolationDetector for each configuration:
+
+    - video frame sets: every `stride`-th frame of static/*.webm, decoded up front
+    - synthetic frame sets: seeded frames where the model output is replaced by a
+      fixed number of violation boxes, so post-processing and tracking run at a
+      controlled load
+
+For each configuration it records cold start (model load, warm-up, first
+inference), throughput and per-stage latency percentiles, writes the results
+as JSON and compares them against a stored baseline. A metric that is worse
+than the baseline by more than the regression threshold fails the run
+(exit code 1), so it can gate CI.
+
+Timings only compare on the same machine and model: the baseline stores the
+CPU, core count, onnxruntime version and model hash it was recorded with.
+If any of them differ the run skips the comparison and exits with code 2
+("baseline not comparable") instead of reporting regressions. No baseline is
+committed; record one on the machine that gates (e.g. the CI runner) with
+--save-baseline.
+
+Usage:
+    python benchmark.py                                  # compare against the baseline
+    python benchmark.py --save-baseline                  # record a new baseline
+    python benchmark.py --configs onnxruntime,onnxruntime-int8 --boxes 0,20
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+import cv2
+import numpy as np
+import config
+from detection_cache import file_hash
+from detection_pipeline import DetectionPipeline
+from frame_cache import FrameHashCache
+from tracker import IoUTracker
+from violation_detector import ViolationDetector, default_model_path
+
+# Named detector configurations: config overrides applied while the detector is created and run.
+# The frame cache is off unless named, so every frame runs the model.
+CONFIGURATIONS = {
+    "onnxruntime": {"INFERENCE_BACKEND": "onnxruntime", "FRAME_CACHE_ENABLED": False},
+    "onnxruntime-int8": {"INFERENCE_BACKEND": "onnxruntime", "MODEL_PRECISION": "int8", "FRAME_CACHE_ENABLED": False},
+    "onnxruntime-cache": {"INFERENCE_BACKEND": "onnxruntime", "FRAME_CACHE_ENABLED": True},
+    "ultralytics": {"INFERENCE_BACKEND": "ultralytics", "FRAME_CACHE_ENABLED": False},
+    "pool": {"INFERENCE_BACKEND": "pool", "FRAME_CACHE_ENABLED": False},
+}
+
+# Environment fields that must match the baseline's for timings to be comparable
+ENVIRONMENT_KEYS = ("cpu", "cpu_count", "onnxruntime", "model_sha256")
+
+# Compared against the baseline: (metric, higher is better)
+COMPARED_METRICS = (
+    ("throughput_fps", True),
+    ("total_p50_ms", False),
+    ("total_p95_ms", False),
+)
+
+
+@contextmanager
+def config_overrides(overrides):
+    """Temporarily set config attributes"""
+    saved = {name: getattr(config, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(config, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(config, name, value)
+
+
+def load_video_frames(path, count, stride):
+    """
+    Decode a fixed frame set from a video file
+
+    Args:
+        path: Video file
+        count: Frames to keep
+        stride: Keep every stride-th frame (starting with the first)
+
+    Returns:
+        List of frames (may be shorter than count for short videos)
+    """
+    cap = cv2.VideoCapture(path)
+    frames = []
+    index = 0
+    while len(frames) < count:
+        if not cap.grab():
+            break
+        if index % stride == 0:
+            ret, frame = cap.retrieve()
+            if ret:
+                frames.append(frame)
+        index += 1
+    cap.release()
+    return frames
+
+
+def synthetic_frames(count, width, height, seed=0):
+    """Seeded noise frames (identical on every run)"""
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(count)]
+
+
+class SyntheticDetections:
+    """
+    Backend wrapper that runs the real model, then returns a fixed number of violation boxes
+
+    The boxes drift a little every call (seeded), so tracking does real matching work.
+    Runs synchronously even for the pool backend, so the box count stays exact.
+    """
+
+    def __init__(self, backend, boxes, class_ids, frame_shape, seed=0):
+        self.backend = backend
+        self.rng = np.random.default_rng(seed)
+        height, width = frame_shape[:2]
+        box_width, box_height = width / 16, height / 6
+        x1 = self.rng.uniform(0, width - box_width, boxes)
+        y1 = self.rng.uniform(0, height - box_height, boxes)
+        self.boxes = np.stack([x1, y1, x1 + box_width, y1 + box_height], axis=1).astype(np.float32)
+        self.scores = self.rng.uniform(config.CONFIDENCE_THRESHOLD, 1.0, boxes).astype(np.float32)
+        self.class_ids = self.rng.choice(class_ids, boxes).astype(np.int64) if boxes else np.zeros(0, np.int64)
+
+    def __getattr__(self, name):
+        if name == 'submit':
+            raise AttributeError(name)
+        return getattr(self.backend, name)
+
+    def predict(self, frame, conf=None):
+        self.backend.predict(frame, conf=conf)
+        self.boxes += self.rng.normal(0, 2, self.boxes.shape).astype(np.float32)
+        return self.boxes.copy(), self.scores.copy(), self.class_ids.copy()
+
+
+def run_frame_set(detector, frames, repeat):
+    """
+    Replay a frame set through the detector
+
+    Frames go through a DetectionPipeline, so the pool backend keeps its
+    workers busy; other backends run one frame at a time.
+
+    Returns:
+        Dict with frames, violations, throughput_fps and per-stage latency
+    """
+    # Fresh per-set state so results don't depend on the previous set
+    detector.tracker = IoUTracker() if config.ENABLE_TRACKING else None
+    detector.frame_cache = FrameHashCache() if config.FRAME_CACHE_ENABLED else None
+    detector.latency.reset()
+    pipeline = DetectionPipeline(detector)
+
+    violations = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for frame in frames:
+            for _, _, frame_violations in pipeline.push(frame):
+                violations += len(frame_violations)
+    for _, _, frame_violations in pipeline.flush():
+        violations += len(frame_violations)
+    elapsed = time.perf_counter() - start
+
+    latency = detector.get_latency_stats()
+    total = latency.get('total', {})
+    return {
+        'frames': len(frames) * repeat,
+        'violations': violations,
+        'throughput_fps': len(frames) * repeat / elapsed if elapsed > 0 else 0.0,
+        'total_p50_ms': total.get('p50_ms'),
+        'total_p95_ms': total.get('p95_ms'),
+        'total_p99_ms': total.get('p99_ms'),
+        'latency': latency
+    }
+
+
+def benchmark_configuration(name, model_path, frame_sets, box_counts, synthetic_set, repeat):
+    """
+    Create a detector for one configuration and run every frame set through it
+
+    Returns:
+        Dict with the overrides, cold-start timings and per-frame-set results
+    """
+    overrides = CONFIGURATIONS[name]
+    with config_overrides(overrides):
+        detector = ViolationDetector(model_path=model_path, backend=config.INFERENCE_BACKEND)
+        try:
+            results = {}
+            for set_name, frames in frame_sets.items():
+                print(f"   {set_name}: {len(frames)} frames x {repeat}")
+                results[set_name] = run_frame_set(detector, frames, repeat)
+
+            backend = detector.backend
+            for boxes in box_counts:
+                set_name = f"synthetic-{boxes}boxes"
+                print(f"   {set_name}: {len(synthetic_set)} frames x {repeat}")
+                detector.backend = SyntheticDetections(backend, boxes, detector.violation_class_ids,
+                                                       synthetic_set[0].shape)
+                results[set_name] = run_frame_set(detector, synthetic_set, repeat)
+            detector.backend = backend
+
+            return {
+                'overrides': overrides,
+                'startup': detector.get_startup_stats(),
+                'frame_sets': results
+            }
+        finally:
+            if hasattr(detector.backend, 'close'):
+                detector.backend.close()
+
+
+def cpu_model():
+    """CPU model name (platform.processor() is empty on most Linux systems)"""
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def environment(model_path):
+    """Machine, library versions, model and code version the results were measured on"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    try:
+        import onnxruntime
+        onnxruntime_version = onnxruntime.__version__
+    except ImportError:
+        onnxruntime_version = None
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu': cpu_model(),
+        'cpu_count': os.cpu_count(),
+        'opencv': cv2.__version__,
+        'onnxruntime': onnxruntime_version,
+        'model_sha256': file_hash(model_path)[:16] if os.path.exists(model_path) else None
+    }
+
+
+def environment_mismatches(current, baseline):
+    """
+    Environment fields that differ from the baseline's
+
+    Returns:
+        List of (field, baseline_value, current_value)
+    """
+    return [
+        (key, baseline.get(key), current.get(key))
+        for key in ENVIRONMENT_KEYS
+        if baseline.get(key) != current.get(key)
+    ]
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare results against a baseline
+
+    Only (configuration, frame set) pairs present in both are compared.
+
+    Returns:
+        List of (configuration, frame_set, metric, baseline_value, value, change, regressed);
+        change is relative and positive when the value got worse
+    """
+    rows = []
+    for name, current in results['configurations'].items():
+        reference = baseline.get('configurations', {}).get(name)
+        if not reference:
+            continue
+        for set_name, metrics in current['frame_sets'].items():
+            reference_metrics = reference['frame_sets'].get(set_name)
+            if not reference_metrics:
+                continue
+            for metric, higher_is_better in COMPARED_METRICS:
+                old, new = reference_metrics.get(metric), metrics.get(metric)
+                if not old or new is None:
+                    continue
+                change = (old - new) / old if higher_is_better else (new - old) / old
+                rows.append((name, set_name, metric, old, new, change, change > threshold))
+    return rows
+
+
+def print_results(results):
+    """Results table: one row per configuration and frame set"""
+    print(f"\n{'configuration':<20}{'frame set':<24}{'fps':>9}{'p50':>10}{'p95':>10}{'p99':>10}{'violations':>12}")
+    for name, result in results['configurations'].items():
+        for set_name, metrics in result['frame_sets'].items():
+            print(f"{name:<20}{set_name:<24}{metrics['throughput_fps']:>9.2f}"
+                  f"{metrics['total_p50_ms'] or 0:>8.1f}ms{metrics['total_p95_ms'] or 0:>8.1f}ms"
+                  f"{metrics['total_p99_ms'] or 0:>8.1f}ms{metrics['violations']:>12}")
+    print(f"\n{'configuration':<20}{'cold load':>12}{'warm-up':>12}{'first call':>12}")
+    for name, result in results['configurations'].items():
+        startup = result['startup']
+        print(f"{name:<20}{startup['cold_load_ms']:>10.0f}ms{startup['warmup_ms']:>10.0f}ms"
+              f"{startup['first_inference_ms'] or 0:>10.0f}ms")
+
+
+def main():
+    """
+    Entry point: benchmark the chosen configurations, save the results, compare with the baseline
+
+    Returns:
+        Exit code: 0 when nothing regressed (or no baseline exists), 1 on a
+        regression, 2 when the baseline comes from a different environment
+    """
+    parser = argparse.ArgumentParser(description="Benchmark ViolationDetector configurations")
+    parser.add_argument("--model", default=None, help="Model path (default: chosen by config.MODEL_PRECISION)")
+    parser.add_argument("--configs", default="onnxruntime",
+                        help=f"Comma-separated configurations: {', '.join(CONFIGURATIONS)}")
+    parser.add_argument("--videos", default="static/*.webm", help="Glob of videos to take frame sets from")
+    parser.add_argument("--frames", type=int, default=50, help="Frames per frame set")
+    parser.add_argument("--stride", type=int, default=5, help="Keep every n-th video frame")
+    parser.add_argument("--boxes", default="0,10,50", help="Comma-separated box counts for synthetic frame sets")
+    parser.add_argument("--size", default="1280x720", help="Synthetic frame size, WIDTHxHEIGHT")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over each frame set")
+    parser.add_argument("--output", default=None,
+                        help="Results JSON (default: reports/benchmark_<timestamp>.json)")
+    parser.add_argument("--baseline", default=config.BENCHMARK_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=config.BENCHMARK_REGRESSION_THRESHOLD,
+                        help="Relative slowdown that counts as a regression")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.configs.split(',') if name.strip()]
+    unknown = [name for name in names if name not in CONFIGURATIONS]
+    if unknown:
+        parser.error(f"Unknown configuration(s) {', '.join(unknown)}. Options: {', '.join(CONFIGURATIONS)}")
+    box_counts = [int(count) for count in args.boxes.split(',') if count.strip()]
+    width, height = (int(value) for value in args.size.lower().split('x'))
+
+    # Decode every frame up front: the benchmark times detection, not video decoding
+    frame_sets = {}
+    for path in sorted(glob.glob(args.videos)):
+        frames = load_video_frames(path, args.frames, args.stride)
+        if frames:
+            frame_sets[os.path.splitext(os.path.basename(path))[0]] = frames
+    synthetic_set = synthetic_frames(args.frames, width, height) if box_counts else []
+    print(f"Frame sets: {', '.join(frame_sets) or 'none'}; synthetic box counts: {box_counts or 'none'}")
+
+    results = {'environment': environment(args.model or default_model_path()), 'settings': vars(args),
+               'configurations': {}}
+    for name in names:
+        print(f"\n⚡ Benchmarking {name}...")
+        results['configurations'][name] = benchmark_configuration(
+            name, args.model, frame_sets, box_counts, synthetic_set, args.repeat
+        )
+
+    print_results(results)
+
+    output = args.output or os.path.join(
+        config.REPORTS_DIR, f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or '.', exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline} (run with --save-baseline to create one)")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    mismatches = environment_mismatches(results['environment'], baseline.get('environment', {}))
+    if mismatches:
+        print(f"\n⚠️  Baseline not comparable: {args.baseline} was recorded on a different environment")
+        for key, old, new in mismatches:
+            print(f"   {key}: baseline {old}, now {new}")
+        print("   Skipping the comparison; record a baseline on this machine with --save-baseline")
+        return 2
+    rows = compare(results, baseline, args.threshold)
+    print(f"\nComparison with {args.baseline} (commit {baseline['environment'].get('commit')}, "
+          f"threshold {args.threshold*100:.0f}%):")
+    print(f"{'configuration':<20}{'frame set':<24}{'metric':<16}{'baseline':>10}{'now':>10}{'slowdown':>10}")
+    for name, set_name, metric, old, new, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<20}{set_name:<24}{metric:<16}{old:>10.2f}{new:>10.2f}{change*100:>+9.1f}%{flag}")
+
+    regressions = [row for row in rows if row[6]]
+    if regressions:
+        print(f"\n❌ {len(regressions)} metric(s) regressed by more than {args.threshold*100:.0f}%")
+        return 1
+    print(f"\n✅ No regressions ({len(rows)} metrics compared)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -44,8 +44,55 @@ COMPANY_NAME = "Your Construction Company"
 # Detection Configuration
 CONFIDENCE_THRESHOLD = 0.25  # Minimum confidence for violation detection - LOWERED to 0.25 to capture all no_helmet violations (range 0.31-0.42)
 MODEL_PATH = "models/best.onnx"
+MODEL_PRECISION = "fp32"  # Options: "fp32", "int8" (create the INT8 model with: python quantize_model.py)
+INT8_MODEL_PATH = "models/best.int8.onnx"  # Statically quantized model used when MODEL_PRECISION = "int8"
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "onnxruntime")  # Options: "onnxruntime" (fast, native), "ultralytics" (reference), "remote" (shared inference server), "pool" (multi-process)
+MODEL_INPUT_SIZE = 640  # Model input size used when the ONNX model has dynamic input dims
+ORT_INTRA_OP_THREADS = 0  # ONNX Runtime intra-op threads (0 = use all cores)
+INFERENCE_WORKERS = 0  # Worker processes for INFERENCE_BACKEND = "pool" (0 = cores / INFERENCE_WORKER_THREADS)
+INFERENCE_WORKER_THREADS = 2  # ONNX Runtime intra-op threads per pool worker
+SHARED_FRAME_SLOTS = 0  # Shared-memory frame slots for pool workers (0 = 2 per worker, -1 = pickle frames instead)
+SHARED_FRAME_SLOT_BYTES = 1920 * 1080 * 3  # Largest frame a slot holds (bigger frames are pickled)
+WARMUP_ITERATIONS = 3  # Dummy inferences at startup so the first real frame runs at full speed (0 = off)
+LATENCY_WINDOW = 1000  # Recent samples kept per pipeline stage for p50/p95/p99 latency stats
 VIDEO_SOURCE = 0  # 0 for webcam, or path to video file, or RTSP URL
 
+# Display (python safety_monitor.py --headless: no window, for site servers and containers)
+HEADLESS = os.getenv("HEADLESS", "false").lower() == "true"  # Skip all GUI work; SIGUSR1 prints stats, SIGTERM stops
+PREVIEW_MAX_FPS = 5  # Preview refreshes per second, independent of the detection rate (0 = every frame)
+PREVIEW_SNAPSHOT_PATH = os.getenv("PREVIEW_SNAPSHOT_PATH", "")  # Headless: latest annotated frame as a JPEG file ("" = off)
+PREVIEW_HTTP_PORT = int(os.getenv("PREVIEW_HTTP_PORT", "0"))  # Headless: serve it at http://host:port/snapshot.jpg (0 = off)
+# Snapshots are live camera images served without authentication: only bind beyond localhost on purpose
+PREVIEW_HTTP_BIND = os.getenv("PREVIEW_HTTP_BIND", "127.0.0.1")  # Interface the snapshot endpoint listens on
+PREVIEW_JPEG_QUALITY = 70  # JPEG quality of preview snapshots (0-100)
+
+# Benchmark (python benchmark.py; replays static/*.webm and synthetic frames per detector configuration)
+BENCHMARK_BASELINE = "benchmarks/baseline.json"  # Stored results new runs are compared against
+BENCHMARK_REGRESSION_THRESHOLD = 0.10  # Fail when throughput or total latency is this much worse (10%)
+
+# Offline Processing (python offline_processor.py <videos or directories>: recorded footage, no display,
+# frame ranges processed in parallel worker processes; results go to JSONL and optionally the database)
+OFFLINE_WORKERS = 0  # Worker processes (0 = cores / OFFLINE_WORKER_THREADS)
+OFFLINE_WORKER_THREADS = 2  # ONNX Runtime intra-op threads per worker
+OFFLINE_CHUNK_SECONDS = 60  # Video length per work item (ranges of all videos are processed in parallel)
+OFFLINE_FRAME_SKIP = 15  # Analyze every n-th frame of recorded video (15 = 2 per second at 30 FPS)
+OFFLINE_MERGE_IOU = 0.3  # Min box overlap to join incidents split at a range boundary (same worker)
+OFFLINE_OUTPUT_DIR = "reports/offline"  # Each run writes a timestamped directory here
+
+# Detection Cache (re-analysis scripts read raw detections from disk instead of re-running the model;
+# keyed by video content hash, model file hash and the settings that change raw output)
+DETECTION_CACHE_DIR = "cache/detections"  # Compressed .npz files, one per video/model/settings
+DETECTION_CACHE_MIN_CONF = 0.05  # Lowest confidence stored; lower thresholds run the model again
+
+# Shared Inference Server (python inference_server.py; detectors use it with INFERENCE_BACKEND = "remote")
+INFERENCE_SERVER_ADDRESS = os.getenv("INFERENCE_SERVER_ADDRESS", "localhost:6000")  # "host:port" or Unix socket path
+# The server unpickles client messages: anyone holding the authkey who can reach the address can run code on
+# the host. Keep it on localhost or a Unix socket and never expose the port; the authkey has no default.
+INFERENCE_SERVER_AUTHKEY = os.getenv("INFERENCE_SERVER_AUTHKEY", "")  # Required shared secret (long random string)
+INFERENCE_SERVER_CONNECT_TIMEOUT = 30  # Seconds a client keeps retrying while the server starts
+INFERENCE_MAX_BATCH = 8  # Max frames the server runs in one forward pass
+INFERENCE_BATCH_WINDOW_MS = 5  # How long the server waits for more frames to fill a batch
+
 # Violation Classes (what to monitor) - MUST MATCH MODEL CLASS NAMES
 VIOLATION_CLASSES = {
     "no_helmet": "Worker without hard hat/helmet",
@@ -65,6 +112,23 @@ OSHA_REGULATIONS = {
 # Report Configuration
 REPORTS_DIR = "reports"
 VIOLATIONS_DIR = "violations"
+# Evidence profiles: each violation is saved once per profile as <name>_<profile>.jpg
+#   region:   "crop" (padded region around the violation) or "scene" (whole annotated frame)
+#   max_size: Longest side in pixels, larger images are downscaled (0 = original resolution)
+#   quality:  JPEG quality (0-100)
+# The first profile is the primary image (uploaded with the violation and logged to the database)
+# Add e.g. "full": {"region": "scene", "max_size": 0, "quality": 90} to keep full-resolution frames too
+EVIDENCE_PROFILES = {
+    "crop": {"region": "crop", "max_size": 800, "quality": 85},
+    "thumb": {"region": "scene", "max_size": 480, "quality": 70},
+}
+PDF_EVIDENCE_PROFILES = ("crop", "thumb")  # Profiles embedded in PDF reports, when available
+DASHBOARD_EVIDENCE_PROFILE = "thumb"  # Profile the dashboard shows in violation lists
+EVIDENCE_CROP_MARGIN = 0.5  # Crop padding around the violation box, as a fraction of the box size
+EVIDENCE_JPEG_QUALITY = 90  # Default JPEG quality of violation images (0-100)
+EVIDENCE_WRITER_THREADS = 2  # Background threads writing violation images
+EVIDENCE_QUEUE_SIZE = 32  # Max violations (all their profile images) waiting to be written
+EVIDENCE_OVERFLOW_POLICY = "drop_newest"  # Full queue: "drop_newest", "drop_oldest" or "block"
 DATABASE_PATH = "violations.db"
 
 # Detection Settings
@@ -75,14 +139,56 @@ SAVE_VIOLATION_IMAGES = True
 # Note: FRAME_SKIP=1 checks all frames in 9-second video for maximum violation capture
 #       For production with continuous video, increase to 30 for better performance
 
+# Incident Aggregation (report violation events instead of per-frame detections)
+# Consecutive detections of a violation (per track with tracking, per class without) form one incident;
+# the incident is reported once, with its duration, peak confidence and highest-confidence frame as evidence
+INCIDENT_AGGREGATION = True  # False = report every detection that passes VIOLATION_COOLDOWN
+INCIDENT_GAP_SECONDS = 5.0  # Close an incident after this long without a matching detection
+INCIDENT_MIN_DETECTIONS = 2  # Detections before an incident is confirmed (unconfirmed ones are discarded as flicker)
+INCIDENT_REPORT_ON = "close"  # "close" (report the finished incident) or "confirm" (report as soon as confirmed)
+INCIDENT_MAX_DURATION = 300  # Close (and report) incidents open longer than this many seconds; a new one follows
+
+# Adaptive Frame Skip (FRAME_SKIP_MODE = "adaptive" tunes the interval at runtime, starting from FRAME_SKIP)
+FRAME_SKIP_MODE = "fixed"  # Options: "fixed" (always FRAME_SKIP), "adaptive" (recommended for production)
+TARGET_PROCESSED_FPS = 2.0  # Analyzed frames per second to aim for in adaptive mode
+INFERENCE_CPU_BUDGET = 0.5  # Max share of wall time spent in inference (0.5 = 50%)
+MIN_FRAME_SKIP = 1  # Lower bound for the adaptive interval
+MAX_FRAME_SKIP = 90  # Upper bound for the adaptive interval (3 seconds at 30 FPS)
+
+# Capture Thread (decode on its own thread; live streams keep only the freshest frames, files never drop;
+# frames the frame-skip controller skips are grabbed without decoding)
+CAPTURE_QUEUE_SIZE = 1  # Frames buffered between capture and inference (1 = always analyze the newest frame)
+CAPTURE_SEEK_FILES = False  # Video files: seek to the next sampled frame instead of grabbing through skipped ones
+
 # CPU Optimization Settings (for systems without GPU)
-RESIZE_FRAME = True  # Resize frames before detection for speed
-RESIZE_WIDTH = 640  # Width to resize (smaller = faster, 640 is good balance)
-RESIZE_HEIGHT = 480  # Height to resize
+# Frames are letterboxed once, straight into the model input (MODEL_INPUT_SIZE) - no separate pre-resize
 USE_HALF_PRECISION = False  # FP16 (only works on GPU, keep False for CPU)
 MAX_DETECTIONS = 50  # Limit number of detections per frame (lower = faster)
 IOU_THRESHOLD = 0.45  # Intersection over Union threshold for NMS (higher = fewer boxes)
-ENABLE_TRACKING = False  # Disable object tracking for speed (tracking adds overhead)
+ENABLE_TRACKING = True  # Lightweight NumPy IoU tracker: per-worker track IDs for cooldowns/reporting
+TRACK_IOU_THRESHOLD = 0.3  # Minimum IoU to match a detection to an existing track
+TRACK_MAX_MISSED_FRAMES = 5  # Analyzed frames a track survives without a matching detection
+TRACK_MOTION_MODEL = True  # Predict box movement (constant velocity) before matching
+# With tracking, VIOLATION_COOLDOWN applies per track; a cooldown of 0 reports each track once
+
+# Motion Gate (skip inference on static scenes and reuse the last result)
+MOTION_GATE_ENABLED = True  # Run the model only when the scene changed
+MOTION_GATE_WIDTH = 160  # Width of the downscaled grayscale frame used for differencing
+MOTION_PIXEL_THRESHOLD = 25  # Grey-level change (0-255) that counts as a changed pixel
+MOTION_MIN_CHANGED_FRACTION = 0.005  # Fraction of changed pixels that counts as motion (0.5%)
+MOTION_MAX_SKIPPED_FRAMES = 30  # Force a full inference after this many skipped frames in a row
+
+# Near-Duplicate Frame Cache (reuse detections for frames whose perceptual hash matches a recent one)
+# A second reuse layer on top of the motion gate: the gate reuses the previous result while the scene is
+# static, the cache also matches frames against older ones (a scene returning to an earlier state). With
+# both on, a frame the gate lets through may still skip the model, and results can be reused for up to
+# FRAME_CACHE_TTL seconds of wall-clock time, so fewer raw detections reach reporting. Off by default;
+# enable it for fixed cameras where the gate alone still runs the model too often.
+FRAME_CACHE_ENABLED = False
+FRAME_CACHE_SIZE = 32  # Max cached frames (least recently used evicted first)
+FRAME_CACHE_HASH_SIZE = 16  # dHash of 16x16 bits
+FRAME_CACHE_MAX_DISTANCE = 4  # Max differing hash bits to count as the same frame
+FRAME_CACHE_TTL = 10  # Seconds a cached result may be reused (0 = no expiry)
 
 # Create necessary directories
 os.makedirs(REPORTS_DIR, exist_ok=True)
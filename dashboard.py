@@ -10,6 +10,7 @@ import boto3
 import json
 from datetime import datetime, timedelta
 from database import Database
+from evidence_profiles import variant_path
 import config
 import os
 
@@ -103,6 +104,8 @@ def get_recent_violations():
             'confidence': v.confidence,
             'osha_regulation': v.osha_regulation,
             'image_path': v.image_path,
+            'thumbnail_path': (variant_path(v.image_path, config.DASHBOARD_EVIDENCE_PROFILE)
+                               if v.image_path else None) or v.image_path,
             'pdf_report_path': v.pdf_report_path,
             'email_sent': bool(v.email_sent)
         })
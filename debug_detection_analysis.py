@@ -1,116 +1,107 @@
 """
 Detailed frame-by-frame analysis to debug why violations aren't detected
 Shows ALL detections with confidence scores
+
+Raw detections come from the detection cache (detection_cache.py): the first
+run analyzes the video and stores every box; later runs (other thresholds,
+other class filters) read them from disk without running the model.
 """
 
-import cv2
-from violation_detector import ViolationDetector
+from detection_cache import DetectionCache
 import config
 
 print("="*80)
 print("DETAILED VIOLATION DETECTION ANALYSIS")
 print("="*80)
 
-# Initialize detector
-detector = ViolationDetector()
-
-# Open video
 video_path = "static/test_video.webm"
-cap = cv2.VideoCapture(video_path)
-
-if not cap.isOpened():
-    print(f"❌ Error: Cannot open video: {video_path}")
+try:
+    cache = DetectionCache(video_path)
+except OSError as e:
+    print(f"❌ Error: Cannot open video or model: {e}")
     exit(1)
 
 print(f"\n📹 Video: {video_path}")
 print(f"🎯 Confidence Threshold: {config.CONFIDENCE_THRESHOLD}")
 print(f"🔍 Looking for violation classes: {list(config.VIOLATION_CLASSES.keys())}")
-print(f"📊 Model classes: {detector.class_names}")
+print(f"💾 Detection cache: {cache.path} ({len(cache.frames)} frames cached)")
 print("\n" + "="*80)
 print("FRAME-BY-FRAME ANALYSIS")
 print("="*80)
 
 frame_count = 0
+frames_analyzed = 0
 violation_detections = []
 safety_equipment_detections = []
 
-while True:
-    ret, frame = cap.read()
-    
-    if not ret:
-        break
-    
-    frame_count += 1
-    
-    # Check every 10 frames for detailed analysis
-    if frame_count % 10 != 0:
-        continue
+# Check every 10th frame for detailed analysis, lower threshold to see everything
+for frame_index, (boxes, scores, class_ids) in cache.analyze(stride=10, start=9, conf=0.3):
+    frame_count = frame_index + 1
+    frames_analyzed += 1
     
     print(f"\n📍 Frame {frame_count}:")
     print("-" * 60)
     
-    # Get raw model results
-    results = detector.model(frame, conf=0.3, verbose=False)  # Lower threshold to see everything
-    
     found_anything = False
     frame_objects = []
     
-    for r in results:
-        boxes = r.boxes
-        for box in boxes:
-            class_id = int(box.cls[0])
-            class_name = detector.class_names[class_id]
-            confidence = float(box.conf[0])
-            x1, y1, x2, y2 = box.xyxy[0]
-            
-            frame_objects.append({
+    for (x1, y1, x2, y2), confidence, class_id in zip(boxes.tolist(), scores.tolist(), class_ids.tolist()):
+        class_name = cache.class_names[class_id]
+        
+        frame_objects.append({
+            'class': class_name,
+            'conf': confidence,
+            'bbox': (int(x1), int(y1), int(x2), int(y2))
+        })
+        
+        # Categorize detections
+        is_violation = class_name in config.VIOLATION_CLASSES
+        
+        if is_violation:
+            print(f"   🚨 VIOLATION: {class_name} - Confidence: {confidence:.3f}")
+            violation_detections.append({
+                'frame': frame_count,
                 'class': class_name,
-                'conf': confidence,
-                'bbox': (int(x1), int(y1), int(x2), int(y2))
+                'conf': confidence
             })
-            
-            # Categorize detections
-            is_violation = class_name in config.VIOLATION_CLASSES
-            
-            if is_violation:
-                print(f"   🚨 VIOLATION: {class_name} - Confidence: {confidence:.3f}")
-                violation_detections.append({
+            found_anything = True
+        else:
+            # Show safety equipment and people
+            if class_name in ['helmet', 'vest', 'goggles', 'gloves', 'boots', 'Person']:
+                print(f"   ✅ Safety: {class_name} - Confidence: {confidence:.3f}")
+                safety_equipment_detections.append({
                     'frame': frame_count,
                     'class': class_name,
                     'conf': confidence
                 })
                 found_anything = True
             else:
-                # Show safety equipment and people
-                if class_name in ['helmet', 'vest', 'goggles', 'gloves', 'boots', 'Person']:
-                    print(f"   ✅ Safety: {class_name} - Confidence: {confidence:.3f}")
-                    safety_equipment_detections.append({
-                        'frame': frame_count,
-                        'class': class_name,
-                        'conf': confidence
-                    })
-                    found_anything = True
-                else:
-                    print(f"   ⚪ Other: {class_name} - Confidence: {confidence:.3f}")
+                print(f"   ⚪ Other: {class_name} - Confidence: {confidence:.3f}")
     
     if not found_anything:
         print("   ⚪ No detections in this frame")
     
     # Also check what violation_detector.detect_violations() returns
-    violations = detector.detect_violations(frame)
+    # (same filter on the cached full-frame detections; ROI crops are not applied)
+    violations = [
+        (cache.class_names[class_id], confidence)
+        for confidence, class_id in zip(scores.tolist(), class_ids.tolist())
+        if confidence >= config.CONFIDENCE_THRESHOLD and cache.class_names[class_id] in config.VIOLATION_CLASSES
+    ]
     if violations:
         print(f"\n   ⚠️  detect_violations() found {len(violations)} violation(s):")
-        for v in violations:
-            print(f"      - {v['class_name']}: {v['confidence']:.3f}")
+        for class_name, confidence in violations:
+            print(f"      - {class_name}: {confidence:.3f}")
 
-cap.release()
+cache_stats = cache.get_stats()
 
 # Summary
 print("\n" + "="*80)
 print("DETECTION SUMMARY")
 print("="*80)
 
-print(f"\n📊 Total frames analyzed: {frame_count // 10}")
+print(f"\n📊 Total frames analyzed: {frames_analyzed}")
+print(f"💾 Cache: {cache_stats['hits']} frames from cache, {cache_stats['misses']} analyzed by the model")
 
 if violation_detections:
     print(f"\n🚨 VIOLATION DETECTIONS: {len(violation_detections)}")
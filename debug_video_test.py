@@ -43,16 +43,12 @@ while True:
     violations = detector.detect_violations(frame)
     
     # Also check raw results to see what's being detected
-    results = detector.model(frame, conf=config.CONFIDENCE_THRESHOLD, verbose=False)
-    for r in results:
-        boxes = r.boxes
-        if len(boxes) > 0:
-            print(f"Frame {frame_count}: Detected {len(boxes)} objects")
-            for box in boxes:
-                class_id = int(box.cls[0])
-                class_name = detector.class_names[class_id]
-                confidence = float(box.conf[0])
-                print(f"  - Class: {class_name} (ID: {class_id}), Confidence: {confidence:.2f}")
+    boxes, scores, class_ids = detector.detect_raw(frame, conf=config.CONFIDENCE_THRESHOLD)
+    if len(boxes) > 0:
+        print(f"Frame {frame_count}: Detected {len(boxes)} objects")
+        for class_id, confidence in zip(class_ids.tolist(), scores.tolist()):
+            class_name = detector.class_names[class_id]
+            print(f"  - Class: {class_name} (ID: {class_id}), Confidence: {confidence:.2f}")
     
     if violations:
         violation_count += len(violations)
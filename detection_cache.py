@@ -0,0 +1,221 @@
+"""
+Detection Cache - Raw detections of a video persisted on disk
+Purpose: Threshold and class-filter experiments (debug_detection_analysis.py
+and friends) re-run the model over the same video every time. The cache
+stores every raw box (class, confidence, xyxy) per frame index, keyed by the
+video's content hash and the model file's hash, so re-analysis reads boxes
+from disk instead of running inference - and, once every wanted frame is
+cached, without loading the model or decoding the video at all.
+
+Boxes are stored down to DETECTION_CACHE_MIN_CONF, so any threshold at or
+above it is answered from the cache. Settings that change the raw output
+(input size, NMS IoU, max detections, backend) are part of the key. One
+compressed .npz per key holds flat arrays: analyzed frame indices,
+detections per frame, boxes, scores and class ids.
+
+Detections are for full frames; ROI crops are not cached.
+"""
+
+import hashlib
+import json
+import os
+import cv2
+import numpy as np
+import config
+from inference_backends import create_backend
+from violation_detector import default_model_path
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """SHA-256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DetectionCache:
+    """Per-frame raw detections of one video for one model, loaded from and saved to disk"""
+
+    def __init__(self, video_path, model_path=None,
+                 backend=config.INFERENCE_BACKEND,
+                 cache_dir=config.DETECTION_CACHE_DIR,
+                 min_conf=config.DETECTION_CACHE_MIN_CONF):
+        """
+        Args:
+            video_path: Video file the detections belong to
+            model_path: Model file (default: chosen by config.MODEL_PRECISION)
+            backend: Inference backend used on cache misses
+            cache_dir: Directory of the .npz cache files
+            min_conf: Lowest confidence stored (and the lowest threshold the cache can answer)
+        """
+        self.video_path = video_path
+        self.model_path = model_path or default_model_path()
+        self.backend_name = backend
+        self.min_conf = min_conf
+        self.backend = None
+
+        # Everything that changes the raw model output is part of the key
+        settings = json.dumps({
+            'backend': backend,
+            'input_size': config.MODEL_INPUT_SIZE,
+            'iou': config.IOU_THRESHOLD,
+            'max_detections': config.MAX_DETECTIONS,
+            'min_conf': min_conf
+        }, sort_keys=True)
+        video_key = file_hash(video_path)[:16]
+        model_key = file_hash(self.model_path)[:16]
+        settings_key = hashlib.sha256(settings.encode()).hexdigest()[:8]
+        self.path = os.path.join(cache_dir, f"{video_key}_{model_key}_{settings_key}.npz")
+
+        # frame index -> (boxes, scores, class_ids) at min_conf
+        self.frames = {}
+        self.class_names = None
+        self.dirty = False
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+
+        if os.path.exists(self.path):
+            self._load()
+
+    def _load(self):
+        """Read the cache file into memory"""
+        with np.load(self.path) as data:
+            frames, counts = data['frames'], data['counts']
+            boxes, scores, class_ids = data['boxes'], data['scores'], data['class_ids']
+            self.class_names = {int(k): v for k, v in json.loads(str(data['class_names'])).items()}
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        for index, frame_index in enumerate(frames.tolist()):
+            start, end = offsets[index], offsets[index + 1]
+            self.frames[frame_index] = (boxes[start:end], scores[start:end], class_ids[start:end])
+
+    def save(self):
+        """Write the cache file (only if something was added)"""
+        if not self.dirty:
+            return self.path
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        frames = sorted(self.frames)
+        entries = [self.frames[frame_index] for frame_index in frames]
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                frames=np.array(frames, dtype=np.int32),
+                counts=np.array([len(scores) for _, scores, _ in entries], dtype=np.int32),
+                boxes=np.concatenate([b for b, _, _ in entries]).astype(np.float32) if entries else np.zeros((0, 4), np.float32),
+                scores=np.concatenate([s for _, s, _ in entries]).astype(np.float32) if entries else np.zeros(0, np.float32),
+                class_ids=np.concatenate([c for _, _, c in entries]).astype(np.int16) if entries else np.zeros(0, np.int16),
+                class_names=np.array(json.dumps(self.class_names or {}))
+            )
+        # Write then rename, so an interrupted run never leaves a truncated cache
+        os.replace(temp_path, self.path)
+        self.dirty = False
+        return self.path
+
+    def get(self, frame_index, conf=None):
+        """
+        Cached detections of a frame
+
+        Args:
+            frame_index: 0-based frame index in the video
+            conf: Confidence threshold (default: config.CONFIDENCE_THRESHOLD)
+
+        Returns:
+            (boxes, scores, class_ids) above conf, or None if the frame is not
+            cached or conf is below the stored minimum
+        """
+        conf = config.CONFIDENCE_THRESHOLD if conf is None else conf
+        entry = self.frames.get(frame_index)
+        if entry is None or conf < self.min_conf:
+            self.misses += 1
+            return None
+        self.hits += 1
+        boxes, scores, class_ids = entry
+        keep = scores >= conf
+        return boxes[keep], scores[keep], class_ids[keep].astype(np.int64)
+
+    def put(self, frame_index, detections):
+        """
+        Store a frame's raw detections (run at min_conf)
+
+        Args:
+            frame_index: 0-based frame index in the video
+            detections: (boxes, scores, class_ids) from backend.predict(frame, conf=min_conf)
+        """
+        boxes, scores, class_ids = detections
+        self.frames[frame_index] = (
+            np.asarray(boxes, dtype=np.float32).reshape(-1, 4),
+            np.asarray(scores, dtype=np.float32),
+            np.asarray(class_ids, dtype=np.int16)
+        )
+        self.dirty = True
+
+    def _load_backend(self):
+        """Load the model on the first cache miss"""
+        if self.backend is None:
+            self.backend = create_backend(self.backend_name, self.model_path)
+            self.class_names = self.backend.class_names
+        return self.backend
+
+    def analyze(self, stride=1, start=0, conf=None):
+        """
+        Raw detections of every stride-th frame, from the cache where possible
+
+        The video is only decoded (and the model only loaded) when a wanted
+        frame is missing; new results are added and saved at the end.
+
+        Args:
+            stride: Analyze every stride-th frame
+            start: First frame index
+            conf: Confidence threshold (default: config.CONFIDENCE_THRESHOLD)
+
+        Yields:
+            (frame_index, (boxes, scores, class_ids)) in frame order
+        """
+        conf = config.CONFIDENCE_THRESHOLD if conf is None else conf
+        cap = cv2.VideoCapture(self.video_path)
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        wanted = range(start, frame_count, stride) if frame_count > 0 else None
+
+        if wanted is not None and conf >= self.min_conf and all(i in self.frames for i in wanted):
+            # Fully cached: no decoding, no model
+            cap.release()
+            for frame_index in wanted:
+                yield frame_index, self.get(frame_index, conf)
+            return
+
+        try:
+            frame_index = -1
+            while cap.grab():
+                frame_index += 1
+                if frame_index < start or (frame_index - start) % stride:
+                    continue
+                detections = self.get(frame_index, conf)
+                if detections is None:
+                    ret, frame = cap.retrieve()
+                    if not ret:
+                        continue
+                    backend = self._load_backend()
+                    raw = backend.predict(frame, conf=min(conf, self.min_conf))
+                    if conf >= self.min_conf:
+                        self.put(frame_index, raw)
+                    boxes, scores, class_ids = raw
+                    keep = scores >= conf
+                    detections = boxes[keep], scores[keep], class_ids[keep]
+                yield frame_index, detections
+        finally:
+            cap.release()
+            self.save()
+
+    def get_stats(self):
+        """Get hit/miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            'frames_cached': len(self.frames),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,75 @@
+"""
+Detection Pipeline - Keep several frames in flight on the inference workers
+Purpose: With INFERENCE_BACKEND = "pool", ViolationDetector.submit() returns
+immediately and the frame runs on a worker process. This pipeline lets the
+capture loop hand over the next frame while earlier ones are still running,
+and returns results strictly in frame order so tracking, the motion gate
+and reporting see the video as it happened.
+"""
+
+from collections import deque
+from datetime import datetime
+
+
+class DetectionPipeline:
+    """Ordered, bounded window of in-flight detections"""
+
+    def __init__(self, detector, motion_gate=None, depth=None):
+        """
+        Args:
+            detector: ViolationDetector
+            motion_gate: Optional MotionGate deciding which frames need inference
+            depth: Frames kept in flight (default: number of pool workers, 1 otherwise)
+        """
+        self.detector = detector
+        self.motion_gate = motion_gate
+        self.depth = max(1, depth or getattr(detector.backend, 'workers', 1))
+        # Entries are (context, frame, pending handle or None for a motion-gated frame)
+        self.in_flight = deque()
+        # Result of the last frame the model ran on, reused for motion-gated frames
+        self.last_violations = []
+
+    def push(self, frame, context=None):
+        """
+        Submit a frame and return every result that is ready, oldest first
+
+        Blocks on the oldest frame only when `depth` frames are already in flight.
+
+        Args:
+            frame: OpenCV image frame (not modified while in flight)
+            context: Anything the caller wants back with the result (e.g. frame number)
+
+        Returns:
+            List of (context, frame, violations) tuples in submission order
+        """
+        pending = None
+        if self.motion_gate is None or self.motion_gate.should_run(frame):
+            pending = self.detector.submit(frame)
+        self.in_flight.append((context, frame, pending))
+
+        completed = []
+        while self.in_flight and (len(self.in_flight) >= self.depth or self._head_ready()):
+            completed.append(self._collect_head())
+        return completed
+
+    def flush(self):
+        """Wait for every frame still in flight (end of stream)"""
+        return [self._collect_head() for _ in range(len(self.in_flight))]
+
+    def _head_ready(self):
+        """True when the oldest frame's result is available without waiting"""
+        pending = self.in_flight[0][2]
+        return pending is None or pending[0].done()
+
+    def _collect_head(self):
+        """Resolve the oldest frame"""
+        context, frame, pending = self.in_flight.popleft()
+
+        if pending is not None:
+            violations = self.last_violations = self.detector.collect(pending)
+        else:
+            # Static scene: reuse the previous result with fresh timestamps
+            now = datetime.now()
+            violations = [dict(violation, timestamp=now) for violation in self.last_violations]
+
+        return context, frame, violations
@@ -8,9 +8,20 @@ import cv2
 import json
 import time
 import os
+import queue
+import signal
+import threading
 import boto3
 from datetime import datetime
 from violation_detector import ViolationDetector
+from motion_gate import MotionGate
+from incident_aggregator import IncidentAggregator
+from detection_pipeline import DetectionPipeline
+from evidence_writer import EvidenceWriter
+from evidence_profiles import existing_variants, primary_profile
+from roi import RegionOfInterest
+from frame_sampler import FrameSkipController
+from video_source import FrameReader, is_live_source
 import config
 
 class DetectionService:
@@ -22,9 +33,6 @@ class DetectionService:
         print("🚀 Detection Service - Initializing...")
         print("="*80)
         
-        # Initialize detector
-        self.detector = ViolationDetector()
-        
         # AWS Configuration
         self.aws_region = os.getenv('AWS_REGION', 'us-east-1')
         self.sqs_queue_url = os.getenv('SQS_QUEUE_URL')
@@ -34,9 +42,25 @@ class DetectionService:
         self.camera_id = os.getenv('CAMERA_ID', 'default_camera')
         self.site_location = os.getenv('SITE_LOCATION', config.SITE_LOCATION)
         
+        # Initialize detector (restricted to the camera's ROI from cameras.json, if any);
+        # violation images are written in the background, then uploaded and queued
+        # by a separate publisher thread so slow S3 calls never fill the evidence queue
+        self.evidence_writer = EvidenceWriter()
+        self.detector = ViolationDetector(
+            roi=RegionOfInterest.from_camera_config(self.camera_id),
+            evidence_writer=self.evidence_writer
+        )
+        self.motion_gate = MotionGate() if config.MOTION_GATE_ENABLED else None
+        self.pipeline = DetectionPipeline(self.detector, self.motion_gate)
+        self.incidents = IncidentAggregator() if config.INCIDENT_AGGREGATION else None
+        self.stop_requested = False
+        
         # Initialize AWS clients
         self.sqs_client = boto3.client('sqs', region_name=self.aws_region)
         self.s3_client = boto3.client('s3', region_name=self.aws_region)
+        self.publish_queue = queue.Queue()
+        self.publisher = threading.Thread(target=self._publish_loop, daemon=True)
+        self.publisher.start()
         
         # Video source configuration
         self.video_source = self._parse_video_source()
@@ -44,10 +68,15 @@ class DetectionService:
         # Statistics
         self.frame_count = 0
         self.violations_sent = 0
+        self.frame_skip = None
+        self.reader = None
         
         print(f"✅ Detection service initialized")
         print(f"   Camera ID: {self.camera_id}")
         print(f"   Location: {self.site_location}")
+        print(f"   ROI: {'Enabled' if self.detector.roi else 'Full frame'}")
+        startup = self.detector.get_startup_stats()
+        print(f"   Model cold load: {startup['cold_load_ms']:.0f}ms, warm-up: {startup['warmup_ms']:.0f}ms")
         print(f"   Video source: {self.video_source}")
         print(f"   SQS Queue: {self.sqs_queue_url}")
         print(f"   S3 Bucket: {self.s3_bucket}")
@@ -109,13 +138,14 @@ class DetectionService:
             print(f"❌ S3 upload failed: {e}")
             return None
     
-    def send_to_queue(self, violation, image_s3_url):
+    def send_to_queue(self, violation, image_s3_url, image_s3_urls=None):
         """
         Send violation to SQS queue for processing by Agent Service
         
         Args:
             violation: Violation dictionary
-            image_s3_url: S3 URL of violation image
+            image_s3_url: S3 URL of the primary violation image (None without evidence)
+            image_s3_urls: Optional dict of evidence profile -> S3 URL
         """
         try:
             # Prepare message payload with camera information
@@ -126,7 +156,12 @@ class DetectionService:
                 'confidence': violation['confidence'],
                 'osha_regulation': violation['osha_regulation'],
                 'bbox': violation['bbox'],
+                'track_id': violation.get('track_id'),
+                'incident_id': violation.get('incident_id'),
+                'duration': violation.get('duration'),
+                'detection_count': violation.get('detection_count'),
                 'image_s3_url': image_s3_url,
+                'image_s3_urls': {profile: url for profile, url in (image_s3_urls or {}).items() if url},
                 'camera_id': self.camera_id,  # Add camera identification
                 'site_location': self.site_location,  # Add specific location
                 'site_name': config.SITE_NAME,
@@ -161,13 +196,14 @@ class DetectionService:
             print(f"❌ Failed to send to SQS: {e}")
             return False
     
-    def process_violation(self, frame, violation):
+    def process_violation(self, frame, violation, annotated=None):
         """
         Process detected violation: save image, upload to S3, send to queue
         
         Args:
             frame: OpenCV frame
             violation: Violation dictionary
+            annotated: Frame with this frame's violations already drawn (optional)
         """
         print(f"\n{'='*80}")
         print(f"🚨 VIOLATION DETECTED: {violation['description']}")
@@ -175,21 +211,81 @@ class DetectionService:
         print(f"   Confidence: {violation['confidence']*100:.1f}%")
         print(f"{'='*80}")
         
-        # Save violation image locally
-        image_path = self.detector.save_violation_image(frame, violation)
+        # Save violation image locally; once it is on disk (or dropped) the violation is
+        # handed to the publisher thread, so neither the detection loop nor the
+        # evidence writer threads wait on S3 or SQS
+        self.detector.save_violation_image(
+            frame, violation, annotated=annotated,
+            on_done=lambda path: self.publish_queue.put((violation, path))
+        )
+    
+    def publish_violation(self, violation, image_path):
+        """
+        Upload a violation's evidence images to S3 and send the violation to SQS
         
-        # Upload to S3
-        timestamp_str = violation['timestamp'].strftime("%Y%m%d_%H%M%S")
-        s3_key = f"violations/{self.camera_id}/{timestamp_str}_{violation['class_name']}.jpg"
-        image_s3_url = self.upload_to_s3(image_path, s3_key)
+        The violation is sent even without evidence (dropped from a full
+        evidence queue, failed write or failed upload), just without image URLs.
+        
+        Args:
+            violation: Violation dictionary
+            image_path: Local path of the primary evidence image, or None
+        """
+        # Upload every evidence profile (crop, thumbnail, ...) that was written
+        image_s3_urls = {}
+        if image_path:
+            for profile, path in existing_variants(image_path, config.EVIDENCE_PROFILES).items():
+                s3_key = f"violations/{self.camera_id}/{os.path.basename(path)}"
+                image_s3_urls[profile] = self.upload_to_s3(path, s3_key)
+        image_s3_url = image_s3_urls.get(primary_profile())
+        if not image_s3_url:
+            print("⚠️  No evidence image available, sending violation without it")
         
         # Send to SQS queue for Agent Service to process
-        if image_s3_url:
-            self.send_to_queue(violation, image_s3_url)
+        if self.send_to_queue(violation, image_s3_url, image_s3_urls):
             print(f"✅ Violation queued for processing\n")
         else:
             print(f"❌ Failed to queue violation\n")
     
+    def _publish_loop(self):
+        """Publisher thread: upload evidence and send violations in report order"""
+        while True:
+            item = self.publish_queue.get()
+            if item is None:
+                return
+            try:
+                self.publish_violation(*item)
+            except Exception as e:
+                print(f"❌ Failed to publish violation: {e}")
+    
+    def close_publisher(self, timeout=30):
+        """Publish everything still queued, then stop the publisher thread"""
+        self.publish_queue.put(None)
+        self.publisher.join(timeout)
+    
+    def report_violations(self, results):
+        """
+        Report new violations from completed detections
+        
+        With incident aggregation only finished (or confirmed) incidents are
+        reported, with their best evidence frame.
+        
+        Args:
+            results: List of (context, frame, violations) from the detection pipeline
+        """
+        for _, frame, violations in results:
+            if self.incidents:
+                for incident in self.incidents.update(violations, frame):
+                    self.process_violation(incident.best_frame, incident.to_violation())
+                continue
+            
+            annotated = None
+            for violation in violations:
+                if self.detector.should_report_violation(violation):
+                    # Draw the frame's violations once, only if something is reported
+                    if annotated is None:
+                        annotated = self.detector.annotate(frame, violations)
+                    self.process_violation(frame, violation, annotated=annotated)
+    
     def run(self):
         """Main detection loop"""
         # Configure OpenCV video capture based on source type
@@ -209,50 +305,74 @@ class DetectionService:
             print("   • For file: Verify file exists and is readable")
             return
         
+        # Decode on a background thread so inference always gets the freshest frame;
+        # only sampled frames are decoded, video files are never dropped and optionally loop
+        live = is_live_source(self.video_source)
+        self.frame_skip = FrameSkipController(source_fps=cap.get(cv2.CAP_PROP_FPS))
+        self.reader = FrameReader(
+            cap,
+            drop_oldest=live,
+            loop=not live and os.getenv('LOOP_VIDEO', 'false').lower() == 'true',
+            sampler=self.frame_skip,
+            seek=not live and config.CAPTURE_SEEK_FILES
+        ).start()
+        
         print("="*80)
         print("🎥 DETECTION SERVICE STARTED")
         print("="*80)
         print(f"Camera ID: {self.camera_id}")
         print(f"Monitoring: {config.SITE_NAME}")
         print(f"Location: {self.site_location}")
-        print(f"Press Ctrl+C to stop")
+        print(f"Press Ctrl+C or send SIGTERM to stop")
         print("="*80 + "\n")
+        self._install_signal_handlers()
         
         try:
-            while True:
-                ret, frame = cap.read()
+            while not self.stop_requested:
+                # Time out now and then so a stop signal is handled without new frames
+                ret, frame = self.reader.read(timeout=1.0)
                 
                 if not ret:
+                    if not self.reader.stopped:
+                        continue
                     print("⚠️  Cannot read frame from video source")
-                    
-                    # For video files, optionally loop
-                    if isinstance(self.video_source, str) and not self.video_source.startswith(('rtsp://', 'http://')):
-                        if os.getenv('LOOP_VIDEO', 'false').lower() == 'true':
-                            print("🔄 Restarting video file...")
-                            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                            continue
-                    
                     print("🛑 End of video or stream error")
                     break
                 
-                self.frame_count += 1
-                
-                # Skip frames for performance
-                if self.frame_count % config.FRAME_SKIP != 0:
-                    continue
-                
-                # Detect violations
-                violations = self.detector.detect_violations(frame)
+                # Source frame number of this sampled frame (the reader skipped the rest)
+                self.frame_count = self.reader.frame_number
                 
-                if violations:
-                    for violation in violations:
-                        if self.detector.should_report_violation(violation):
-                            self.process_violation(frame, violation)
+                # Detect violations (motion gate reuses the last result on static scenes);
+                # with the pool backend earlier frames may still be in flight
+                detection_start = time.time()
+                self.report_violations(self.pipeline.push(frame))
+                self.frame_skip.record(self.frame_count, time.time() - detection_start)
                 
                 # Log statistics every 100 processed frames
-                if self.frame_count % (config.FRAME_SKIP * 100) == 0:
+                if self.frame_skip.frames_analyzed % 100 == 0:
+                    skip_stats = self.frame_skip.get_stats()
                     print(f"📊 Stats [{self.camera_id}]: Frames={self.frame_count}, "
-                          f"Violations Sent={self.violations_sent}")
+                          f"Violations Sent={self.violations_sent}, "
+                          f"Frame Skip={skip_stats['interval']} ({skip_stats['mode']})")
+                    capture_stats = self.reader.get_stats()
+                    print(f"   Capture: {capture_stats['frames_dropped']} stale frames dropped, "
+                          f"frame age p95 {capture_stats['frame_age_p95_ms']:.0f}ms")
+                    # Machine-readable per-stage p50/p95/p99/max for capacity planning
+                    print(f"LATENCY [{self.camera_id}] {self.detector.latency.to_json()}")
+                    if self.motion_gate:
+                        gate_stats = self.motion_gate.get_stats()
+                        print(f"   Motion gate: {gate_stats['hit_rate']*100:.1f}% of frames skipped inference")
+                    if self.incidents:
+                        incident_stats = self.incidents.get_stats()
+                        print(f"   Incidents: {incident_stats['incidents_reported']} reported from "
+                              f"{incident_stats['detections']} detections, {incident_stats['open_incidents']} open")
+                    evidence_stats = self.evidence_writer.get_stats()
+                    print(f"   Evidence queue: depth {evidence_stats['queue_depth']} "
+                          f"(max {evidence_stats['max_queue_depth']}), dropped {evidence_stats['dropped']}")
+                    if self.detector.frame_cache:
+                        cache_stats = self.detector.frame_cache.get_stats()
+                        print(f"   Frame cache: {cache_stats['hit_rate']*100:.1f}% hit rate "
+                              f"({cache_stats['hits']} hits, {cache_stats['evictions']} evictions)")
         
         except KeyboardInterrupt:
             print(f"\n🛑 Detection service [{self.camera_id}] stopped by user")
@@ -263,10 +383,44 @@ class DetectionService:
             traceback.print_exc()
         
         finally:
-            cap.release()
+            # Report frames still in flight and incidents still open, however the loop ended
+            self.flush_pending()
+            self.reader.release()
+            # Finish writing queued evidence, then publish it, before exiting
+            self.evidence_writer.close()
+            self.close_publisher()
+            if hasattr(self.detector.backend, 'close'):
+                self.detector.backend.close()
             print(f"\n📊 Final Stats [{self.camera_id}]:")
             print(f"   Frames processed: {self.frame_count}")
             print(f"   Violations sent to queue: {self.violations_sent}")
+            capture_stats = self.reader.get_stats()
+            print(f"   Frames decoded: {capture_stats['frames_decoded']}/{capture_stats['frames_captured']}, "
+                  f"stale frames dropped: {capture_stats['frames_dropped']}")
+            if self.motion_gate:
+                gate_stats = self.motion_gate.get_stats()
+                print(f"   Motion gate hit rate: {gate_stats['hit_rate']*100:.1f}% "
+                      f"({gate_stats['frames_skipped']}/{gate_stats['frames_checked']} frames)")
+
+
+    def flush_pending(self):
+        """Report detections still in flight and close every open incident (shutdown)"""
+        try:
+            self.report_violations(self.pipeline.flush())
+        except Exception as e:
+            print(f"⚠️  Could not finish in-flight detections: {e}")
+        if self.incidents:
+            for incident in self.incidents.flush():
+                self.process_violation(incident.best_frame, incident.to_violation())
+    
+    def _install_signal_handlers(self):
+        """SIGTERM (container stop) and SIGINT stop the loop so open incidents are still reported"""
+        def request_stop(signum, frame):
+            print(f"\n🛑 {signal.Signals(signum).name} received, stopping detection service [{self.camera_id}]...")
+            self.stop_requested = True
+        
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
 
 
 def main():
@@ -0,0 +1,71 @@
+"""
+Evidence Profiles - Naming of the per-profile violation images
+Purpose: A violation is saved once per entry of config.EVIDENCE_PROFILES
+(e.g. a padded crop and a small scene thumbnail) instead of one
+full-resolution frame. The files share a base name and differ only by a
+"_<profile>" suffix, so the PDF generator, the agent and the dashboard can
+find the size they need from any one of the paths.
+
+Kept free of OpenCV so the agent and dashboard images can import it.
+"""
+
+import os
+import config
+
+
+def primary_profile():
+    """Name of the first configured profile (logged, queued and reported)"""
+    return next(iter(config.EVIDENCE_PROFILES))
+
+
+def profile_path(base_path, profile):
+    """
+    Path of one profile's image
+
+    Args:
+        base_path: Evidence path without a profile (e.g. violations/..._0001.jpg)
+        profile: Profile name
+
+    Returns:
+        e.g. violations/..._0001_crop.jpg
+    """
+    root, ext = os.path.splitext(base_path)
+    return f"{root}_{profile}{ext}"
+
+
+def variant_path(image_path, profile):
+    """
+    Path of another profile's image of the same violation
+
+    Args:
+        image_path: Path (or S3 URL) of any profile's image
+        profile: Wanted profile name
+
+    Returns:
+        Sibling path, or None if image_path is not a profile image
+        (e.g. a full frame saved before evidence profiles existed)
+    """
+    root, ext = os.path.splitext(image_path)
+    for name in config.EVIDENCE_PROFILES:
+        if root.endswith(f"_{name}"):
+            return f"{root[:-len(name) - 1]}_{profile}{ext}"
+    return None
+
+
+def existing_variants(image_path, profiles):
+    """
+    Profile images of a violation that exist on disk
+
+    Args:
+        image_path: Path of any profile's image (or a legacy single image)
+        profiles: Profile names in order of preference
+
+    Returns:
+        Dict of profile -> path for the wanted profiles found on disk
+    """
+    variants = {}
+    for profile in profiles:
+        path = variant_path(image_path, profile)
+        if path and os.path.exists(path):
+            variants[profile] = path
+    return variants
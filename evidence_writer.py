@@ -0,0 +1,214 @@
+"""
+Evidence Writer - Background JPEG writer for violation images
+Purpose: cv2.imwrite inside the detection loop stalls frame processing on
+slow or network-backed violations/ volumes. Evidence images go through a
+bounded queue to a small pool of writer threads instead; the caller gets the
+final path immediately and inference never waits on disk I/O.
+
+Each violation's evidence profiles are queued together as one group.
+Writer threads only encode and write; completion callbacks should hand
+slow work (uploads) to their own worker. When the queue is full the
+overflow policy decides what happens:
+    "drop_newest" - refuse the new group (submit returns None)
+    "drop_oldest" - discard the oldest queued group to make room
+    "block"       - wait for room (only for offline tools)
+"""
+
+import os
+import queue
+import threading
+import time
+import cv2
+import config
+from latency_stats import LatencyHistogram
+
+OVERFLOW_POLICIES = ("drop_newest", "drop_oldest", "block")
+
+
+class EvidenceWriter:
+    """Bounded queue of images written to disk by background threads"""
+
+    def __init__(self,
+                 threads=config.EVIDENCE_WRITER_THREADS,
+                 queue_size=config.EVIDENCE_QUEUE_SIZE,
+                 jpeg_quality=config.EVIDENCE_JPEG_QUALITY,
+                 overflow=config.EVIDENCE_OVERFLOW_POLICY):
+        """
+        Args:
+            threads: Number of writer threads
+            queue_size: Max groups (violations) waiting to be written
+            jpeg_quality: Default JPEG quality (0-100)
+            overflow: What to do when the queue is full (see OVERFLOW_POLICIES)
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown EVIDENCE_OVERFLOW_POLICY '{overflow}'. Options: {', '.join(OVERFLOW_POLICIES)}")
+
+        self.jpeg_quality = jpeg_quality
+        self.overflow = overflow
+        self.jobs = queue.Queue(maxsize=queue_size)
+
+        # path -> Event set once the file is written (or given up on)
+        self.pending = {}
+        self.lock = threading.Lock()
+
+        # Statistics
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.max_queue_depth = 0
+        self.write_time = LatencyHistogram()
+
+        self.threads = [threading.Thread(target=self._write_loop, daemon=True) for _ in range(threads)]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, image, path, on_done=None, quality=None):
+        """
+        Queue an image for writing
+
+        Args:
+            image: OpenCV image (copied, so reused buffers and views are safe to pass)
+            path: Destination path
+            on_done: Optional callback(path or None) run once the image is done (see submit_group)
+            quality: JPEG quality (default: the writer's jpeg_quality)
+
+        Returns:
+            path, or None if the image was dropped because the queue was full
+        """
+        return self.submit_group([(image, path, quality)], on_done=on_done)
+
+    def submit_group(self, images, on_done=None):
+        """
+        Queue several images of one violation (e.g. its evidence profiles) as one job
+
+        The group takes one queue slot, is written by one thread and is
+        dropped or kept as a whole; wait_for() on any of its paths returns
+        once every image of the group is done.
+
+        Args:
+            images: List of (image, path, quality) tuples; quality None = jpeg_quality
+            on_done: Optional callback run exactly once when the group is finished:
+                     with the first image's path once it is written, or with None
+                     if it could not be written or the group was dropped. Runs on
+                     a writer thread (or the caller's, for a refused group), so
+                     it must be quick
+
+        Returns:
+            Path of the first image, or None if the group was dropped
+        """
+        job = ([(image.copy(), path, quality) for image, path, quality in images], on_done)
+        paths = [path for _, path, _ in images]
+        with self.lock:
+            for path in paths:
+                self.pending[path] = threading.Event()
+
+        if self.overflow == "block":
+            self.jobs.put(job)
+        else:
+            while True:
+                try:
+                    self.jobs.put_nowait(job)
+                    break
+                except queue.Full:
+                    if self.overflow == "drop_newest":
+                        self._finish(paths, dropped=True)
+                        self._notify(on_done, None)
+                        return None
+                    try:
+                        old_images, old_on_done = self.jobs.get_nowait()
+                        self.jobs.task_done()
+                        self._finish([path for _, path, _ in old_images], dropped=True)
+                        self._notify(old_on_done, None)
+                    except queue.Empty:
+                        pass
+
+        self.max_queue_depth = max(self.max_queue_depth, self.jobs.qsize())
+        return paths[0]
+
+    def _write_loop(self):
+        """Writer thread: encode and write queued images"""
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                self.jobs.task_done()
+                return
+
+            images, on_done = job
+            results = [self._write(image, path, quality) for image, path, quality in images]
+            paths = [path for _, path, _ in images]
+            self._finish(paths)
+            self._notify(on_done, paths[0] if results[0] else None)
+            self.jobs.task_done()
+
+    def _notify(self, on_done, path):
+        """Run a group's completion callback, if any"""
+        if on_done is None:
+            return
+        try:
+            on_done(path)
+        except Exception as e:
+            print(f"❌ Evidence callback failed for {path}: {e}")
+
+    def _write(self, image, path, quality):
+        """Encode and write one image; returns True on success"""
+        start = time.time()
+        try:
+            ok = cv2.imwrite(path, image, [cv2.IMWRITE_JPEG_QUALITY, quality or self.jpeg_quality])
+        except cv2.error as e:
+            print(f"❌ Evidence write failed for {path}: {e}")
+            ok = False
+        self.write_time.record(time.time() - start)
+
+        if ok:
+            self.written += 1
+        else:
+            self.failed += 1
+        return ok
+
+    def _finish(self, paths, dropped=False):
+        """Mark a group's paths as done (written, failed or dropped)"""
+        if dropped:
+            self.dropped += len(paths)
+            print(f"⚠️  Evidence queue full, dropped {paths[0]}")
+        with self.lock:
+            events = [self.pending.pop(path, None) for path in paths]
+        for event in events:
+            if event:
+                event.set()
+
+    def wait_for(self, path, timeout=None):
+        """
+        Wait until a queued image is on disk (e.g. before embedding it in a PDF)
+
+        Args:
+            path: Path returned by submit()
+            timeout: Max seconds to wait
+
+        Returns:
+            True if the file exists
+        """
+        with self.lock:
+            event = self.pending.get(path)
+        if event:
+            event.wait(timeout)
+        return os.path.exists(path)
+
+    def close(self, timeout=10):
+        """Write everything still queued, then stop the threads"""
+        for _ in self.threads:
+            self.jobs.put(None)
+        deadline = time.time() + timeout
+        for thread in self.threads:
+            thread.join(max(0, deadline - time.time()))
+
+    def get_stats(self):
+        """Get queue depth and write counters"""
+        write_time = self.write_time.summary()
+        return {
+            'queue_depth': self.jobs.qsize(),
+            'max_queue_depth': self.max_queue_depth,
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'write_p95_ms': write_time['p95_ms'] if write_time else None
+        }
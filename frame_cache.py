@@ -0,0 +1,122 @@
+"""
+Frame Cache - Near-duplicate frame cache keyed by perceptual hash
+Purpose: Consecutive sampled frames are often almost identical (workers
+standing still for long stretches). A difference hash (dHash) of a tiny
+grayscale thumbnail identifies frames that cannot produce new detections;
+their cached raw detections are reused instead of running the model.
+
+Entries are evicted least-recently-used once the cache is full, and expire
+after a time-to-live so a scene is re-checked by the model periodically.
+"""
+
+import time
+from collections import OrderedDict
+import cv2
+import numpy as np
+import config
+
+
+class FrameHashCache:
+    """Bounded LRU cache of raw detections keyed by a perceptual frame hash"""
+
+    def __init__(self,
+                 size=config.FRAME_CACHE_SIZE,
+                 max_distance=config.FRAME_CACHE_MAX_DISTANCE,
+                 hash_size=config.FRAME_CACHE_HASH_SIZE,
+                 ttl=config.FRAME_CACHE_TTL):
+        """
+        Args:
+            size: Max number of cached frames
+            max_distance: Max Hamming distance (bits) between hashes to count as the same frame
+            hash_size: Hash is hash_size x hash_size bits
+            ttl: Seconds a cached result may be reused (0 = no expiry)
+        """
+        self.size = size
+        self.max_distance = max_distance
+        self.hash_size = hash_size
+        self.ttl = ttl
+
+        # (frame_hash, frame_shape) -> (stored_at, detections), oldest use first
+        self.entries = OrderedDict()
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def frame_hash(self, frame):
+        """
+        Difference hash of a frame
+
+        Args:
+            frame: OpenCV image frame (BGR)
+
+        Returns:
+            Python int with hash_size * hash_size bits
+        """
+        gray = cv2.cvtColor(
+            cv2.resize(frame, (self.hash_size + 1, self.hash_size), interpolation=cv2.INTER_AREA),
+            cv2.COLOR_BGR2GRAY
+        )
+        # One bit per pixel: brighter than its right-hand neighbour
+        bits = gray[:, 1:] > gray[:, :-1]
+        return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+    def get(self, frame_hash, frame_shape):
+        """
+        Look up detections for a near-duplicate of a frame
+
+        Args:
+            frame_hash: Hash from frame_hash()
+            frame_shape: Shape of the frame (boxes are in its coordinates)
+
+        Returns:
+            Cached (boxes, scores, class_ids), or None on a miss
+        """
+        now = time.time()
+        for key, (stored_at, detections) in self.entries.items():
+            cached_hash, cached_shape = key
+            if cached_shape != frame_shape:
+                continue
+            if self.ttl and now - stored_at > self.ttl:
+                continue
+            if (cached_hash ^ frame_hash).bit_count() <= self.max_distance:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return detections
+
+        self.misses += 1
+        return None
+
+    def put(self, frame_hash, frame_shape, detections):
+        """
+        Store the detections of a frame the model ran on
+
+        Args:
+            frame_hash: Hash from frame_hash()
+            frame_shape: Shape of the frame
+            detections: (boxes, scores, class_ids) in frame coordinates
+        """
+        # Expired entries go first, then the least recently used
+        if self.ttl:
+            now = time.time()
+            for key in [k for k, (stored_at, _) in self.entries.items() if now - stored_at > self.ttl]:
+                del self.entries[key]
+                self.evictions += 1
+
+        self.entries[(frame_hash, frame_shape)] = (time.time(), detections)
+        self.entries.move_to_end((frame_hash, frame_shape))
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_stats(self):
+        """Get hit/miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': len(self.entries)
+        }
@@ -0,0 +1,126 @@
+"""
+Frame Sampler - Adaptive frame-skip controller
+Purpose: Replace the fixed FRAME_SKIP modulo check with a controller that
+adjusts the sampling interval at runtime to hit a target processed-FPS and an
+inference CPU budget. It backs off quickly when inference falls behind and
+tightens again gradually when there is headroom.
+
+The capture thread claims frames while the detection thread records
+results, so the scheduling state is guarded by a lock.
+"""
+
+import math
+import threading
+import config
+
+
+class FrameSkipController:
+    """Decides which frame numbers get analyzed"""
+
+    def __init__(self,
+                 source_fps=30.0,
+                 mode=config.FRAME_SKIP_MODE,
+                 initial_interval=config.FRAME_SKIP,
+                 target_fps=config.TARGET_PROCESSED_FPS,
+                 cpu_budget=config.INFERENCE_CPU_BUDGET,
+                 min_interval=config.MIN_FRAME_SKIP,
+                 max_interval=config.MAX_FRAME_SKIP):
+        """
+        Args:
+            source_fps: Frame rate of the video source (0/unknown falls back to 30)
+            mode: "fixed" (always initial_interval) or "adaptive"
+            initial_interval: Starting sampling interval in frames
+            target_fps: Desired analyzed frames per second (adaptive mode)
+            cpu_budget: Max share of wall time to spend in inference (adaptive mode)
+            min_interval: Lower bound for the interval (adaptive mode)
+            max_interval: Upper bound for the interval (adaptive mode)
+        """
+        if mode not in ("fixed", "adaptive"):
+            raise ValueError(f"Unknown FRAME_SKIP_MODE '{mode}'. Options: fixed, adaptive")
+
+        self.source_fps = source_fps if source_fps and source_fps > 0 else 30.0
+        self.mode = mode
+        self.target_fps = target_fps
+        self.cpu_budget = cpu_budget
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+
+        self.interval = max(1, initial_interval)
+        self.next_frame = self.interval
+        self.last_claimed = 0
+        self.latency_ema = None
+        self.frames_analyzed = 0
+        # Guards next_frame, last_claimed, interval and latency_ema
+        self.lock = threading.Lock()
+
+    def next_due(self):
+        """Number of the next frame due for analysis"""
+        with self.lock:
+            return self.next_frame
+
+    def claim(self, frame_number):
+        """
+        Check whether a frame is due and, if so, reserve it
+
+        Used by a capture thread that decides which frames to decode while
+        the previous sampled frame is still being analyzed.
+
+        Args:
+            frame_number: 1-based number of the frame read from the source
+
+        Returns:
+            True if the frame is due for analysis
+        """
+        with self.lock:
+            if frame_number < self.next_frame:
+                return False
+            self.last_claimed = frame_number
+            self.next_frame = frame_number + self.interval
+            return True
+
+    def record(self, frame_number, processing_seconds):
+        """
+        Report the processing time of an analyzed frame and schedule the next one
+
+        Args:
+            frame_number: Number of the frame that was analyzed
+            processing_seconds: Time spent analyzing it
+        """
+        with self.lock:
+            self.frames_analyzed += 1
+
+            if self.mode == "adaptive":
+                if self.latency_ema is None:
+                    self.latency_ema = processing_seconds
+                else:
+                    self.latency_ema = 0.8 * self.latency_ema + 0.2 * processing_seconds
+                self._adjust()
+
+            # A capture thread may already have claimed a later frame
+            self.next_frame = max(frame_number, self.last_claimed) + self.interval
+
+    def _adjust(self):
+        """Move the interval towards the one the target FPS and CPU budget allow (lock held)"""
+        # Interval at which inference uses exactly cpu_budget of wall time
+        budget_interval = self.latency_ema * self.source_fps / self.cpu_budget
+        target_interval = self.source_fps / self.target_fps if self.target_fps else 1
+        desired = math.ceil(max(budget_interval, target_interval))
+        desired = min(self.max_interval, max(self.min_interval, desired))
+
+        if desired > self.interval:
+            # Falling behind: back off multiplicatively
+            self.interval = min(self.max_interval, max(desired, math.ceil(self.interval * 1.5)))
+        elif desired < self.interval:
+            # Headroom: tighten one frame at a time to avoid oscillating
+            self.interval -= 1
+
+    def get_stats(self):
+        """Get the current sampling state"""
+        with self.lock:
+            return {
+                'mode': self.mode,
+                'interval': self.interval,
+                'frames_analyzed': self.frames_analyzed,
+                'processed_fps': self.source_fps / self.interval,
+                'avg_latency_ms': self.latency_ema * 1000 if self.latency_ema is not None else None
+            }
@@ -0,0 +1,182 @@
+"""
+Incident Aggregator - Collapse per-frame detections into violation events
+Purpose: One worker without a helmet in view for 10 seconds is hundreds of
+per-frame detections, and each reported detection costs an LLM call, a PDF,
+an upload and an email. The aggregator opens an incident when a violation
+appears, keeps it updated while the violation persists (duration, peak
+confidence, best evidence frame) and closes it after a gap without
+detections. Only confirmed incidents are reported, once each.
+
+Incidents are keyed by (class, track ID), so with tracking enabled every
+worker gets their own incident; without tracking it is one per class.
+"""
+
+from datetime import datetime
+import config
+
+REPORT_MODES = ("close", "confirm")
+
+
+class Incident:
+    """One violation event: the detections of a violation while it persists"""
+
+    def __init__(self, incident_id, key, violation, frame):
+        self.incident_id = incident_id
+        self.key = key
+        self.first_seen = violation['timestamp']
+        self.last_seen = violation['timestamp']
+        # Boxes at both ends, to match incidents split at a boundary (see offline_processor)
+        self.first_bbox = violation['bbox']
+        self.last_bbox = violation['bbox']
+        self.detections = 0
+        self.best_violation = None
+        self.best_frame = None
+        self.reported = False
+        self.update(violation, frame)
+
+    def update(self, violation, frame):
+        """
+        Add a detection; the highest-confidence one becomes the evidence
+
+        The frame is kept by reference, so callers must not draw into or
+        reuse the buffer afterwards.
+        """
+        self.detections += 1
+        self.last_seen = violation['timestamp']
+        self.last_bbox = violation['bbox']
+        if self.best_violation is None or violation['confidence'] > self.best_violation['confidence']:
+            self.best_violation = violation
+            self.best_frame = frame
+
+    @property
+    def duration(self):
+        """Seconds between the first and the last detection"""
+        return (self.last_seen - self.first_seen).total_seconds()
+
+    def to_violation(self):
+        """
+        Violation dictionary to report: the best detection plus incident fields
+
+        Returns:
+            Copy of the highest-confidence violation with incident_id,
+            first_seen, last_seen, duration, detection_count and peak_confidence
+        """
+        return dict(
+            self.best_violation,
+            incident_id=self.incident_id,
+            first_seen=self.first_seen,
+            last_seen=self.last_seen,
+            duration=self.duration,
+            detection_count=self.detections,
+            peak_confidence=self.best_violation['confidence']
+        )
+
+
+class IncidentAggregator:
+    """Turns the per-frame violation stream into incidents to report"""
+
+    def __init__(self,
+                 gap=config.INCIDENT_GAP_SECONDS,
+                 min_detections=config.INCIDENT_MIN_DETECTIONS,
+                 report_on=config.INCIDENT_REPORT_ON,
+                 max_duration=config.INCIDENT_MAX_DURATION):
+        """
+        Args:
+            gap: Seconds without a detection after which an incident closes
+            min_detections: Detections before an incident is confirmed
+            report_on: "close" (report finished incidents) or "confirm" (report once confirmed)
+            max_duration: Seconds after which a long incident is closed anyway (0 = never)
+        """
+        if report_on not in REPORT_MODES:
+            raise ValueError(f"Unknown INCIDENT_REPORT_ON '{report_on}'. Options: {', '.join(REPORT_MODES)}")
+
+        self.gap = gap
+        self.min_detections = max(1, min_detections)
+        self.report_on = report_on
+        self.max_duration = max_duration
+
+        # (class_name, track_id) -> open Incident
+        self.open_incidents = {}
+        self.next_id = 1
+
+        # Statistics
+        self.detections = 0
+        self.incidents_opened = 0
+        self.incidents_reported = 0
+        self.incidents_discarded = 0
+
+    def update(self, violations, frame, now=None):
+        """
+        Add one analyzed frame's violations and return the incidents to report
+
+        Call this for every analyzed frame, including frames without
+        violations, so incidents close on time.
+
+        Args:
+            violations: List of violation dictionaries from one frame
+            frame: The frame they were detected in (kept as evidence, not copied)
+            now: Time of the frame (default: the violations' timestamp, else the current time)
+
+        Returns:
+            List of Incident objects that are ready to report
+        """
+        if now is None:
+            now = violations[0]['timestamp'] if violations else datetime.now()
+
+        ready = []
+        for violation in violations:
+            key = (violation['class_name'], violation.get('track_id'))
+            incident = self.open_incidents.get(key)
+            if incident is None:
+                incident = Incident(self.next_id, key, violation, frame)
+                self.next_id += 1
+                self.incidents_opened += 1
+                self.open_incidents[key] = incident
+            else:
+                incident.update(violation, frame)
+            self.detections += 1
+
+            if self.report_on == "confirm" and not incident.reported and incident.detections >= self.min_detections:
+                ready.append(self._report(incident))
+
+        for key, incident in list(self.open_incidents.items()):
+            idle = (now - incident.last_seen).total_seconds()
+            if idle > self.gap or (self.max_duration and incident.duration >= self.max_duration):
+                del self.open_incidents[key]
+                ready.extend(self._close(incident))
+
+        return ready
+
+    def flush(self):
+        """Close every open incident (end of stream or shutdown) and return those to report"""
+        ready = []
+        for incident in self.open_incidents.values():
+            ready.extend(self._close(incident))
+        self.open_incidents = {}
+        return ready
+
+    def _close(self, incident):
+        """Finish an incident; returns [incident] if it still has to be reported"""
+        if incident.detections < self.min_detections:
+            self.incidents_discarded += 1
+            return []
+        if incident.reported:
+            return []
+        return [self._report(incident)]
+
+    def _report(self, incident):
+        """Mark an incident as reported"""
+        incident.reported = True
+        self.incidents_reported += 1
+        return incident
+
+    def get_stats(self):
+        """Get detection and incident counters"""
+        return {
+            'detections': self.detections,
+            'incidents_opened': self.incidents_opened,
+            'incidents_reported': self.incidents_reported,
+            'incidents_discarded': self.incidents_discarded,
+            'open_incidents': len(self.open_incidents),
+            'detections_per_report': self.detections / self.incidents_reported if self.incidents_reported else 0.0
+        }
@@ -0,0 +1,653 @@
+"""
+Inference Backends - Pluggable model runtimes for ViolationDetector
+Purpose: Run the exported PPE model and return raw detections as NumPy arrays
+
+Every backend exposes the same small interface:
+    backend.class_names                  -> {class_id: class_name}
+    backend.predict(frame, conf=None)    -> (boxes, scores, class_ids)
+    backend.predict_batch(frames, conf=None) -> [(boxes, scores, class_ids), ...]
+    backend.latency                      -> LatencyRecorder with per-call stage timings
+
+boxes is an (N, 4) float32 array of x1, y1, x2, y2 in the coordinates of the
+frame that was passed in, scores is (N,) float32 and class_ids is (N,) int.
+"""
+
+import ast
+import os
+import time
+from concurrent.futures import Future
+import cv2
+import numpy as np
+import config
+from latency_stats import LatencyRecorder
+from preprocessing import PAD_VALUE, LetterboxPreprocessor
+from shared_frames import SharedFrameRing
+
+
+class UltralyticsBackend:
+    """Reference backend using the ultralytics YOLO wrapper"""
+
+    name = "ultralytics"
+
+    def __init__(self, model_path):
+        """Load the model through ultralytics"""
+        # Imported lazily so nodes running the ONNX Runtime backend do not need ultralytics
+        from ultralytics import YOLO
+
+        self.model = YOLO(model_path)
+        self.class_names = self.model.names
+        self.latency = LatencyRecorder()
+
+    def predict(self, frame, conf=None):
+        """
+        Run the model on a frame
+
+        Args:
+            frame: OpenCV image frame (BGR)
+            conf: Confidence threshold (default: config.CONFIDENCE_THRESHOLD)
+
+        Returns:
+            Tuple of (boxes, scores, class_ids) NumPy arrays
+        """
+        return self.predict_batch([frame], conf=conf)[0]
+
+    def predict_batch(self, frames, conf=None):
+        """
+        Run the model on several frames in one call
+
+        Args:
+            frames: List of OpenCV image frames (BGR), sizes may differ
+            conf: Confidence threshold (default: config.CONFIDENCE_THRESHOLD)
+
+        Returns:
+            List of (boxes, scores, class_ids) tuples, one per frame
+        """
+        conf = config.CONFIDENCE_THRESHOLD if conf is None else conf
+
+        # Raw frames go straight in: ultralytics letterboxes once to imgsz,
+        # so there is no separate (aspect-distorting) pre-resize
+        results = self.model(
+            list(frames),
+            imgsz=config.MODEL_INPUT_SIZE,
+            conf=conf,
+            iou=config.IOU_THRESHOLD,  # NMS threshold
+            max_det=config.MAX_DETECTIONS,  # Limit detections
+            verbose=False,
+            half=config.USE_HALF_PRECISION  # FP16 (GPU only)
+        )
+
+        outputs = []
+        for r in results:
+            # ultralytics times its own stages (milliseconds per image)
+            for stage, key in (("preprocess", "preprocess"), ("forward", "inference"), ("decode", "postprocess")):
+                self.latency.record(stage, r.speed[key] / 1000)
+
+            # Pull whole tensors out at once instead of walking r.boxes
+            boxes = r.boxes.xyxy.cpu().numpy().astype(np.float32)
+            scores = r.boxes.conf.cpu().numpy().astype(np.float32)
+            class_ids = r.boxes.cls.cpu().numpy().astype(np.int64)
+
+            outputs.append((boxes.reshape(-1, 4), scores, class_ids))
+
+        return outputs
+
+
+class OnnxRuntimeBackend:
+    """Native ONNX Runtime backend with NumPy letterbox, decode and NMS"""
+
+    name = "onnxruntime"
+
+    def __init__(self, model_path, intra_op_threads=config.ORT_INTRA_OP_THREADS):
+        """
+        Create the inference session
+
+        Args:
+            model_path: Path to the exported YOLO .onnx model
+            intra_op_threads: ONNX Runtime intra-op threads (0 = runtime default)
+        """
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+
+        self.session = ort.InferenceSession(
+            model_path,
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+
+        # Exports with a fixed batch axis of 1 cannot take stacked frames
+        self.dynamic_batch = not isinstance(model_input.shape[0], int)
+
+        # Dynamic axes come back as strings/None; fall back to the configured size
+        height, width = model_input.shape[2], model_input.shape[3]
+        self.input_height = height if isinstance(height, int) else config.MODEL_INPUT_SIZE
+        self.input_width = width if isinstance(width, int) else config.MODEL_INPUT_SIZE
+
+        self.class_names = self._read_class_names()
+        self.preprocessor = LetterboxPreprocessor(self.input_width, self.input_height)
+        self.latency = LatencyRecorder()
+
+    def _read_class_names(self):
+        """Read class names from the metadata ultralytics embeds on export"""
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        if "names" in metadata:
+            names = ast.literal_eval(metadata["names"])
+            return {int(class_id): name for class_id, name in names.items()}
+
+        # Unknown export: number the classes from the output width
+        num_outputs = self.session.get_outputs()[0].shape[1]
+        num_classes = num_outputs - 4 if isinstance(num_outputs, int) else 0
+        return {class_id: str(class_id) for class_id in range(num_classes)}
+
+    def predict(self, frame, conf=None):
+        """
+        Run the model on a frame
+
+        Args:
+            frame: OpenCV image frame (BGR)
+            conf: Confidence threshold (default: config.CONFIDENCE_THRESHOLD)
+
+        Returns:
+            Tuple of (boxes, scores, class_ids) NumPy arrays
+        """
+        return self.predict_batch([frame], conf=conf)[0]
+
+    def predict_batch(self, frames, conf=None):
+        """
+        Run the model on several frames with a single session call
+
+        Frames are letterboxed straight into the preprocessor's reusable
+        (B, 3, H, W) input buffer. Models exported with a static batch size
+        of 1 fall back to one call per frame.
+
+        Args:
+            frames: List of OpenCV image frames (BGR), sizes may differ
+            conf: Confidence threshold (default: config.CONFIDENCE_THRESHOLD)
+
+        Returns:
+            List of (boxes, scores, class_ids) tuples, one per frame
+        """
+        conf = config.CONFIDENCE_THRESHOLD if conf is None else conf
+
+        if self.dynamic_batch:
+            with self.latency.measure("preprocess"):
+                batch, transforms = self.preprocessor.process_batch(frames)
+            with self.latency.measure("forward"):
+                predictions = self.session.run(None, {self.input_name: batch})[0]
+        else:
+            predictions, transforms = [], []
+            for frame in frames:
+                with self.latency.measure("preprocess"):
+                    transforms.append(self.preprocessor.process(frame))
+                blob = self.preprocessor.buffer[:1]
+                with self.latency.measure("forward"):
+                    predictions.append(self.session.run(None, {self.input_name: blob})[0][0])
+
+        with self.latency.measure("decode"):
+            return [
+                self._decode(prediction, transform, conf)
+                for prediction, transform in zip(predictions, transforms)
+            ]
+
+    def _decode(self, prediction, transform, conf):
+        """Turn one raw YOLO output (4 + num_classes, anchors) into frame-space detections"""
+        num_classes = len(self.class_names)
+        if prediction.shape[0] == 4 + num_classes:
+            prediction = prediction.T
+
+        class_scores = prediction[:, 4:]
+        class_ids = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(class_scores)), class_ids]
+
+        keep = scores >= conf
+        if not keep.any():
+            return (
+                np.empty((0, 4), dtype=np.float32),
+                np.empty(0, dtype=np.float32),
+                np.empty(0, dtype=np.int64)
+            )
+
+        xywh = prediction[keep, :4]
+        scores = scores[keep].astype(np.float32)
+        class_ids = class_ids[keep]
+
+        # cx, cy, w, h in letterbox space -> x1, y1, x2, y2 in frame space
+        boxes = np.empty_like(xywh, dtype=np.float32)
+        boxes[:, 0] = xywh[:, 0] - xywh[:, 2] / 2
+        boxes[:, 1] = xywh[:, 1] - xywh[:, 3] / 2
+        boxes[:, 2] = xywh[:, 0] + xywh[:, 2] / 2
+        boxes[:, 3] = xywh[:, 1] + xywh[:, 3] / 2
+        transform.to_source(boxes)
+
+        keep = non_max_suppression(
+            boxes, scores, class_ids,
+            iou_threshold=config.IOU_THRESHOLD,
+            max_detections=config.MAX_DETECTIONS
+        )
+        return boxes[keep], scores[keep], class_ids[keep]
+
+
+def box_iou(boxes_a, boxes_b):
+    """
+    Pairwise IoU between two sets of x1, y1, x2, y2 boxes
+
+    Returns:
+        (len(boxes_a), len(boxes_b)) float32 IoU matrix
+    """
+    boxes_a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    boxes_b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+
+    xx1 = np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0])
+    yy1 = np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1])
+    xx2 = np.minimum(boxes_a[:, None, 2], boxes_b[None, :, 2])
+    yy2 = np.minimum(boxes_a[:, None, 3], boxes_b[None, :, 3])
+    intersection = np.clip(xx2 - xx1, 0, None) * np.clip(yy2 - yy1, 0, None)
+
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    return intersection / (area_a[:, None] + area_b[None, :] - intersection + 1e-9)
+
+
+def non_max_suppression(boxes, scores, class_ids, iou_threshold, max_detections):
+    """
+    Greedy per-class NMS in NumPy
+
+    Boxes of different classes are shifted apart so that a single pass
+    never suppresses across classes (same behaviour as ultralytics).
+
+    Returns:
+        Indices of the boxes to keep, highest score first
+    """
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    offsets = class_ids.astype(np.float32)[:, None] * (boxes.max() + 1)
+    shifted = boxes + offsets
+    areas = (shifted[:, 2] - shifted[:, 0]) * (shifted[:, 3] - shifted[:, 1])
+
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size > 0 and len(keep) < max_detections:
+        best = order[0]
+        keep.append(best)
+        rest = order[1:]
+
+        xx1 = np.maximum(shifted[best, 0], shifted[rest, 0])
+        yy1 = np.maximum(shifted[best, 1], shifted[rest, 1])
+        xx2 = np.minimum(shifted[best, 2], shifted[rest, 2])
+        yy2 = np.minimum(shifted[best, 3], shifted[rest, 3])
+        intersection = np.clip(xx2 - xx1, 0, None) * np.clip(yy2 - yy1, 0, None)
+        iou = intersection / (areas[best] + areas[rest] - intersection + 1e-9)
+
+        order = rest[iou <= iou_threshold]
+
+    return np.array(keep, dtype=np.int64)
+
+
+def warmup_frame(width, height):
+    """
+    Constant mid-gray frame for warm-up runs
+
+    Warms preprocessing and the forward pass only: a uniform frame yields no
+    candidates above the confidence threshold, so decode returns before NMS
+    and the first frame with detections still pays that path's first-call cost.
+    Unlike random noise it makes every warm-up run identical.
+    """
+    return np.full((height, width, 3), PAD_VALUE, dtype=np.uint8)
+
+
+# Backend of the current pool worker process (see ProcessPoolBackend)
+_worker_backend = None
+_worker_ring = None
+
+
+def _init_pool_worker(model_path, intra_op_threads, ring_spec=None):
+    """Load the model once per worker process, attach to the frame ring and warm up"""
+    global _worker_backend, _worker_ring
+    _worker_backend = OnnxRuntimeBackend(model_path, intra_op_threads=intra_op_threads)
+    if ring_spec:
+        _worker_ring = SharedFrameRing.attach(*ring_spec)
+    dummy = warmup_frame(_worker_backend.input_width, _worker_backend.input_height)
+    for _ in range(config.WARMUP_ITERATIONS):
+        _worker_backend.predict(dummy)
+
+
+def _pool_worker_info():
+    """Class names and input size of the worker's model"""
+    _worker_backend.latency.reset()  # warm-up runs are not reported
+    return _worker_backend.class_names, (_worker_backend.input_width, _worker_backend.input_height)
+
+
+def _pool_worker_timings():
+    """Stage samples the worker's backend recorded since the last call, sent back to the parent"""
+    timings = {stage: list(histogram.samples) for stage, histogram in _worker_backend.latency.stages.items()}
+    _worker_backend.latency.reset()
+    return timings
+
+
+def _pool_worker_frame(item):
+    """A pickled frame, or a zero-copy view of a (slot, sequence) in the shared frame ring"""
+    if isinstance(item, tuple):
+        return _worker_ring.view(*item)
+    return item
+
+
+def _pool_worker_predict(item, conf):
+    """Run one frame in the worker process; returns (result, stage timings)"""
+    return _worker_backend.predict(_pool_worker_frame(item), conf=conf), _pool_worker_timings()
+
+
+def _pool_worker_predict_batch(items, conf):
+    """Run a chunk of frames in the worker process; returns (results, stage timings)"""
+    results = _worker_backend.predict_batch([_pool_worker_frame(item) for item in items], conf=conf)
+    return results, _pool_worker_timings()
+
+
+class ProcessPoolBackend:
+    """
+    ONNX Runtime sessions in N worker processes, for hosts where one process cannot use every core
+
+    Each worker owns its own session with a fixed number of intra-op threads.
+    predict_batch splits frames across the workers and returns results in
+    order; submit() lets a capture loop keep several frames in flight.
+    Frames travel through a SharedFrameRing (one memcpy, no pickling) and
+    fall back to pickling when every slot is busy or a frame is too large.
+    """
+
+    name = "pool"
+    # Every worker process warms up its own session at startup (see _init_pool_worker)
+    warms_up_workers = True
+
+    def __init__(self, model_path,
+                 workers=config.INFERENCE_WORKERS,
+                 intra_op_threads=config.INFERENCE_WORKER_THREADS):
+        """
+        Start the worker processes
+
+        Args:
+            model_path: Path to the exported YOLO .onnx model
+            workers: Number of worker processes (0 = cores / intra_op_threads)
+            intra_op_threads: ONNX Runtime intra-op threads per worker
+        """
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        self.workers = workers or max(1, (os.cpu_count() or 1) // max(1, intra_op_threads))
+
+        # Frames go to the workers through shared memory instead of pickled copies
+        self.ring = None
+        ring_spec = None
+        if config.SHARED_FRAME_SLOTS != -1:
+            slots = config.SHARED_FRAME_SLOTS or 2 * self.workers
+            self.ring = SharedFrameRing(slots, config.SHARED_FRAME_SLOT_BYTES)
+            ring_spec = (self.ring.name, slots, config.SHARED_FRAME_SLOT_BYTES)
+
+        # One single-process executor per worker so work can be split deterministically;
+        # spawn, because the parent may already be running capture threads
+        context = multiprocessing.get_context("spawn")
+        self.executors = []
+        try:
+            for _ in range(self.workers):
+                self.executors.append(ProcessPoolExecutor(
+                    max_workers=1, mp_context=context,
+                    initializer=_init_pool_worker, initargs=(model_path, intra_op_threads, ring_spec)
+                ))
+            # Every worker loads and warms up its model before the first real frame
+            infos = [future.result() for future in [executor.submit(_pool_worker_info) for executor in self.executors]]
+        except BaseException:
+            # A worker that fails to start must not leak the others or the shared memory block
+            self.close()
+            raise
+        self.class_names, (self.input_width, self.input_height) = infos[0]
+
+        self.next_worker = 0
+        self.latency = LatencyRecorder()
+
+    def submit(self, frame, conf=None):
+        """
+        Start inference on one frame on the next worker without waiting
+
+        Args:
+            frame: OpenCV image frame (BGR)
+            conf: Confidence threshold (default: config.CONFIDENCE_THRESHOLD)
+
+        Returns:
+            concurrent.futures.Future resolving to (boxes, scores, class_ids)
+        """
+        conf = config.CONFIDENCE_THRESHOLD if conf is None else conf
+        return self._dispatch(_pool_worker_predict, [frame], conf)
+
+    def _dispatch(self, function, frames, conf):
+        """
+        Send frames to the next worker, through the frame ring where a slot is free
+
+        Returns:
+            Future resolving to the worker's result; the preprocess/forward/decode
+            timings the worker measured are added to self.latency when it completes
+        """
+        executor = self.executors[self.next_worker]
+        self.next_worker = (self.next_worker + 1) % self.workers
+
+        items, slots = [], []
+        for frame in frames:
+            ref = self.ring.write(frame) if self.ring else None
+            if ref:
+                slots.append(ref[0])
+            items.append(ref or frame)
+
+        payload = items[0] if function is _pool_worker_predict else items
+        try:
+            future = executor.submit(function, payload, conf)
+        except Exception:
+            # e.g. BrokenProcessPool: the worker will never read these slots
+            for slot in slots:
+                self.ring.release(slot)
+            raise
+        if slots:
+            future.add_done_callback(lambda _: [self.ring.release(slot) for slot in slots])
+
+        result = Future()
+        future.add_done_callback(lambda done: self._resolve(done, result))
+        return result
+
+    def _resolve(self, worker_future, result):
+        """Record a finished call's worker-side stage timings and hand its result to the caller"""
+        try:
+            value, timings = worker_future.result()
+        except Exception as e:
+            result.set_exception(e)
+            return
+        for stage, samples in timings.items():
+            for seconds in samples:
+                self.latency.record(stage, seconds)
+        result.set_result(value)
+
+    def predict(self, frame, conf=None):
+        """
+        Run the model on a frame
+
+        Args:
+            frame: OpenCV image frame (BGR)
+            conf: Confidence threshold (default: config.CONFIDENCE_THRESHOLD)
+
+        Returns:
+            Tuple of (boxes, scores, class_ids) NumPy arrays
+        """
+        return self.predict_batch([frame], conf=conf)[0]
+
+    def predict_batch(self, frames, conf=None):
+        """
+        Split frames into one contiguous chunk per worker and run the chunks in parallel
+
+        Args:
+            frames: List of OpenCV image frames (BGR), sizes may differ
+            conf: Confidence threshold (default: config.CONFIDENCE_THRESHOLD)
+
+        Returns:
+            List of (boxes, scores, class_ids) tuples, one per frame, in input order
+        """
+        conf = config.CONFIDENCE_THRESHOLD if conf is None else conf
+        frames = list(frames)
+        if not frames:
+            return []
+
+        chunk_size = -(-len(frames) // self.workers)
+        futures = [
+            self._dispatch(_pool_worker_predict_batch, frames[start:start + chunk_size], conf)
+            for start in range(0, len(frames), chunk_size)
+        ]
+        return [result for future in futures for result in future.result()]
+
+    def close(self):
+        """Stop the worker processes and free the frame ring"""
+        for executor in self.executors:
+            executor.shutdown(wait=True, cancel_futures=True)
+        if self.ring:
+            self.ring.close()
+            self.ring = None
+
+
+def server_address(address):
+    """
+    Parse an inference server address
+
+    Args:
+        address: "host:port" for TCP, anything else is a Unix socket path
+
+    Returns:
+        Address accepted by multiprocessing.connection
+    """
+    host, separator, port = address.rpartition(":")
+    if separator and port.isdigit():
+        return (host or "localhost", int(port))
+    return address
+
+
+class RemoteBackend:
+    """Client for a shared inference_server.py process that owns the model"""
+
+    name = "remote"
+
+    def __init__(self, model_path=None,
+                 address=config.INFERENCE_SERVER_ADDRESS,
+                 connect_timeout=config.INFERENCE_SERVER_CONNECT_TIMEOUT):
+        """
+        Connect to the inference server
+
+        Args:
+            model_path: Ignored; the server decides which model it serves
+            address: Server address ("host:port" or Unix socket path)
+            connect_timeout: Seconds to keep retrying while the server starts up
+        """
+        from multiprocessing.connection import Client
+
+        if not config.INFERENCE_SERVER_AUTHKEY:
+            raise ValueError("INFERENCE_SERVER_AUTHKEY is not set. Use the inference server's secret")
+
+        deadline = time.time() + connect_timeout
+        while True:
+            try:
+                self.connection = Client(server_address(address),
+                                         authkey=config.INFERENCE_SERVER_AUTHKEY.encode())
+                break
+            except (ConnectionRefusedError, FileNotFoundError):
+                if time.time() >= deadline:
+                    raise
+                time.sleep(1)
+
+        info = self._call(("info",))
+        self.class_names = info["class_names"]
+        self.input_width, self.input_height = info["input_size"]
+        self.latency = LatencyRecorder()
+
+    def _call(self, request):
+        """Send one request and wait for its reply"""
+        self.connection.send(request)
+        status, payload = self.connection.recv()
+        if status != "ok":
+            raise RuntimeError(f"Inference server error: {payload}")
+        return payload
+
+    def _shrink(self, frame):
+        """
+        Downscale a frame to the model's letterbox size before it goes over the socket
+
+        The server would resize it to exactly this size anyway, so results are
+        unchanged while a 1080p frame shrinks to a fraction of the bytes.
+        """
+        source_height, source_width = frame.shape[:2]
+        ratio = min(self.input_width / source_width, self.input_height / source_height)
+        if ratio >= 1:
+            return frame, 1.0, 1.0
+
+        size = (int(round(source_width * ratio)), int(round(source_height * ratio)))
+        small = cv2.resize(frame, size, interpolation=cv2.INTER_LINEAR)
+        return small, source_width / size[0], source_height / size[1]
+
+    def predict(self, frame, conf=None):
+        """
+        Run the model on a frame
+
+        Args:
+            frame: OpenCV image frame (BGR)
+            conf: Confidence threshold (default: config.CONFIDENCE_THRESHOLD)
+
+        Returns:
+            Tuple of (boxes, scores, class_ids) NumPy arrays
+        """
+        return self.predict_batch([frame], conf=conf)[0]
+
+    def predict_batch(self, frames, conf=None):
+        """
+        Run the model on several frames; the server may batch them with other clients' frames
+
+        Args:
+            frames: List of OpenCV image frames (BGR), sizes may differ
+            conf: Confidence threshold (default: config.CONFIDENCE_THRESHOLD)
+
+        Returns:
+            List of (boxes, scores, class_ids) tuples, one per frame
+        """
+        conf = config.CONFIDENCE_THRESHOLD if conf is None else conf
+
+        with self.latency.measure("preprocess"):
+            shrunk = [self._shrink(frame) for frame in frames]
+        # Round trip to the server, including time spent waiting for a batch to fill
+        with self.latency.measure("forward"):
+            results = self._call(("predict", [small for small, _, _ in shrunk], conf))
+
+        for (boxes, _, _), (_, scale_x, scale_y) in zip(results, shrunk):
+            boxes[:, [0, 2]] *= scale_x
+            boxes[:, [1, 3]] *= scale_y
+        return results
+
+
+BACKENDS = {
+    UltralyticsBackend.name: UltralyticsBackend,
+    OnnxRuntimeBackend.name: OnnxRuntimeBackend,
+    RemoteBackend.name: RemoteBackend,
+    ProcessPoolBackend.name: ProcessPoolBackend
+}
+
+
+def create_backend(name, model_path, **options):
+    """
+    Create an inference backend by name
+
+    Args:
+        name: Backend name (see BACKENDS)
+        model_path: Path to the model file
+        **options: Backend-specific constructor arguments (e.g. intra_op_threads)
+
+    Returns:
+        Backend instance
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{name}'. Options: {', '.join(BACKENDS)}")
+    return BACKENDS[name](model_path, **options)
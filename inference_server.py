@@ -0,0 +1,262 @@
+"""
+Inference Server - One shared model for many detection services
+Purpose: Running one detection container per camera loads one model copy per
+camera. This process loads the model once, accepts frames from any number of
+detection services over a local socket and batches frames that arrive within
+a short window into a single forward pass.
+
+Usage:
+    INFERENCE_SERVER_AUTHKEY=<secret> python inference_server.py
+    INFERENCE_SERVER_AUTHKEY=<secret> python inference_server.py --address /run/inference/server.sock --max-batch 16
+
+Detection services then use it with INFERENCE_BACKEND=remote,
+INFERENCE_SERVER_ADDRESS pointing at this server and the same authkey.
+
+Security: multiprocessing.connection unpickles what clients send, so any
+client holding the authkey can run code in this process. The server refuses
+to start without INFERENCE_SERVER_AUTHKEY. Listen on localhost or a Unix
+socket (shared via a volume between containers) and never expose the port
+to a network.
+
+SIGTERM (container stop) and SIGINT close the listener, which removes the
+Unix socket file; a socket left behind by a crash is removed before binding.
+"""
+
+import argparse
+import os
+import queue
+import signal
+import stat
+import threading
+import time
+from multiprocessing.connection import Listener
+import config
+from inference_backends import create_backend, server_address
+from violation_detector import default_model_path
+
+
+def _remove_stale_socket(address):
+    """
+    Remove a Unix socket file left behind by a server that crashed or was killed
+
+    Binding fails with "Address already in use" while the old file exists.
+
+    Args:
+        address: Parsed listen address (TCP tuples are left alone)
+    """
+    if isinstance(address, str) and os.path.exists(address) and stat.S_ISSOCK(os.stat(address).st_mode):
+        print(f"Removing stale socket {address}")
+        os.unlink(address)
+
+
+class _Request:
+    """Frames from one client call, waiting for their results"""
+
+    def __init__(self, connection, send_lock, frames, conf):
+        self.connection = connection
+        self.send_lock = send_lock
+        self.frames = frames
+        self.conf = conf
+
+    def reply(self, status, payload):
+        """Send the result back to the client that asked for it"""
+        try:
+            with self.send_lock:
+                self.connection.send((status, payload))
+        except (OSError, EOFError):
+            pass  # Client went away while its frames were in flight
+
+
+class InferenceServer:
+    """Socket server that batches frames from all clients into shared forward passes"""
+
+    def __init__(self,
+                 model_path=None,
+                 backend=config.INFERENCE_BACKEND,
+                 address=config.INFERENCE_SERVER_ADDRESS,
+                 max_batch=config.INFERENCE_MAX_BATCH,
+                 batch_window_ms=config.INFERENCE_BATCH_WINDOW_MS):
+        """
+        Args:
+            model_path: Model file (default: selected by config.MODEL_PRECISION)
+            backend: Local inference backend that runs the model
+            address: Listen address ("host:port" or Unix socket path)
+            max_batch: Max frames per forward pass
+            batch_window_ms: How long to wait for more frames once one arrives
+        """
+        if backend == "remote":
+            raise ValueError("The inference server needs a local backend, not 'remote'")
+        if not config.INFERENCE_SERVER_AUTHKEY:
+            raise ValueError("INFERENCE_SERVER_AUTHKEY is not set. Set it to a long random secret "
+                             "shared with the detection services; the server will not run without one")
+
+        listen_address = server_address(address)
+        if isinstance(listen_address, tuple) and listen_address[0] not in ("localhost", "127.0.0.1", "::1"):
+            print(f"⚠️  Inference server listening on {address}: clients can run code in this process. "
+                  f"Never expose this port beyond trusted hosts; prefer localhost or a Unix socket.")
+
+        model_path = model_path or default_model_path()
+        print(f"Loading model from {model_path} ({backend} backend)...")
+        self.backend = create_backend(backend, model_path)
+        self.info = {
+            'class_names': self.backend.class_names,
+            'input_size': (getattr(self.backend, 'input_width', config.MODEL_INPUT_SIZE),
+                           getattr(self.backend, 'input_height', config.MODEL_INPUT_SIZE))
+        }
+
+        self.address = address
+        self.max_batch = max_batch
+        self.batch_window = batch_window_ms / 1000.0
+        self.requests = queue.Queue()
+        self.listener = None
+        self.stop_requested = False
+
+        # Statistics
+        self.batches_run = 0
+        self.frames_run = 0
+        self.clients_connected = 0
+
+    def serve_forever(self):
+        """Accept clients until SIGTERM or SIGINT"""
+        threading.Thread(target=self._batch_loop, daemon=True).start()
+
+        listen_address = server_address(self.address)
+        _remove_stale_socket(listen_address)
+        self._install_signal_handlers()
+
+        # Closing the listener also removes its Unix socket file
+        with Listener(listen_address, authkey=config.INFERENCE_SERVER_AUTHKEY.encode()) as self.listener:
+            print(f"✅ Inference server listening on {self.address} "
+                  f"(max batch {self.max_batch}, window {self.batch_window*1000:.0f}ms)")
+            while not self.stop_requested:
+                try:
+                    connection = self.listener.accept()
+                except (OSError, EOFError) as e:
+                    if self.stop_requested:
+                        break
+                    print(f"⚠️  Rejected client: {e}")
+                    continue
+                threading.Thread(target=self._client_loop, args=(connection,), daemon=True).start()
+
+    def _install_signal_handlers(self):
+        """SIGTERM (container stop) and SIGINT close the listener so the socket file is removed"""
+        def request_stop(signum, frame):
+            print(f"\n🛑 {signal.Signals(signum).name} received, stopping inference server...")
+            self.stop_requested = True
+            if self.listener is not None:
+                self.listener.close()
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+
+    def _client_loop(self, connection):
+        """Read requests from one client and queue its frames for batching"""
+        self.clients_connected += 1
+        send_lock = threading.Lock()
+        try:
+            while True:
+                message = connection.recv()
+                if message[0] == "info":
+                    with send_lock:
+                        connection.send(("ok", self.info))
+                elif message[0] == "predict":
+                    _, frames, conf = message
+                    self.requests.put(_Request(connection, send_lock, frames, conf))
+                else:
+                    with send_lock:
+                        connection.send(("error", f"Unknown request '{message[0]}'"))
+        except (EOFError, OSError):
+            pass
+        finally:
+            self.clients_connected -= 1
+            connection.close()
+
+    def _collect_batch(self):
+        """Block for the first request, then gather more until the batch is full or the window closes"""
+        batch = [self.requests.get()]
+        num_frames = len(batch[0].frames)
+        deadline = time.time() + self.batch_window
+
+        while num_frames < self.max_batch:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                request = self.requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            num_frames += len(request.frames)
+
+        return batch
+
+    def _batch_loop(self):
+        """Run collected requests through the model and send each client its results"""
+        while True:
+            batch = self._collect_batch()
+
+            # Requests with different thresholds cannot share a decode
+            by_conf = {}
+            for request in batch:
+                by_conf.setdefault(request.conf, []).append(request)
+
+            for conf, requests in by_conf.items():
+                frames = [frame for request in requests for frame in request.frames]
+                try:
+                    results = self.backend.predict_batch(frames, conf=conf)
+                except Exception as e:
+                    for request in requests:
+                        request.reply("error", str(e))
+                    continue
+
+                self.batches_run += 1
+                self.frames_run += len(frames)
+
+                start = 0
+                for request in requests:
+                    end = start + len(request.frames)
+                    request.reply("ok", results[start:end])
+                    start = end
+
+            if self.batches_run and self.batches_run % 1000 == 0:
+                stats = self.get_stats()
+                print(f"📊 Inference server: {stats['frames_run']} frames in {stats['batches_run']} batches "
+                      f"(avg batch {stats['avg_batch_size']:.1f}), {stats['clients_connected']} clients")
+
+    def get_stats(self):
+        """Get batching statistics"""
+        return {
+            'batches_run': self.batches_run,
+            'frames_run': self.frames_run,
+            'avg_batch_size': self.frames_run / self.batches_run if self.batches_run else 0.0,
+            'clients_connected': self.clients_connected
+        }
+
+
+def main():
+    """Entry point for the shared inference server"""
+    parser = argparse.ArgumentParser(description="Serve one shared PPE model to many detection services")
+    parser.add_argument('--model', default=None, help='Model file (default: per MODEL_PRECISION)')
+    parser.add_argument('--backend', default=config.INFERENCE_BACKEND, help='Local backend running the model')
+    parser.add_argument('--address', default=config.INFERENCE_SERVER_ADDRESS, help='host:port or Unix socket path')
+    parser.add_argument('--max-batch', type=int, default=config.INFERENCE_MAX_BATCH, help='Max frames per forward pass')
+    parser.add_argument('--window-ms', type=float, default=config.INFERENCE_BATCH_WINDOW_MS,
+                        help='Time to wait for more frames to fill a batch')
+    args = parser.parse_args()
+
+    server = InferenceServer(
+        model_path=args.model,
+        backend=args.backend,
+        address=args.address,
+        max_batch=args.max_batch,
+        batch_window_ms=args.window_ms
+    )
+    server.serve_forever()
+    stats = server.get_stats()
+    print(f"🛑 Inference server stopped: {stats['frames_run']} frames, "
+          f"avg batch {stats['avg_batch_size']:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
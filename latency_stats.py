@@ -0,0 +1,105 @@
+"""
+Latency Stats - Rolling per-stage latency histograms
+Purpose: A running mean of the whole detect call hides tail latency and does
+not say which stage is slow. Each pipeline stage (preprocess, forward, decode,
+postprocess, total) keeps a rolling window of recent samples and reports
+p50/p95/p99/max, for printing and as JSON for capacity planning.
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+import numpy as np
+import config
+
+
+class LatencyHistogram:
+    """Rolling window of latency samples for one stage"""
+
+    def __init__(self, window=config.LATENCY_WINDOW):
+        """
+        Args:
+            window: Number of most recent samples kept
+        """
+        self.samples = deque(maxlen=window)
+        self.count = 0
+
+    def record(self, seconds):
+        """Add one sample"""
+        self.samples.append(seconds)
+        self.count += 1
+
+    def summary(self):
+        """Percentiles over the current window, in milliseconds"""
+        if not self.samples:
+            return None
+        samples = np.fromiter(self.samples, dtype=np.float64, count=len(self.samples)) * 1000
+        p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+        return {
+            'count': self.count,
+            'window': len(samples),
+            'mean_ms': float(samples.mean()),
+            'p50_ms': float(p50),
+            'p95_ms': float(p95),
+            'p99_ms': float(p99),
+            'max_ms': float(samples.max())
+        }
+
+
+class LatencyRecorder:
+    """Named latency histograms for the stages of the detection pipeline (thread-safe)"""
+
+    def __init__(self, window=config.LATENCY_WINDOW):
+        """
+        Args:
+            window: Number of most recent samples kept per stage
+        """
+        self.window = window
+        self.stages = {}
+        # Pool backends record worker timings from a callback thread
+        self.lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        """
+        Add a sample to a stage
+
+        Args:
+            stage: Stage name, e.g. "forward"
+            seconds: Time the stage took
+        """
+        with self.lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = LatencyHistogram(self.window)
+            histogram.record(seconds)
+
+    @contextmanager
+    def measure(self, stage):
+        """Time the body of a with-block as one sample of `stage`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def reset(self):
+        """Drop all samples (e.g. after warm-up)"""
+        with self.lock:
+            self.stages = {}
+
+    def summary(self):
+        """Get {stage: percentile summary} for every stage with samples"""
+        with self.lock:
+            return {stage: histogram.summary() for stage, histogram in self.stages.items() if histogram.samples}
+
+    def to_json(self, indent=None):
+        """Summary as a JSON string"""
+        return json.dumps(self.summary(), indent=indent)
+
+    def save(self, path):
+        """Write the summary to a JSON file"""
+        with open(path, 'w') as f:
+            f.write(self.to_json(indent=2))
+        return path
@@ -0,0 +1,92 @@
+"""
+Motion Gate - Skip inference on static frames
+Purpose: Most cameras look at unchanged scenes most of the time. A downscaled
+frame difference against the last analyzed frame decides whether the full
+YOLO model needs to run; otherwise DetectionPipeline reuses the previous
+result.
+"""
+
+import cv2
+import config
+
+
+class MotionGate:
+    """Cheap frame-differencing gate in front of ViolationDetector"""
+
+    def __init__(self,
+                 width=config.MOTION_GATE_WIDTH,
+                 pixel_threshold=config.MOTION_PIXEL_THRESHOLD,
+                 min_changed_fraction=config.MOTION_MIN_CHANGED_FRACTION,
+                 max_skipped_frames=config.MOTION_MAX_SKIPPED_FRAMES):
+        """
+        Args:
+            width: Width of the downscaled grayscale frame used for differencing
+            pixel_threshold: Grey-level change (0-255) that counts as a changed pixel
+            min_changed_fraction: Fraction of changed pixels that counts as motion
+            max_skipped_frames: Force inference after this many skipped frames in a row
+        """
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.min_changed_fraction = min_changed_fraction
+        self.max_skipped_frames = max_skipped_frames
+
+        # Downscaled copy of the last frame the model actually ran on
+        self.reference = None
+        self.skipped_in_row = 0
+        self.last_changed_fraction = 0.0
+
+        # Statistics
+        self.frames_checked = 0
+        self.frames_skipped = 0
+
+    def _thumbnail(self, frame):
+        """Small blurred grayscale version of the frame"""
+        height = max(1, int(frame.shape[0] * self.width / frame.shape[1]))
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def should_run(self, frame):
+        """
+        Decide whether the frame needs a full forward pass
+
+        Args:
+            frame: OpenCV image frame
+
+        Returns:
+            True if the scene changed (or a refresh is due), False to reuse the last result
+        """
+        self.frames_checked += 1
+        thumbnail = self._thumbnail(frame)
+
+        if (self.reference is None
+                or self.reference.shape != thumbnail.shape
+                or self.skipped_in_row >= self.max_skipped_frames):
+            self.last_changed_fraction = 1.0
+            return self._accept(thumbnail)
+
+        diff = cv2.absdiff(thumbnail, self.reference)
+        changed = cv2.countNonZero(cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)[1])
+        self.last_changed_fraction = changed / diff.size
+
+        if self.last_changed_fraction >= self.min_changed_fraction:
+            return self._accept(thumbnail)
+
+        self.skipped_in_row += 1
+        self.frames_skipped += 1
+        return False
+
+    def _accept(self, thumbnail):
+        """Make this frame the new reference"""
+        self.reference = thumbnail
+        self.skipped_in_row = 0
+        return True
+
+    def get_stats(self):
+        """Get gate hit rate (share of frames that skipped inference)"""
+        return {
+            'frames_checked': self.frames_checked,
+            'frames_skipped': self.frames_skipped,
+            'hit_rate': self.frames_skipped / self.frames_checked if self.frames_checked else 0.0,
+            'last_changed_fraction': self.last_changed_fraction
+        }
@@ -0,0 +1,489 @@
+"""
+Offline Processor - Parallel batch processing of recorded footage
+Purpose: Reviewing recordings with safety_monitor.py --source file.mp4 opens
+a window, runs frames one by one in real time and sends every hit through
+the LLM/PDF/email chain. This mode splits videos (or directories of videos)
+into frame ranges and processes the ranges in parallel worker processes with
+no display. Each worker loads the model once, grabs skipped frames without
+decoding them and aggregates detections into incidents on video time.
+Evidence images are written only for incidents that survive merging across
+ranges and the INCIDENT_MIN_DETECTIONS check.
+
+Results are written to a run directory:
+    detections.jsonl - one line per detected violation (video, frame, time, box)
+    incidents.jsonl  - one line per incident (duration, peak confidence, evidence image)
+    summary.json     - frames, incidents and throughput per video
+Incidents can also be logged to the database and turned into PDF reports
+(--database, --report); emails are never sent from offline runs.
+
+Usage:
+    python offline_processor.py footage/ --database
+    python offline_processor.py cam1.mp4 cam2.mp4 --frame-skip 30 --workers 8
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+import multiprocessing
+import cv2
+import config
+from detection_pipeline import DetectionPipeline
+from frame_cache import FrameHashCache
+from incident_aggregator import IncidentAggregator
+from inference_backends import box_iou
+from motion_gate import MotionGate
+from tracker import IoUTracker
+from violation_detector import ViolationDetector
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov', '.webm', '.m4v')
+
+# Detector of the current worker process (see _init_offline_worker)
+_worker_detector = None
+
+
+def find_videos(paths):
+    """Video files among the given files and directories (directories are searched recursively)"""
+    videos = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                videos.extend(os.path.join(root, name) for name in sorted(files)
+                              if name.lower().endswith(VIDEO_EXTENSIONS))
+        elif os.path.isfile(path):
+            videos.append(path)
+        else:
+            print(f"⚠️  Skipping {path}: not a file or directory")
+    return sorted(videos)
+
+
+def _init_offline_worker(model_path, backend, intra_op_threads):
+    """Load the model once per worker process"""
+    global _worker_detector
+    options = {'intra_op_threads': intra_op_threads} if backend == "onnxruntime" else {}
+    _worker_detector = ViolationDetector(model_path=model_path, backend=backend, backend_options=options)
+
+
+def _process_range(task):
+    """
+    Analyze one frame range of a video in a worker process
+
+    Args:
+        task: Dict from OfflineProcessor.plan()
+
+    Returns:
+        Dict with the task, detection records, incidents and frame counters
+    """
+    detector = _worker_detector
+    # Per-range state: nothing carries over from the previous range this worker ran
+    detector.tracker = IoUTracker() if config.ENABLE_TRACKING else None
+    detector.frame_cache = FrameHashCache() if config.FRAME_CACHE_ENABLED else None
+    detector.recent_violations = {}
+    pipeline = DetectionPipeline(detector, MotionGate() if config.MOTION_GATE_ENABLED else None)
+    # Incidents are confirmed after merging across ranges, so keep single detections here;
+    # evidence is written afterwards from the best frame number, so no frames are kept
+    incidents = IncidentAggregator(min_detections=1, report_on="close")
+
+    fps, start_time = task['fps'], task['start_time']
+    range_start = start_time + timedelta(seconds=task['start'] / fps)
+
+    detections = []
+    closed = []
+    frames_read = frames_analyzed = 0
+    started = time.time()
+
+    def record(analyzed_number, frame_time, violations):
+        """Log one analyzed frame's violations and feed them to the incident aggregator"""
+        violations = [dict(violation, timestamp=frame_time, frame_number=analyzed_number)
+                      for violation in violations]
+        for violation in violations:
+            detections.append({
+                'video': task['video'],
+                'frame': analyzed_number,
+                'timestamp': frame_time.isoformat(),
+                'class_name': violation['class_name'],
+                'confidence': round(violation['confidence'], 4),
+                'bbox': list(violation['bbox']),
+                'track_id': violation.get('track_id')
+            })
+        closed.extend((incident, False) for incident in incidents.update(violations, None, now=frame_time))
+
+    cap = cv2.VideoCapture(task['path'])
+    if task['start']:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, task['start'])
+    frame_number = task['start']
+    while task['end'] is None or frame_number < task['end']:
+        if not cap.grab():
+            break
+        frames_read += 1
+        sampled = (frame_number - task['start']) % task['stride'] == 0
+        frame_number += 1
+        if not sampled:
+            continue
+        ret, frame = cap.retrieve()
+        if not ret:
+            continue
+        frames_analyzed += 1
+
+        # Violations are stamped with video time, so incidents and reports follow the recording
+        frame_time = start_time + timedelta(seconds=(frame_number - 1) / fps)
+        for (analyzed_number, analyzed_time), _, violations in pipeline.push(frame, (frame_number - 1, frame_time)):
+            record(analyzed_number, analyzed_time, violations)
+    cap.release()
+    for (analyzed_number, analyzed_time), _, violations in pipeline.flush():
+        record(analyzed_number, analyzed_time, violations)
+
+    range_end = start_time + timedelta(seconds=frame_number / fps)
+    closed.extend((incident, True) for incident in incidents.flush())
+
+    results = []
+    for incident, at_end in closed:
+        violation = incident.to_violation()
+        violation['evidence_path'] = None
+        violation['first_bbox'], violation['last_bbox'] = list(incident.first_bbox), list(incident.last_bbox)
+        # Incidents touching a range boundary may continue in the neighbouring range
+        violation['open_at_start'] = (incident.first_seen - range_start).total_seconds() <= config.INCIDENT_GAP_SECONDS
+        violation['open_at_end'] = at_end and (range_end - incident.last_seen).total_seconds() <= config.INCIDENT_GAP_SECONDS
+        results.append(violation)
+
+    return {
+        'task': task,
+        'detections': detections,
+        'incidents': results,
+        'frames_read': frames_read,
+        'frames_analyzed': frames_analyzed,
+        'elapsed': time.time() - started
+    }
+
+
+def _save_evidence(job):
+    """
+    Write evidence images for one video's confirmed incidents in a worker process
+
+    Args:
+        job: Tuple of (video path, evidence directory, incident violation dicts);
+             each incident's frame_number is the frame of its best detection
+
+    Returns:
+        List of evidence paths, one per incident (None if its frame could not be read)
+    """
+    path, directory, incidents = job
+    paths = []
+    cap = cv2.VideoCapture(path)
+    for incident in incidents:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, incident['frame_number'])
+        ret, frame = cap.read()
+        paths.append(_worker_detector.save_violation_image(frame, incident, directory=directory) if ret else None)
+    cap.release()
+    return paths
+
+
+def _boundary_iou(earlier, later):
+    """Overlap of an incident's last box with the next range's incident's first box"""
+    return float(box_iou([earlier['last_bbox']], [later['first_bbox']])[0, 0])
+
+
+def merge_incidents(incidents, min_iou=config.OFFLINE_MERGE_IOU):
+    """
+    Join incidents of one video that were split at range boundaries
+
+    Only incidents of the same class in adjacent ranges, close in time and
+    whose boxes overlap at the boundary are joined, so two workers with the
+    same violation near a boundary stay separate incidents.
+
+    Args:
+        incidents: Incident violation dicts of one video, from every range
+        min_iou: Min IoU of the boxes on both sides of the boundary
+
+    Returns:
+        Incidents with split ones merged, ordered by first_seen
+    """
+    merged = []
+    for incident in sorted(incidents, key=lambda i: i['first_seen']):
+        candidates = [
+            other for other in merged
+            if other['class_name'] == incident['class_name'] and other['open_at_end']
+            and incident['open_at_start'] and incident['range'] == other['range'] + 1
+            and 0 <= (incident['first_seen'] - other['last_seen']).total_seconds() <= config.INCIDENT_GAP_SECONDS
+        ]
+        overlaps = [(_boundary_iou(other, incident), other) for other in candidates]
+        overlaps = [(iou, other) for iou, other in overlaps if iou >= min_iou]
+        if not overlaps:
+            merged.append(incident)
+            continue
+        previous = max(overlaps, key=lambda overlap: overlap[0])[1]
+
+        # Keep the better evidence frame, extend the time span
+        if incident['peak_confidence'] > previous['peak_confidence']:
+            keep = dict(incident, first_seen=previous['first_seen'], first_bbox=previous['first_bbox'])
+        else:
+            keep = dict(previous, last_seen=incident['last_seen'], last_bbox=incident['last_bbox'],
+                        open_at_end=incident['open_at_end'], range=incident['range'])
+        keep['detection_count'] = previous['detection_count'] + incident['detection_count']
+        keep['duration'] = (keep['last_seen'] - keep['first_seen']).total_seconds()
+        merged[merged.index(previous)] = keep
+    return merged
+
+
+def _json_default(value):
+    """JSON encoding for datetimes"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class OfflineProcessor:
+    """Splits recorded videos into frame ranges and runs them on parallel worker processes"""
+
+    def __init__(self,
+                 model_path=None,
+                 backend="onnxruntime",
+                 workers=config.OFFLINE_WORKERS,
+                 intra_op_threads=config.OFFLINE_WORKER_THREADS,
+                 chunk_seconds=config.OFFLINE_CHUNK_SECONDS,
+                 frame_skip=config.OFFLINE_FRAME_SKIP):
+        """
+        Args:
+            model_path: Path to the exported model (default: chosen by config.MODEL_PRECISION)
+            backend: Inference backend each worker loads ("onnxruntime" or "ultralytics")
+            workers: Worker processes (0 = cores / intra_op_threads)
+            intra_op_threads: ONNX Runtime intra-op threads per worker
+            chunk_seconds: Video length per frame range
+            frame_skip: Analyze every n-th frame
+        """
+        self.model_path = model_path
+        self.backend = backend
+        self.workers = workers or max(1, (os.cpu_count() or 1) // max(1, intra_op_threads))
+        self.intra_op_threads = intra_op_threads
+        self.chunk_seconds = chunk_seconds
+        self.frame_skip = max(1, frame_skip)
+
+    def plan(self, videos, evidence_root, start_time=None):
+        """
+        Split videos into frame ranges
+
+        Args:
+            videos: Video file paths
+            evidence_root: Directory for evidence images (one subdirectory per video)
+            start_time: Recording start of every video (default: file modification time minus duration)
+
+        Returns:
+            List of task dicts (path, video, start, end, stride, fps, start_time, evidence_dir)
+        """
+        tasks = []
+        for path in videos:
+            cap = cv2.VideoCapture(path)
+            if not cap.isOpened():
+                print(f"⚠️  Skipping {path}: cannot open video")
+                continue
+            fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            cap.release()
+
+            video = os.path.splitext(os.path.basename(path))[0]
+            video_start = start_time or (
+                datetime.fromtimestamp(os.path.getmtime(path)) - timedelta(seconds=max(0, frame_count) / fps)
+            )
+            evidence_dir = os.path.join(evidence_root, video)
+            os.makedirs(evidence_dir, exist_ok=True)
+
+            # Range boundaries on multiples of the stride, so sampling does not depend on the split
+            chunk = max(self.frame_skip, int(self.chunk_seconds * fps) // self.frame_skip * self.frame_skip)
+            if frame_count <= 0:
+                # Unknown length: one range for the whole video
+                boundaries = [(0, None)]
+            else:
+                boundaries = [(start, min(start + chunk, frame_count)) for start in range(0, frame_count, chunk)]
+
+            for index, (start, end) in enumerate(boundaries):
+                tasks.append({
+                    'path': path, 'video': video, 'range': index, 'start': start, 'end': end,
+                    'stride': self.frame_skip, 'fps': fps, 'start_time': video_start,
+                    'evidence_dir': evidence_dir
+                })
+        return tasks
+
+    def run(self, videos, output_dir, start_time=None, database=None, reporter=None):
+        """
+        Process videos and write detections, incidents and a summary to output_dir
+
+        Args:
+            videos: Video file paths
+            output_dir: Run directory for the JSONL files and evidence images
+            start_time: Recording start of every video (see plan())
+            database: Optional Database; confirmed incidents are logged to it
+            reporter: Optional callback(incident) -> PDF path, e.g. LLM report + PDF
+
+        Returns:
+            Summary dict (also written to summary.json)
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        tasks = self.plan(videos, os.path.join(output_dir, "evidence"), start_time)
+        if not tasks:
+            print("❌ No videos to process")
+            return None
+
+        workers = min(self.workers, len(tasks))
+        print(f"🎞️  {len(videos)} video(s) -> {len(tasks)} frame ranges on {workers} worker(s), "
+              f"every {self.frame_skip} frame(s)")
+
+        started = time.time()
+        results = []
+        # spawn, like the inference pool: workers start clean and load the model once
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_offline_worker,
+                                 initargs=(self.model_path, self.backend, self.intra_op_threads)) as executor:
+            futures = [executor.submit(_process_range, task) for task in tasks]
+            for done, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                task = result['task']
+                results.append(result)
+                print(f"   [{done}/{len(tasks)}] {task['video']} frames {task['start']}-{task['end'] or 'end'}: "
+                      f"{len(result['detections'])} detections, {len(result['incidents'])} incident(s) "
+                      f"in {result['elapsed']:.1f}s")
+
+            results.sort(key=lambda r: (r['task']['video'], r['task']['start']))
+            confirmed_by_video = {}
+            for video in dict.fromkeys(r['task']['video'] for r in results):
+                incidents = merge_incidents([
+                    dict(incident, range=r['task']['range'])
+                    for r in results if r['task']['video'] == video for incident in r['incidents']
+                ])
+                confirmed_by_video[video] = [
+                    incident for incident in incidents
+                    if incident['detection_count'] >= config.INCIDENT_MIN_DETECTIONS
+                ]
+
+            # Evidence only for incidents that survived merging and confirmation
+            if config.SAVE_VIOLATION_IMAGES:
+                first_tasks = {}
+                for task in tasks:
+                    first_tasks.setdefault(task['video'], task)
+                evidence_futures = {
+                    video: executor.submit(_save_evidence, (first_tasks[video]['path'],
+                                                            first_tasks[video]['evidence_dir'], incidents))
+                    for video, incidents in confirmed_by_video.items() if incidents
+                }
+                for video, future in evidence_futures.items():
+                    for incident, path in zip(confirmed_by_video[video], future.result()):
+                        incident['evidence_path'] = path
+        elapsed = time.time() - started
+
+        detections_path = os.path.join(output_dir, "detections.jsonl")
+        with open(detections_path, 'w') as f:
+            for result in results:
+                for detection in result['detections']:
+                    f.write(json.dumps(detection) + "\n")
+
+        summary = {'videos': {}, 'elapsed_s': elapsed, 'frame_skip': self.frame_skip, 'workers': workers}
+        incidents_path = os.path.join(output_dir, "incidents.jsonl")
+        reported = 0
+        with open(incidents_path, 'w') as f:
+            for video in dict.fromkeys(r['task']['video'] for r in results):
+                video_results = [r for r in results if r['task']['video'] == video]
+                confirmed = confirmed_by_video[video]
+                for incident in confirmed:
+                    for key in ('open_at_start', 'open_at_end', 'range', 'first_bbox', 'last_bbox'):
+                        incident.pop(key)
+                    # Worker-local incident IDs repeat across ranges; number them per run instead
+                    reported += 1
+                    incident['incident_id'] = reported
+                    incident['video'] = video
+                    pdf_path = reporter(incident) if reporter else ""
+                    if database:
+                        database.log_violation(incident, incident['evidence_path'] or "", pdf_path or "")
+                    if pdf_path:
+                        incident['pdf_path'] = pdf_path
+                    f.write(json.dumps(incident, default=_json_default) + "\n")
+
+                fps = video_results[0]['task']['fps']
+                frames_read = sum(r['frames_read'] for r in video_results)
+                summary['videos'][video] = {
+                    'path': video_results[0]['task']['path'],
+                    'frames_read': frames_read,
+                    'frames_analyzed': sum(r['frames_analyzed'] for r in video_results),
+                    'video_seconds': frames_read / fps,
+                    'detections': sum(len(r['detections']) for r in video_results),
+                    'incidents': len(confirmed)
+                }
+
+        video_seconds = sum(v['video_seconds'] for v in summary['videos'].values())
+        summary['video_seconds'] = video_seconds
+        summary['speedup'] = video_seconds / elapsed if elapsed > 0 else 0.0
+        summary['incidents'] = reported
+        with open(os.path.join(output_dir, "summary.json"), 'w') as f:
+            json.dump(summary, f, indent=2)
+
+        print(f"\n✅ {video_seconds/60:.1f} min of video in {elapsed:.1f}s ({summary['speedup']:.0f}x real time), "
+              f"{reported} incident(s)")
+        print(f"   Detections: {detections_path}")
+        print(f"   Incidents: {incidents_path}")
+        return summary
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Process recorded footage offline, in parallel, without a display")
+    parser.add_argument('paths', nargs='+', help='Video files and/or directories of videos')
+    parser.add_argument('--output', default=None, help='Run directory (default: OFFLINE_OUTPUT_DIR/<timestamp>)')
+    parser.add_argument('--model', default=None, help='Model path (default: chosen by config.MODEL_PRECISION)')
+    parser.add_argument('--backend', default="onnxruntime", choices=("onnxruntime", "ultralytics"),
+                        help='Inference backend loaded by each worker')
+    parser.add_argument('--workers', type=int, default=config.OFFLINE_WORKERS,
+                        help='Worker processes (0 = cores / threads per worker)')
+    parser.add_argument('--threads', type=int, default=config.OFFLINE_WORKER_THREADS,
+                        help='ONNX Runtime threads per worker')
+    parser.add_argument('--chunk-seconds', type=float, default=config.OFFLINE_CHUNK_SECONDS,
+                        help='Video length per frame range')
+    parser.add_argument('--frame-skip', type=int, default=config.OFFLINE_FRAME_SKIP, help='Analyze every n-th frame')
+    parser.add_argument('--start-time', default=None,
+                        help='Recording start (ISO format) for every video (default: file time minus duration)')
+    parser.add_argument('--database', action='store_true', help='Log confirmed incidents to the violations database')
+    parser.add_argument('--report', action='store_true',
+                        help='Generate an AI incident report and PDF per incident (no emails)')
+    args = parser.parse_args()
+
+    videos = find_videos(args.paths)
+    if not videos:
+        print("❌ No video files found")
+        return 1
+
+    output_dir = args.output or os.path.join(config.OFFLINE_OUTPUT_DIR, datetime.now().strftime("%Y%m%d_%H%M%S"))
+    start_time = datetime.fromisoformat(args.start_time) if args.start_time else None
+
+    database = None
+    if args.database:
+        from database import Database
+        database = Database()
+
+    reporter = None
+    if args.report:
+        from compliance_agent import ComplianceAgent
+        from pdf_generator import PDFGenerator
+        agent, pdf_generator = ComplianceAgent(), PDFGenerator()
+
+        def reporter(incident):
+            report_text = agent.generate_incident_report(incident)
+            return pdf_generator.generate_pdf(incident, report_text, incident['evidence_path'] or "")
+
+    processor = OfflineProcessor(
+        model_path=args.model,
+        backend=args.backend,
+        workers=args.workers,
+        intra_op_threads=args.threads,
+        chunk_seconds=args.chunk_seconds,
+        frame_skip=args.frame_skip
+    )
+    try:
+        summary = processor.run(videos, output_dir, start_time=start_time, database=database, reporter=reporter)
+    finally:
+        if database:
+            database.close()
+    return 0 if summary else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,9 +4,11 @@ from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, PageBreak, Table, TableStyle
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from reportlab.lib import colors
+from reportlab.lib.utils import ImageReader
 from datetime import datetime
 import config
 import os
+from evidence_profiles import existing_variants
 
 class PDFGenerator:
     """Generate professional PDF reports for safety violations"""
@@ -41,6 +43,12 @@ class PDFGenerator:
             spaceAfter=12
         )
     
+    def _fit_image(self, image_path, max_width, max_height):
+        """Image flowable scaled to fit the box while keeping its aspect ratio"""
+        width, height = ImageReader(image_path).getSize()
+        scale = min(max_width / width, max_height / height)
+        return Image(image_path, width=width * scale, height=height * scale)
+    
     def generate_pdf(self, violation, report_text, image_path):
         """
         Generate PDF report
@@ -48,7 +56,7 @@ class PDFGenerator:
         Args:
             violation: Violation dictionary
             report_text: Generated report text from AI
-            image_path: Path to violation screenshot
+            image_path: Path to violation screenshot (any evidence profile's image)
             
         Returns:
             Path to generated PDF
@@ -103,17 +111,29 @@ class PDFGenerator:
         <b>Detection Confidence:</b> {violation['confidence']*100:.1f}%<br/>
         <b>OSHA Regulation:</b> {violation['osha_regulation']}
         """
+        if violation.get('duration') is not None:
+            # Aggregated incident: how long the violation lasted (confidence is the peak)
+            violation_summary += f"""<br/>
+        <b>Duration:</b> {violation['duration']:.1f} seconds ({violation['detection_count']} detections)
+        """
         elements.append(Paragraph(violation_summary, self.body_style))
         elements.append(Spacer(1, 0.3*inch))
         
-        # Add violation image
+        # Add violation images: the evidence profiles this report uses (crop, scene thumbnail),
+        # or the single image of violations saved before evidence profiles
         if image_path and os.path.exists(image_path):
             elements.append(Paragraph("VIOLATION EVIDENCE", self.heading_style))
             
-            # Resize image to fit page
-            img = Image(image_path, width=5*inch, height=3.75*inch)
-            elements.append(img)
-            elements.append(Spacer(1, 0.3*inch))
+            evidence_images = existing_variants(image_path, config.PDF_EVIDENCE_PROFILES) or {None: image_path}
+            for profile, path in evidence_images.items():
+                # Scene thumbnails are context for the crop, so they get less room
+                small = profile is not None and config.EVIDENCE_PROFILES[profile].get('region') != 'crop'
+                if small and len(evidence_images) > 1:
+                    elements.append(self._fit_image(path, 3.5*inch, 2.5*inch))
+                else:
+                    elements.append(self._fit_image(path, 5*inch, 3.75*inch))
+                elements.append(Spacer(1, 0.15*inch))
+            elements.append(Spacer(1, 0.15*inch))
         
         # AI Generated Report
         elements.append(Paragraph("DETAILED INCIDENT ANALYSIS", self.heading_style))
@@ -0,0 +1,134 @@
+"""
+Preprocessing - Single-pass letterbox into a preallocated model input buffer
+Purpose: Take raw camera frames straight to the (B, 3, H, W) float32 tensor the
+model expects, without intermediate full-size copies, and keep the exact
+inverse transform so detections map back onto the original frame.
+"""
+
+import cv2
+import numpy as np
+
+PAD_VALUE = 114  # Same grey padding ultralytics uses when letterboxing
+
+
+class LetterboxTransform:
+    """Geometry of one letterboxed frame and its inverse"""
+
+    def __init__(self, source_width, source_height, resized_width, resized_height, pad_x, pad_y):
+        self.source_width = source_width
+        self.source_height = source_height
+        self.resized_width = resized_width
+        self.resized_height = resized_height
+        self.pad_x = pad_x
+        self.pad_y = pad_y
+
+        # Per-axis scales: rounding the resized size makes x and y differ slightly
+        self.scale_x = resized_width / source_width
+        self.scale_y = resized_height / source_height
+
+    def to_source(self, boxes):
+        """
+        Map x1, y1, x2, y2 boxes from model input space back to the source frame
+
+        Args:
+            boxes: (N, 4) float array, modified in place
+
+        Returns:
+            The same array, now in source frame coordinates
+        """
+        boxes[:, [0, 2]] -= self.pad_x
+        boxes[:, [1, 3]] -= self.pad_y
+        boxes[:, [0, 2]] /= self.scale_x
+        boxes[:, [1, 3]] /= self.scale_y
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, self.source_width)
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, self.source_height)
+        return boxes
+
+
+class LetterboxPreprocessor:
+    """
+    Reusable letterbox + BGR->RGB + normalize + HWC->CHW stage
+
+    The model input buffer and the resize scratch buffer are allocated once
+    and only reallocated when the batch grows or the camera resolution changes.
+    """
+
+    def __init__(self, input_width, input_height, max_batch=1):
+        """
+        Args:
+            input_width: Model input width
+            input_height: Model input height
+            max_batch: Initial number of frames the input buffer can hold
+        """
+        self.input_width = input_width
+        self.input_height = input_height
+
+        self.buffer = np.empty((max_batch, 3, input_height, input_width), dtype=np.float32)
+        self._slot_geometry = [None] * max_batch
+        self._resized = {}
+
+    def _ensure_capacity(self, batch_size):
+        """Grow the input buffer when a larger batch arrives"""
+        if batch_size <= len(self.buffer):
+            return
+        self.buffer = np.empty((batch_size, 3, self.input_height, self.input_width), dtype=np.float32)
+        self._slot_geometry = [None] * batch_size
+
+    def _geometry(self, frame):
+        """Compute the letterbox geometry for a frame size"""
+        source_height, source_width = frame.shape[:2]
+        ratio = min(self.input_width / source_width, self.input_height / source_height)
+        resized_width = int(round(source_width * ratio))
+        resized_height = int(round(source_height * ratio))
+        pad_x = (self.input_width - resized_width) // 2
+        pad_y = (self.input_height - resized_height) // 2
+        return LetterboxTransform(source_width, source_height, resized_width, resized_height, pad_x, pad_y)
+
+    def process(self, frame, slot=0):
+        """
+        Write one frame into slot `slot` of the input buffer
+
+        Args:
+            frame: OpenCV image frame (BGR, uint8)
+            slot: Batch index to write into
+
+        Returns:
+            LetterboxTransform for mapping detections back to the frame
+        """
+        transform = self._geometry(frame)
+        size = (transform.resized_width, transform.resized_height)
+        target = self.buffer[slot]
+
+        # Padding only needs writing when the geometry of this slot changes
+        geometry = (size, transform.pad_x, transform.pad_y)
+        if self._slot_geometry[slot] != geometry:
+            target.fill(PAD_VALUE / 255.0)
+            self._slot_geometry[slot] = geometry
+
+        resized = self._resized.get(size)
+        if resized is None:
+            resized = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            self._resized[size] = resized
+        cv2.resize(frame, size, dst=resized, interpolation=cv2.INTER_LINEAR)
+
+        # BGR->RGB, /255 and HWC->CHW in one write per channel
+        rows = slice(transform.pad_y, transform.pad_y + transform.resized_height)
+        cols = slice(transform.pad_x, transform.pad_x + transform.resized_width)
+        for channel in range(3):
+            np.multiply(resized[:, :, 2 - channel], 1.0 / 255.0, out=target[channel, rows, cols])
+
+        return transform
+
+    def process_batch(self, frames):
+        """
+        Write several frames into consecutive slots of the input buffer
+
+        Args:
+            frames: List of OpenCV image frames (sizes may differ)
+
+        Returns:
+            Tuple of (input tensor view of shape (B, 3, H, W), list of transforms)
+        """
+        self._ensure_capacity(len(frames))
+        transforms = [self.process(frame, slot) for slot, frame in enumerate(frames)]
+        return self.buffer[:len(frames)], transforms
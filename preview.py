@@ -0,0 +1,156 @@
+"""
+Preview - Throttled live preview decoupled from the detection rate
+Purpose: cv2.imshow + cv2.waitKey on every processed frame costs CPU, needs a
+display server and fails in containers. The preview is refreshed at most
+PREVIEW_MAX_FPS times per second, whatever the detection rate, and can go to:
+    - an OpenCV window (interactive mode)
+    - a JPEG snapshot file, replaced atomically (headless; e.g. a shared volume)
+    - an HTTP endpoint serving the latest JPEG at /snapshot.jpg (headless;
+      unauthenticated, so it listens on localhost unless PREVIEW_HTTP_BIND says otherwise)
+Frames offered between refreshes are ignored without any drawing or encoding.
+"""
+
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import cv2
+import config
+
+WINDOW_TITLE = "AI Safety Compliance Officer - Live Monitoring"
+
+
+class Preview:
+    """Rate-limited preview window, snapshot file and/or HTTP snapshot endpoint"""
+
+    def __init__(self,
+                 window=True,
+                 max_fps=config.PREVIEW_MAX_FPS,
+                 snapshot_path=config.PREVIEW_SNAPSHOT_PATH,
+                 http_port=config.PREVIEW_HTTP_PORT,
+                 jpeg_quality=config.PREVIEW_JPEG_QUALITY,
+                 http_bind=config.PREVIEW_HTTP_BIND):
+        """
+        Args:
+            window: Show an OpenCV window (needs a display)
+            max_fps: Max preview refreshes per second (0 = every offered frame)
+            snapshot_path: Write the latest preview JPEG to this file ("" = off)
+            http_port: Serve the latest preview JPEG on this port (0 = off)
+            jpeg_quality: JPEG quality of snapshots (0-100)
+            http_bind: Interface the HTTP endpoint listens on (default: localhost only)
+        """
+        self.window = window
+        self.interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.snapshot_path = snapshot_path
+        self.jpeg_quality = jpeg_quality
+        self.last_refresh = 0.0
+
+        # Statistics
+        self.frames_offered = 0
+        self.frames_shown = 0
+
+        # Latest encoded snapshot, served by the HTTP endpoint
+        self.snapshot = None
+        self.lock = threading.Lock()
+        self.server = None
+        if http_port:
+            self.server = ThreadingHTTPServer((http_bind, http_port), self._handler())
+            threading.Thread(target=self.server.serve_forever, daemon=True).start()
+            print(f"📷 Preview snapshots at http://{http_bind}:{http_port}/snapshot.jpg")
+            if http_bind not in ("127.0.0.1", "localhost", "::1"):
+                print("⚠️  Preview endpoint is reachable from the network without authentication")
+
+    @property
+    def enabled(self):
+        """True when the preview goes anywhere at all"""
+        return self.window or bool(self.snapshot_path) or self.server is not None
+
+    def due(self):
+        """True when the next offered frame would be shown (lets callers skip drawing)"""
+        return self.enabled and time.time() - self.last_refresh >= self.interval
+
+    def offer(self, frame):
+        """
+        Show a frame if the refresh interval has passed
+
+        Args:
+            frame: Image to show (may be a reused buffer; it is not kept)
+
+        Returns:
+            True if the frame was shown
+        """
+        self.frames_offered += 1
+        if not self.due():
+            return False
+        self.last_refresh = time.time()
+        self.frames_shown += 1
+
+        if self.window:
+            cv2.imshow(WINDOW_TITLE, frame)
+
+        if self.snapshot_path or self.server:
+            ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            if ok:
+                data = encoded.tobytes()
+                with self.lock:
+                    self.snapshot = data
+                if self.snapshot_path:
+                    # Write then rename, so readers never see a half-written file
+                    temp_path = f"{self.snapshot_path}.tmp"
+                    with open(temp_path, 'wb') as f:
+                        f.write(data)
+                    os.replace(temp_path, self.snapshot_path)
+        return True
+
+    def poll_key(self):
+        """
+        Process window events and return the pressed key
+
+        Returns:
+            Key code, or None without a window
+        """
+        if not self.window:
+            return None
+        return cv2.waitKey(1) & 0xFF
+
+    def close(self):
+        """Close the window and stop the HTTP endpoint"""
+        if self.window:
+            cv2.destroyAllWindows()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def get_stats(self):
+        """Get offered/shown frame counters"""
+        return {
+            'frames_offered': self.frames_offered,
+            'frames_shown': self.frames_shown
+        }
+
+    def _handler(self):
+        """Request handler class bound to this preview"""
+        preview = self
+
+        class SnapshotHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ("/", "/snapshot.jpg"):
+                    self.send_error(404)
+                    return
+                with preview.lock:
+                    data = preview.snapshot
+                if data is None:
+                    self.send_error(503, "No preview frame yet")
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "image/jpeg")
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                # Polled every few seconds; keep the monitor's console readable
+                pass
+
+        return SnapshotHandler
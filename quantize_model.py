@@ -0,0 +1,389 @@
+"""
+INT8 Model Quantization - Statically quantize models/best.onnx for CPU inference
+Purpose: FP16 is not an option on our CPU-only nodes, so this builds an INT8
+model calibrated on frames sampled from recorded footage and reports latency
+and detection agreement against the FP32 model side by side.
+
+Usage:
+    python quantize_model.py
+    python quantize_model.py --videos static/test_video.webm static/test_video1.webm --calibration-frames 200
+
+Then set MODEL_PRECISION = "int8" in config.py to use the quantized model.
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+import cv2
+import numpy as np
+import onnx
+from onnxruntime.quantization import (
+    CalibrationDataReader,
+    CalibrationMethod,
+    QuantFormat,
+    QuantType,
+    quantize_static
+)
+from onnxruntime.quantization.shape_inference import quant_pre_process
+import config
+from inference_backends import OnnxRuntimeBackend, box_iou
+from preprocessing import LetterboxPreprocessor
+
+DEFAULT_VIDEOS = ["static/test_video.webm", "static/test_video1.webm"]
+
+CALIBRATION_METHODS = {
+    "minmax": CalibrationMethod.MinMax,
+    "entropy": CalibrationMethod.Entropy,
+    "percentile": CalibrationMethod.Percentile
+}
+
+
+def count_frames(video_path):
+    """Count frames, decoding-free, for containers (e.g. webm) that do not report it"""
+    cap = cv2.VideoCapture(video_path)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    if total <= 0:
+        total = 0
+        while cap.grab():
+            total += 1
+    cap.release()
+    return total
+
+
+def sample_indices(total, count, offset=0.0, exclude=()):
+    """
+    Pick evenly spaced frame indices, never one of the excluded indices
+
+    Args:
+        total: Number of frames in the video
+        count: Number of indices to pick
+        offset: Fraction of a sampling step to shift by
+        exclude: Frame indices that must not be picked (e.g. calibration frames)
+
+    Returns:
+        Sorted list of frame indices
+    """
+    exclude = set(exclude)
+    candidates = [index for index in range(total) if index not in exclude]
+    count = min(count, len(candidates))
+    if count == 0:
+        return []
+    step = len(candidates) / count
+    return sorted({candidates[min(len(candidates) - 1, int((i + offset) * step))] for i in range(count)})
+
+
+def sample_frames(video_paths, num_frames, offset=0.0, exclude=None):
+    """
+    Sample frames evenly across a set of videos
+
+    Args:
+        video_paths: List of video files
+        num_frames: Total number of frames to sample
+        offset: Fraction of a sampling step to shift by
+        exclude: {video_path: frame indices} that must not be sampled, so
+                 evaluation frames stay disjoint from calibration frames
+
+    Returns:
+        (frames, {video_path: sampled frame indices})
+    """
+    frames = []
+    sampled = {}
+    exclude = exclude or {}
+    per_video = max(1, num_frames // max(1, len(video_paths)))
+
+    for video_path in video_paths:
+        total = count_frames(video_path)
+        if total == 0:
+            print(f"⚠️  Skipping unreadable video: {video_path}")
+            continue
+
+        targets = sample_indices(total, per_video, offset, exclude.get(video_path, ()))
+        sampled[video_path] = targets
+
+        # Walk the file with grab() and only decode the sampled frames
+        cap = cv2.VideoCapture(video_path)
+        index = 0
+        for target in targets:
+            while index < target and cap.grab():
+                index += 1
+            ret, frame = cap.read()
+            index += 1
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+
+        print(f"📹 {video_path}: sampled {len(targets)} of {total} frames")
+
+    return frames, sampled
+
+
+class FrameCalibrationReader(CalibrationDataReader):
+    """Feeds letterboxed video frames to the ONNX Runtime calibrator"""
+
+    def __init__(self, frames, input_name, input_width, input_height):
+        self.input_name = input_name
+        self.preprocessor = LetterboxPreprocessor(input_width, input_height)
+        self._frames = iter(frames)
+
+    def get_next(self):
+        frame = next(self._frames, None)
+        if frame is None:
+            return None
+        self.preprocessor.process(frame)
+        # The preprocessor reuses its buffer, the calibrator keeps references
+        return {self.input_name: self.preprocessor.buffer[:1].copy()}
+
+
+def detection_head_nodes(model_path):
+    """
+    Names of the non-convolution nodes in the YOLO detection head
+
+    The head's box decoding (DFL softmax, anchor/stride arithmetic, concat)
+    loses accuracy badly in INT8 and costs little, so it stays in FP32 while
+    the head convolutions are still quantized.
+    """
+    model = onnx.load(model_path)
+    indices = []
+    for node in model.graph.node:
+        match = re.match(r"/model\.(\d+)/", node.name)
+        if match:
+            indices.append(int(match.group(1)))
+
+    if not indices:
+        return []
+
+    head_prefix = f"/model.{max(indices)}/"
+    return [
+        node.name for node in model.graph.node
+        if node.name.startswith(head_prefix) and node.op_type != "Conv"
+    ]
+
+
+def copy_metadata(source_path, target_path):
+    """Carry the exported class names over to the quantized model"""
+    source = onnx.load(source_path)
+    target = onnx.load(target_path)
+    existing = {prop.key for prop in target.metadata_props}
+    for prop in source.metadata_props:
+        if prop.key not in existing:
+            target.metadata_props.add(key=prop.key, value=prop.value)
+    onnx.save(target, target_path)
+
+
+def quantize(fp32_path, int8_path, frames, method="minmax"):
+    """
+    Build the statically quantized INT8 model
+
+    Args:
+        fp32_path: Source FP32 ONNX model
+        int8_path: Destination for the INT8 model
+        frames: Calibration frames
+        method: Calibration method (minmax, entropy, percentile)
+    """
+    reference = OnnxRuntimeBackend(fp32_path)
+    reader = FrameCalibrationReader(
+        frames, reference.input_name, reference.input_width, reference.input_height
+    )
+
+    # ONNX shape inference + graph cleanup improves what the quantizer can fuse
+    preprocessed_path = int8_path.replace(".onnx", ".preprocessed.onnx")
+    quant_pre_process(fp32_path, preprocessed_path, skip_symbolic_shape=True)
+
+    excluded = detection_head_nodes(preprocessed_path)
+    print(f"🔧 Keeping {len(excluded)} detection-head decode nodes in FP32")
+
+    try:
+        quantize_static(
+            preprocessed_path,
+            int8_path,
+            reader,
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=True,
+            calibrate_method=CALIBRATION_METHODS[method],
+            nodes_to_exclude=excluded
+        )
+    finally:
+        if os.path.exists(preprocessed_path):
+            os.remove(preprocessed_path)
+
+    copy_metadata(fp32_path, int8_path)
+
+
+def match_detections(reference, candidate, iou_threshold):
+    """
+    Greedily match candidate detections to reference detections of the same class
+
+    Returns:
+        List of (reference_index, candidate_index) pairs
+    """
+    ref_boxes, _, ref_classes = reference
+    cand_boxes, _, cand_classes = candidate
+    if len(ref_boxes) == 0 or len(cand_boxes) == 0:
+        return []
+
+    iou = box_iou(ref_boxes, cand_boxes)
+    iou[ref_classes[:, None] != cand_classes[None, :]] = 0
+
+    matches = []
+    while True:
+        ref_index, cand_index = np.unravel_index(iou.argmax(), iou.shape)
+        if iou[ref_index, cand_index] < iou_threshold:
+            break
+        matches.append((ref_index, cand_index))
+        iou[ref_index, :] = 0
+        iou[:, cand_index] = 0
+    return matches
+
+
+def latency_summary(times):
+    """Latency statistics in milliseconds"""
+    times_ms = np.array(times) * 1000
+    return {
+        'mean_ms': float(times_ms.mean()),
+        'p50_ms': float(np.percentile(times_ms, 50)),
+        'p95_ms': float(np.percentile(times_ms, 95)),
+        'max_ms': float(times_ms.max())
+    }
+
+
+def compare_models(fp32_path, int8_path, frames, iou_threshold=0.5):
+    """
+    Run both models on the same frames and compare latency and detections
+
+    The FP32 model is the reference: recall is the share of FP32 detections
+    the INT8 model reproduces, precision the share of INT8 detections that
+    FP32 agrees with.
+
+    Returns:
+        Report dictionary
+    """
+    fp32 = OnnxRuntimeBackend(fp32_path)
+    int8 = OnnxRuntimeBackend(int8_path)
+
+    # Warm up both sessions so the first-call cost is not in the numbers
+    for backend in (fp32, int8):
+        backend.predict(frames[0])
+
+    fp32_times, int8_times = [], []
+    fp32_total = int8_total = matched = 0
+    confidence_deltas = []
+
+    for frame in frames:
+        start = time.perf_counter()
+        reference = fp32.predict(frame)
+        fp32_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        candidate = int8.predict(frame)
+        int8_times.append(time.perf_counter() - start)
+
+        matches = match_detections(reference, candidate, iou_threshold)
+        fp32_total += len(reference[0])
+        int8_total += len(candidate[0])
+        matched += len(matches)
+        confidence_deltas.extend(
+            abs(float(reference[1][r]) - float(candidate[1][c])) for r, c in matches
+        )
+
+    fp32_latency = latency_summary(fp32_times)
+    int8_latency = latency_summary(int8_times)
+
+    return {
+        'fp32_model': fp32_path,
+        'int8_model': int8_path,
+        'frames': len(frames),
+        'confidence_threshold': config.CONFIDENCE_THRESHOLD,
+        'match_iou_threshold': iou_threshold,
+        'latency': {
+            'fp32': fp32_latency,
+            'int8': int8_latency,
+            'speedup': fp32_latency['mean_ms'] / int8_latency['mean_ms'] if int8_latency['mean_ms'] else 0
+        },
+        'agreement': {
+            'fp32_detections': fp32_total,
+            'int8_detections': int8_total,
+            'matched': matched,
+            'recall_vs_fp32': matched / fp32_total if fp32_total else 1.0,
+            'precision_vs_fp32': matched / int8_total if int8_total else 1.0,
+            'mean_confidence_delta': float(np.mean(confidence_deltas)) if confidence_deltas else 0.0
+        },
+        'model_size_mb': {
+            'fp32': os.path.getsize(fp32_path) / 1e6,
+            'int8': os.path.getsize(int8_path) / 1e6
+        }
+    }
+
+
+def print_report(report):
+    """Print the FP32 vs INT8 comparison side by side"""
+    latency = report['latency']
+    agreement = report['agreement']
+    sizes = report['model_size_mb']
+
+    print("\n" + "="*80)
+    print("📊 FP32 vs INT8 COMPARISON")
+    print("="*80)
+    print(f"Frames evaluated: {report['frames']}")
+    print(f"\n{'':<24}{'FP32':>12}{'INT8':>12}")
+    print(f"{'Mean latency (ms)':<24}{latency['fp32']['mean_ms']:>12.1f}{latency['int8']['mean_ms']:>12.1f}")
+    print(f"{'p50 latency (ms)':<24}{latency['fp32']['p50_ms']:>12.1f}{latency['int8']['p50_ms']:>12.1f}")
+    print(f"{'p95 latency (ms)':<24}{latency['fp32']['p95_ms']:>12.1f}{latency['int8']['p95_ms']:>12.1f}")
+    print(f"{'Model size (MB)':<24}{sizes['fp32']:>12.1f}{sizes['int8']:>12.1f}")
+    print(f"{'Detections':<24}{agreement['fp32_detections']:>12}{agreement['int8_detections']:>12}")
+    print(f"\nSpeedup: {latency['speedup']:.2f}x")
+    print(f"Recall vs FP32: {agreement['recall_vs_fp32']*100:.1f}%")
+    print(f"Precision vs FP32: {agreement['precision_vs_fp32']*100:.1f}%")
+    print(f"Mean confidence delta: {agreement['mean_confidence_delta']:.3f}")
+    print("="*80)
+
+
+def main():
+    """Entry point for the quantization tool"""
+    parser = argparse.ArgumentParser(
+        description="Build a statically quantized INT8 model calibrated on recorded footage"
+    )
+    parser.add_argument('--model', default=config.MODEL_PATH, help='FP32 ONNX model')
+    parser.add_argument('--output', default=config.INT8_MODEL_PATH, help='INT8 model output path')
+    parser.add_argument('--videos', nargs='+', default=DEFAULT_VIDEOS, help='Calibration videos')
+    parser.add_argument('--calibration-frames', type=int, default=100, help='Frames used for calibration')
+    parser.add_argument('--eval-frames', type=int, default=50, help='Held-out frames used for the report')
+    parser.add_argument('--method', choices=sorted(CALIBRATION_METHODS), default='minmax',
+                        help='Calibration method')
+    parser.add_argument('--report', default=None, help='JSON report path (default: next to the INT8 model)')
+    args = parser.parse_args()
+
+    print("="*80)
+    print("🔢 INT8 Quantization")
+    print("="*80)
+
+    calibration_frames, calibration_indices = sample_frames(args.videos, args.calibration_frames)
+    if not calibration_frames:
+        print("❌ No calibration frames could be read")
+        return 1
+
+    print(f"\n🔄 Calibrating on {len(calibration_frames)} frames ({args.method})...")
+    quantize(args.model, args.output, calibration_frames, method=args.method)
+    print(f"✅ INT8 model saved: {args.output}")
+
+    # Held-out evaluation: calibration frame indices are excluded explicitly
+    eval_frames, _ = sample_frames(args.videos, args.eval_frames, offset=0.5, exclude=calibration_indices)
+    if not eval_frames:
+        print("⚠️  No held-out frames left; agreement is measured on the calibration frames")
+    report = compare_models(args.model, args.output, eval_frames or calibration_frames)
+    print_report(report)
+
+    report_path = args.report or os.path.splitext(args.output)[0] + ".report.json"
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📝 Report saved: {report_path}")
+    print('Set MODEL_PRECISION = "int8" in config.py to use the quantized model.')
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,113 @@
+"""
+Region of Interest - Per-camera ROI polygons and crop-only inference
+Purpose: Cameras see sky, parked vehicles and off-site areas we never care
+about. Each camera in cameras.json can list "roi" polygons; the detector then
+runs on the union bounding box of those polygons only and drops detections
+whose centre falls outside them.
+
+Polygon points are normalized [x, y] pairs in the 0-1 range so the same
+configuration works whatever resolution the stream delivers, e.g.:
+
+    "roi": [[[0.0, 0.35], [0.6, 0.3], [0.65, 1.0], [0.0, 1.0]]]
+"""
+
+import json
+import os
+import cv2
+import numpy as np
+
+
+class RegionOfInterest:
+    """Set of polygons a camera should be analyzed in"""
+
+    def __init__(self, polygons):
+        """
+        Args:
+            polygons: List of polygons, each a list of normalized [x, y] points
+        """
+        self.polygons = [np.asarray(polygon, dtype=np.float32).reshape(-1, 2) for polygon in polygons]
+        if not self.polygons or any(len(polygon) < 3 for polygon in self.polygons):
+            raise ValueError("ROI polygons need at least 3 points each")
+
+        # Pixel geometry depends on the frame size; cache it per resolution
+        self._geometry = {}
+
+    @classmethod
+    def from_camera_config(cls, camera_id, config_path=None):
+        """
+        Load the ROI of one camera from cameras.json
+
+        Args:
+            camera_id: Camera "id" in the config file
+            config_path: Path to cameras.json (default: $CAMERA_CONFIG or cameras.json)
+
+        Returns:
+            RegionOfInterest, or None if the camera has no ROI configured
+        """
+        config_path = config_path or os.getenv('CAMERA_CONFIG', 'cameras.json')
+        if not os.path.exists(config_path):
+            return None
+
+        with open(config_path, 'r') as f:
+            cameras = json.load(f).get('cameras', [])
+
+        camera = next((c for c in cameras if c['id'] == camera_id), None)
+        if not camera or not camera.get('roi'):
+            return None
+        return cls(camera['roi'])
+
+    def _pixel_geometry(self, frame_shape):
+        """Crop box and polygon mask (in crop coordinates) for a frame size"""
+        height, width = frame_shape[:2]
+        key = (height, width)
+        if key not in self._geometry:
+            scale = np.array([width, height], dtype=np.float32)
+            pixel_polygons = [np.round(polygon * scale).astype(np.int32) for polygon in self.polygons]
+
+            points = np.concatenate(pixel_polygons)
+            x1, y1 = np.clip(points.min(axis=0), 0, [width, height])
+            x2, y2 = np.clip(points.max(axis=0) + 1, 0, [width, height])
+
+            mask = np.zeros((y2 - y1, x2 - x1), dtype=np.uint8)
+            cv2.fillPoly(mask, [polygon - [x1, y1] for polygon in pixel_polygons], 1)
+
+            self._geometry[key] = ((int(x1), int(y1), int(x2), int(y2)), mask)
+        return self._geometry[key]
+
+    def crop(self, frame):
+        """
+        Crop a frame to the union bounding box of the ROI polygons
+
+        Args:
+            frame: OpenCV image frame
+
+        Returns:
+            Tuple of (cropped view of the frame, (offset_x, offset_y))
+        """
+        (x1, y1, x2, y2), _ = self._pixel_geometry(frame.shape)
+        # A view, not a copy: preprocessing reads straight from the source frame
+        return frame[y1:y2, x1:x2], (x1, y1)
+
+    def restore(self, detections, frame_shape):
+        """
+        Map detections from the crop back to the frame and drop those outside the polygons
+
+        Args:
+            detections: (boxes, scores, class_ids) in crop coordinates
+            frame_shape: Shape of the full frame
+
+        Returns:
+            (boxes, scores, class_ids) in frame coordinates, inside the ROI only
+        """
+        boxes, scores, class_ids = detections
+        (x1, y1, _, _), mask = self._pixel_geometry(frame_shape)
+        if len(boxes) == 0:
+            return boxes, scores, class_ids
+
+        # A detection belongs to the ROI when its centre lies inside a polygon
+        centers_x = ((boxes[:, 0] + boxes[:, 2]) / 2).astype(np.int64).clip(0, mask.shape[1] - 1)
+        centers_y = ((boxes[:, 1] + boxes[:, 3]) / 2).astype(np.int64).clip(0, mask.shape[0] - 1)
+        inside = mask[centers_y, centers_x].astype(bool)
+
+        boxes = boxes[inside] + np.array([x1, y1, x1, y1], dtype=boxes.dtype)
+        return boxes, scores[inside], class_ids[inside]
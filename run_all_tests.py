@@ -19,6 +19,72 @@ TESTS = [
         'icon': '📄',
         'required': True
     },
+    {
+        'name': 'Letterbox Preprocessing',
+        'file': 'test_preprocessing.py',
+        'icon': '🖼️',
+        'required': True
+    },
+    {
+        'name': 'Quantization Sampling',
+        'file': 'test_quantize_sampling.py',
+        'icon': '🔢',
+        'required': True
+    },
+    {
+        'name': 'Violation Tracker',
+        'file': 'test_tracker.py',
+        'icon': '🧭',
+        'required': True
+    },
+    {
+        'name': 'Incident Aggregator',
+        'file': 'test_incident_aggregator.py',
+        'icon': '🧩',
+        'required': True
+    },
+    {
+        'name': 'Frame Reader',
+        'file': 'test_video_source.py',
+        'icon': '🎥',
+        'required': True
+    },
+    {
+        'name': 'Frame Cache',
+        'file': 'test_frame_cache.py',
+        'icon': '🗂️',
+        'required': True
+    },
+    {
+        'name': 'Detection Cache',
+        'file': 'test_detection_cache.py',
+        'icon': '💾',
+        'required': True
+    },
+    {
+        'name': 'Shared Frame Ring',
+        'file': 'test_shared_frames.py',
+        'icon': '🧮',
+        'required': True
+    },
+    {
+        'name': 'Evidence Writer',
+        'file': 'test_evidence_writer.py',
+        'icon': '🖼️',
+        'required': True
+    },
+    {
+        'name': 'Region of Interest',
+        'file': 'test_roi.py',
+        'icon': '🗺️',
+        'required': True
+    },
+    {
+        'name': 'Batched Detection',
+        'file': 'test_batch_detection.py',
+        'icon': '📦',
+        'required': True
+    },
     {
         'name': 'Violation Detector',
         'file': 'test_detector.py',
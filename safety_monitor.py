@@ -7,10 +7,21 @@ generates OSHA-compliant incident reports.
 
 import cv2
 import argparse
+import signal
 import sys
+import time
+import os
 from datetime import datetime
 import config
 from violation_detector import ViolationDetector
+from motion_gate import MotionGate
+from incident_aggregator import IncidentAggregator
+from detection_pipeline import DetectionPipeline
+from roi import RegionOfInterest
+from frame_sampler import FrameSkipController
+from video_source import FrameReader, is_live_source
+from evidence_writer import EvidenceWriter
+from preview import Preview
 from compliance_agent import ComplianceAgent
 from pdf_generator import PDFGenerator
 from email_sender import EmailSender
@@ -19,12 +30,15 @@ from database import Database
 class SafetyMonitor:
     """Main safety monitoring system"""
     
-    def __init__(self, video_source=None):
+    def __init__(self, video_source=None, camera_id=None, headless=config.HEADLESS, preview=None):
         """
         Initialize the safety monitoring system
         
         Args:
             video_source: Video file path, RTSP URL, or camera index (default: webcam)
+            camera_id: Optional camera id from cameras.json (used for its ROI polygons)
+            headless: No window and no key handling; signals control the monitor instead
+            preview: Optional Preview (default: a throttled window, or snapshots only when headless)
         """
         print("="*80)
         print("AI Safety Compliance Officer - Initializing...")
@@ -37,7 +51,12 @@ class SafetyMonitor:
         # Initialize components
         print("\nInitializing components...")
         try:
-            self.detector = ViolationDetector()
+            roi = RegionOfInterest.from_camera_config(camera_id) if camera_id else None
+            self.evidence_writer = EvidenceWriter()
+            self.detector = ViolationDetector(roi=roi, evidence_writer=self.evidence_writer)
+            self.motion_gate = MotionGate() if config.MOTION_GATE_ENABLED else None
+            self.pipeline = DetectionPipeline(self.detector, self.motion_gate)
+            self.incidents = IncidentAggregator() if config.INCIDENT_AGGREGATION else None
             self.agent = ComplianceAgent()
             self.pdf_generator = PDFGenerator()
             self.email_sender = EmailSender()
@@ -53,33 +72,47 @@ class SafetyMonitor:
         self.violations_detected = 0
         self.violations_reported = 0
         self.last_report_date = None
+        self.frame_skip = None
+        self.reader = None
+        
+        # Display: throttled preview; headless mode is controlled by signals instead of keys
+        self.headless = headless
+        self.preview = preview or Preview(window=not headless)
+        self.stop_requested = False
+        self.statistics_requested = False
     
-    def process_violation(self, frame, violation):
+    def process_violation(self, frame, violation, annotated=None):
         """
         Process a detected violation: generate report, send email, log to database
         
         Args:
             frame: OpenCV frame with violation
             violation: Violation dictionary
+            annotated: Frame with this frame's violations already drawn (optional)
         """
         print(f"\n{'='*80}")
         print(f"🚨 VIOLATION DETECTED: {violation['description']}")
         print(f"Time: {violation['timestamp'].strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"Confidence: {violation['confidence']*100:.1f}%")
         print(f"OSHA Regulation: {violation['osha_regulation']}")
+        if 'incident_id' in violation:
+            print(f"Incident #{violation['incident_id']}: {violation['duration']:.1f}s, "
+                  f"{violation['detection_count']} detections")
         print(f"{'='*80}\n")
         
         # Save violation image
         image_path = ""
         if config.SAVE_VIOLATION_IMAGES:
-            image_path = self.detector.save_violation_image(frame, violation)
+            image_path = self.detector.save_violation_image(frame, violation, annotated=annotated) or ""
         
         # Generate AI incident report
         print("📝 Generating AI incident report...")
         report_text = self.agent.generate_incident_report(violation)
         
-        # Generate PDF
+        # Generate PDF (the evidence image is written in the background meanwhile)
         print("📄 Creating PDF report...")
+        if image_path and not self.evidence_writer.wait_for(image_path, timeout=5):
+            image_path = ""
         pdf_path = self.pdf_generator.generate_pdf(violation, report_text, image_path)
         
         # Send email notification (Only if immediate mode is enabled)
@@ -106,6 +139,49 @@ class SafetyMonitor:
         else:
             print(f"   Email: Queued for {config.DAILY_REPORT_TIME}\n")
 
+    def handle_detections(self, frame, violations):
+        """
+        Count, report and draw one completed frame's violations
+        
+        Violations are drawn once, only when the preview or a report needs
+        them; display and evidence share this buffer.
+        
+        Args:
+            frame: The frame the violations were detected in
+            violations: List of violation dictionaries
+            
+        Returns:
+            Frame to show in the preview (annotated when it had violations)
+        """
+        display_frame = frame
+        if violations:
+            self.violations_detected += len(violations)
+            if self.preview.due():
+                display_frame = self.detector.annotate(frame, violations)
+            
+            # Without aggregation, process each new violation
+            if self.incidents is None:
+                for violation in violations:
+                    if self.detector.should_report_violation(violation):
+                        if display_frame is frame:
+                            display_frame = self.detector.annotate(frame, violations)
+                        self.process_violation(frame, violation, annotated=display_frame)
+        
+        # Report incidents that closed (or were confirmed) with this frame
+        if self.incidents:
+            self.report_incidents(self.incidents.update(violations, frame))
+        return display_frame
+    
+    def report_incidents(self, incidents):
+        """
+        Process incidents from the aggregator, each with its best evidence frame
+        
+        Args:
+            incidents: List of Incident objects ready to report
+        """
+        for incident in incidents:
+            self.process_violation(incident.best_frame, incident.to_violation())
+    
     def check_and_send_daily_report(self):
         """Check if it's time to send the daily report and send it if so"""
         if config.EMAIL_REPORT_MODE != "daily":
@@ -162,53 +238,65 @@ class SafetyMonitor:
             print("  - RTSP URL is valid (if using IP camera)")
             sys.exit(1)
         
+        # Decode on a background thread; only frames the frame-skip controller samples are
+        # decoded, and live sources drop stale frames instead of queueing them
+        live = is_live_source(self.video_source)
+        self.frame_skip = FrameSkipController(source_fps=cap.get(cv2.CAP_PROP_FPS))
+        self.reader = FrameReader(
+            cap,
+            drop_oldest=live,
+            sampler=self.frame_skip,
+            seek=not live and config.CAPTURE_SEEK_FILES
+        ).start()
+        
         print("="*80)
         print("🎥 MONITORING STARTED")
         print("="*80)
         print(f"Site: {config.SITE_NAME}")
         print(f"Location: {config.SITE_LOCATION}")
         print(f"Monitoring for violations: {', '.join(config.VIOLATION_CLASSES.keys())}")
-        print("\nPress 'q' to quit, 's' to show statistics")
+        if self.headless:
+            self._install_signal_handlers()
+            print(f"\nHeadless (pid {os.getpid()}): SIGTERM or Ctrl+C to stop, SIGUSR1 to show statistics")
+        else:
+            print("\nPress 'q' to quit, 's' to show statistics")
         print("="*80)
         
         try:
-            while True:
-                ret, frame = cap.read()
+            while not self.stop_requested:
+                if self.statistics_requested:
+                    self.statistics_requested = False
+                    self.show_statistics()
+                
+                # Time out now and then so stop/statistics signals are handled without new frames
+                ret, frame = self.reader.read(timeout=1.0)
                 
                 if not ret:
+                    if not self.reader.stopped:
+                        continue
                     print("End of video or cannot read frame")
                     break
                 
-                self.frame_count += 1
-                
-                # Skip frames for performance
-                if self.frame_count % config.FRAME_SKIP != 0:
-                    continue
+                # Source frame number of this sampled frame (the reader skipped the rest)
+                self.frame_count = self.reader.frame_number
                 
                 # Check for daily report time
                 self.check_and_send_daily_report()
 
-                # Detect violations
-                violations = self.detector.detect_violations(frame)
-                
-                if violations:
-                    self.violations_detected += len(violations)
-                    
-                    # Draw violations on frame
-                    display_frame = self.detector.draw_violations(frame, violations)
-                    
-                    # Process each new violation
-                    for violation in violations:
-                        if self.detector.should_report_violation(violation):
-                            self.process_violation(frame, violation)
-                else:
-                    display_frame = frame
+                # Detect violations (motion gate reuses the last result on static scenes);
+                # with the pool backend earlier frames may still be in flight
+                detection_start = time.time()
+                results = self.pipeline.push(frame)
+                self.frame_skip.record(self.frame_count, time.time() - detection_start)
                 
-                # Display frame
-                cv2.imshow("AI Safety Compliance Officer - Live Monitoring", display_frame)
+                display_frame = None
+                for _, result_frame, violations in results:
+                    display_frame = self.handle_detections(result_frame, violations)
                 
-                # Handle keyboard input
-                key = cv2.waitKey(1) & 0xFF
+                # Display at the preview rate, not the detection rate; keys are read when it refreshes
+                if display_frame is None or not self.preview.offer(display_frame):
+                    continue
+                key = self.preview.poll_key()
                 
                 if key == ord('q'):
                     print("\n🛑 Shutting down monitoring system...")
@@ -220,9 +308,18 @@ class SafetyMonitor:
             print("\n🛑 Monitoring interrupted by user")
         
         finally:
+            # Report frames still in flight and incidents still open when monitoring stops
+            for _, result_frame, violations in self.pipeline.flush():
+                self.handle_detections(result_frame, violations)
+            if self.incidents:
+                self.report_incidents(self.incidents.flush())
+            
             # Cleanup
-            cap.release()
-            cv2.destroyAllWindows()
+            self.reader.release()
+            self.evidence_writer.close()
+            if hasattr(self.detector.backend, 'close'):
+                self.detector.backend.close()
+            self.preview.close()
             self.database.close()
             
             # Final statistics
@@ -234,6 +331,20 @@ class SafetyMonitor:
             print("Thank you for using AI Safety Compliance Officer!")
             print("="*80)
     
+    def _install_signal_handlers(self):
+        """Headless control: SIGTERM/SIGINT stop gracefully, SIGUSR1 prints statistics"""
+        def request_stop(signum, frame):
+            print(f"\n🛑 {signal.Signals(signum).name} received, shutting down monitoring system...")
+            self.stop_requested = True
+        
+        def request_statistics(signum, frame):
+            self.statistics_requested = True
+        
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+        if hasattr(signal, 'SIGUSR1'):  # not on Windows
+            signal.signal(signal.SIGUSR1, request_statistics)
+    
     def show_statistics(self):
         """Display current statistics"""
         print(f"\n📊 STATISTICS")
@@ -248,6 +359,32 @@ class SafetyMonitor:
             print(f"     - Average FPS: {perf_stats['avg_fps']:.2f}")
             print(f"     - Avg detection time: {perf_stats['avg_time_ms']:.1f}ms")
             print(f"     - Total detections: {perf_stats['total_detections']}")
+            print(f"     - Cold start: load {perf_stats['cold_load_ms']:.0f}ms, "
+                  f"warm-up {perf_stats['warmup_ms']:.0f}ms")
+            
+            if perf_stats['latency']:
+                print(f"\n   ⏱️  Latency by stage (last {config.LATENCY_WINDOW} calls):")
+                print(f"     {'stage':<12}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+                for stage, latency in perf_stats['latency'].items():
+                    print(f"     {stage:<12}{latency['p50_ms']:>7.1f}ms{latency['p95_ms']:>7.1f}ms"
+                          f"{latency['p99_ms']:>7.1f}ms{latency['max_ms']:>7.1f}ms")
+                latency_path = self.detector.latency.save(os.path.join(config.REPORTS_DIR, "latency_stats.json"))
+                print(f"     - Saved to {latency_path}")
+        
+        if self.incidents:
+            incident_stats = self.incidents.get_stats()
+            print(f"\n   🧩 Incidents:")
+            print(f"     - Reported: {incident_stats['incidents_reported']} "
+                  f"(from {incident_stats['detections']} detections, "
+                  f"{incident_stats['detections_per_report']:.1f} per report)")
+            print(f"     - Open: {incident_stats['open_incidents']}, "
+                  f"discarded as flicker: {incident_stats['incidents_discarded']}")
+        
+        if self.motion_gate:
+            gate_stats = self.motion_gate.get_stats()
+            print(f"\n   🎚️  Motion Gate:")
+            print(f"     - Frames checked: {gate_stats['frames_checked']}")
+            print(f"     - Inference skipped: {gate_stats['frames_skipped']} ({gate_stats['hit_rate']*100:.1f}% hit rate)")
         
         # AI Agent Usage Stats
         ai_stats = self.agent.get_usage_stats()
@@ -270,12 +407,43 @@ class SafetyMonitor:
             for vtype, count in db_stats['by_type'].items():
                 print(f"     - {vtype}: {count}")
         
+        evidence_stats = self.evidence_writer.get_stats()
+        print(f"\n   🖼️  Evidence Writer:")
+        print(f"     - Images written: {evidence_stats['written']} (dropped: {evidence_stats['dropped']}, "
+              f"failed: {evidence_stats['failed']})")
+        print(f"     - Queue depth: {evidence_stats['queue_depth']} (max {evidence_stats['max_queue_depth']})")
+        
+        if self.detector.frame_cache:
+            cache_stats = self.detector.frame_cache.get_stats()
+            print(f"\n   🗂️  Frame Cache:")
+            print(f"     - Hits: {cache_stats['hits']}, misses: {cache_stats['misses']} "
+                  f"({cache_stats['hit_rate']*100:.1f}% hit rate)")
+            print(f"     - Entries: {cache_stats['entries']}/{config.FRAME_CACHE_SIZE}, evictions: {cache_stats['evictions']}")
+        
+        if self.reader:
+            capture_stats = self.reader.get_stats()
+            print(f"\n   📡 Capture:")
+            print(f"     - Frames captured: {capture_stats['frames_captured']} "
+                  f"(decoded: {capture_stats['frames_decoded']})")
+            print(f"     - Stale frames dropped: {capture_stats['frames_dropped']} "
+                  f"({capture_stats['drop_rate']*100:.1f}%)")
+            if capture_stats['frame_age_p50_ms'] is not None:
+                print(f"     - Frame age at inference: p50 {capture_stats['frame_age_p50_ms']:.0f}ms, "
+                      f"p95 {capture_stats['frame_age_p95_ms']:.0f}ms, max {capture_stats['frame_age_max_ms']:.0f}ms")
+        
         # CPU Optimization Settings
         print(f"\n   ⚙️  CPU Optimizations:")
-        print(f"     - Frame skip: Every {config.FRAME_SKIP} frames")
-        print(f"     - Frame resize: {'Enabled' if config.RESIZE_FRAME else 'Disabled'}")
-        if config.RESIZE_FRAME:
-            print(f"     - Resolution: {config.RESIZE_WIDTH}x{config.RESIZE_HEIGHT}")
+        preview_stats = self.preview.get_stats()
+        print(f"     - Display: {'headless' if self.headless else 'window'}, preview refreshed "
+              f"{preview_stats['frames_shown']}/{preview_stats['frames_offered']} frames (max {config.PREVIEW_MAX_FPS} FPS)")
+        if self.frame_skip:
+            skip_stats = self.frame_skip.get_stats()
+            print(f"     - Frame skip: Every {skip_stats['interval']} frames ({skip_stats['mode']}, "
+                  f"~{skip_stats['processed_fps']:.1f} analyzed FPS)")
+        else:
+            print(f"     - Frame skip: Every {config.FRAME_SKIP} frames ({config.FRAME_SKIP_MODE})")
+        print(f"     - Backend: {config.INFERENCE_BACKEND} ({config.MODEL_PRECISION.upper()})")
+        print(f"     - Model input: {config.MODEL_INPUT_SIZE}x{config.MODEL_INPUT_SIZE} (single-pass letterbox)")
         print(f"     - Max detections: {config.MAX_DETECTIONS}")
         print(f"     - IoU threshold: {config.IOU_THRESHOLD}")
         print()
@@ -291,11 +459,41 @@ def main():
         default=None,
         help='Video source: file path, RTSP URL, or camera index (0 for webcam)'
     )
+    parser.add_argument(
+        '--camera',
+        type=str,
+        default=None,
+        help='Camera id from cameras.json (applies its ROI polygons)'
+    )
     parser.add_argument(
         '--config',
         action='store_true',
         help='Show current configuration'
     )
+    parser.add_argument(
+        '--headless',
+        action='store_true',
+        default=config.HEADLESS,
+        help='No window (servers/containers); SIGTERM stops, SIGUSR1 prints statistics'
+    )
+    parser.add_argument(
+        '--preview-fps',
+        type=float,
+        default=config.PREVIEW_MAX_FPS,
+        help='Max preview refreshes per second (0 = every processed frame)'
+    )
+    parser.add_argument(
+        '--snapshot',
+        type=str,
+        default=config.PREVIEW_SNAPSHOT_PATH,
+        help='Write the latest annotated frame to this JPEG file'
+    )
+    parser.add_argument(
+        '--preview-port',
+        type=int,
+        default=config.PREVIEW_HTTP_PORT,
+        help='Serve the latest annotated frame at http://127.0.0.1:PORT/snapshot.jpg (see PREVIEW_HTTP_BIND)'
+    )
     
     args = parser.parse_args()
     
@@ -321,7 +519,13 @@ def main():
         video_source = int(video_source)
     
     # Create and run monitor
-    monitor = SafetyMonitor(video_source)
+    preview = Preview(
+        window=not args.headless,
+        max_fps=args.preview_fps,
+        snapshot_path=args.snapshot,
+        http_port=args.preview_port
+    )
+    monitor = SafetyMonitor(video_source, camera_id=args.camera, headless=args.headless, preview=preview)
     monitor.run()
 
 if __name__ == "__main__":
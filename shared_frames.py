@@ -0,0 +1,154 @@
+"""
+Shared Frames - Shared-memory frame ring buffer between processes
+Purpose: Passing 1080p frames to another process through pickled queues costs
+about 6 MB of copying (and pickling) per frame on each side. The ring holds
+fixed-size frame slots in one multiprocessing.shared_memory block. The
+producer writes a frame into a free slot in place, sends only
+(slot, sequence) to the consumer, and the consumer reads a zero-copy NumPy
+view of that slot.
+
+Every write bumps the slot's sequence number, so a consumer can tell when a
+slot was reused before it got to it.
+"""
+
+import threading
+import numpy as np
+from multiprocessing import shared_memory
+
+# Per-slot header: sequence, height, width, channels
+_HEADER_FIELDS = 4
+
+
+class StaleFrameError(RuntimeError):
+    """The slot was overwritten before the consumer read it"""
+
+
+class SharedFrameRing:
+    """Fixed number of uint8 frame slots in one shared-memory block"""
+
+    def __init__(self, slots, slot_bytes, name=None, create=True):
+        """
+        Args:
+            slots: Number of frame slots
+            slot_bytes: Capacity of one slot (e.g. 1920 * 1080 * 3)
+            name: Shared memory block name (required when attaching)
+            create: Create the block (producer) or attach to an existing one (consumer)
+        """
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        header_bytes = slots * _HEADER_FIELDS * 8
+        self.owner = create
+
+        # Consumers are multiprocessing children sharing the creator's resource tracker,
+        # so attaching registers nothing new and only the creator unlinks the block
+        self.shm = shared_memory.SharedMemory(name=name, create=create,
+                                              size=header_bytes + slots * slot_bytes if create else 0)
+        self.name = self.shm.name
+
+        self.header = np.ndarray((slots, _HEADER_FIELDS), dtype=np.int64, buffer=self.shm.buf)
+        self.data = np.ndarray((slots, slot_bytes), dtype=np.uint8, buffer=self.shm.buf, offset=header_bytes)
+        if create:
+            self.header.fill(0)
+
+        # Producer side: slots handed to a consumer and not yet released
+        self.in_use = set()
+        self.next_slot = 0
+        self.lock = threading.Lock()
+
+    @classmethod
+    def attach(cls, name, slots, slot_bytes):
+        """Attach to a ring created by another process"""
+        return cls(slots, slot_bytes, name=name, create=False)
+
+    def acquire(self):
+        """
+        Reserve a free slot for writing (producer)
+
+        Returns:
+            Slot index, or None when every slot is still in use
+        """
+        with self.lock:
+            for offset in range(self.slots):
+                slot = (self.next_slot + offset) % self.slots
+                if slot not in self.in_use:
+                    self.in_use.add(slot)
+                    self.next_slot = (slot + 1) % self.slots
+                    return slot
+        return None
+
+    def release(self, slot):
+        """Return a slot once the consumer is done with it (producer)"""
+        with self.lock:
+            self.in_use.discard(slot)
+
+    def writable(self, slot, shape):
+        """
+        NumPy view to write a frame into in place (e.g. cap.retrieve(image=view))
+
+        Args:
+            slot: Slot from acquire()
+            shape: Frame shape (height, width, channels)
+
+        Returns:
+            uint8 array view of the slot with the given shape
+        """
+        size = int(np.prod(shape))
+        if size > self.slot_bytes:
+            raise ValueError(f"Frame of {size} bytes does not fit a {self.slot_bytes}-byte slot")
+        return self.data[slot, :size].reshape(shape)
+
+    def commit(self, slot, shape):
+        """
+        Publish the frame written into a slot
+
+        Returns:
+            Sequence number the consumer passes to view()
+        """
+        height, width = shape[:2]
+        channels = shape[2] if len(shape) > 2 else 1
+        sequence = int(self.header[slot, 0]) + 1
+        self.header[slot] = (sequence, height, width, channels)
+        return sequence
+
+    def write(self, frame):
+        """
+        Copy a frame into a free slot (one memcpy, no pickling)
+
+        Args:
+            frame: uint8 frame (any strides, e.g. an ROI crop view)
+
+        Returns:
+            (slot, sequence), or None when no slot is free or the frame is too large
+        """
+        if frame.dtype != np.uint8 or frame.size > self.slot_bytes:
+            return None
+        slot = self.acquire()
+        if slot is None:
+            return None
+        np.copyto(self.writable(slot, frame.shape), frame)
+        return slot, self.commit(slot, frame.shape)
+
+    def view(self, slot, sequence):
+        """
+        Zero-copy view of a published frame (consumer)
+
+        Args:
+            slot: Slot index
+            sequence: Sequence number returned by commit()/write()
+
+        Returns:
+            uint8 array of shape (height, width, channels) backed by shared memory
+        """
+        current, height, width, channels = (int(value) for value in self.header[slot])
+        if current != sequence:
+            raise StaleFrameError(f"Slot {slot} holds sequence {current}, expected {sequence}")
+        shape = (height, width, channels) if channels > 1 else (height, width)
+        return self.data[slot, :height * width * channels].reshape(shape)
+
+    def close(self):
+        """Detach from the block; the creating process also frees it"""
+        self.header = self.data = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
@@ -1,6 +1,7 @@
 """
 Speed Test Script - Compare different optimization settings
 Run this to find the best configuration for your hardware
+(for reproducible numbers and regression checks against a baseline, use benchmark.py)
 """
 
 import cv2
@@ -59,9 +60,8 @@ def main():
     print("📊 CURRENT CONFIGURATION")
     print("="*80)
     print(f"Frame Skip: {config.FRAME_SKIP}")
-    print(f"Resize Enabled: {config.RESIZE_FRAME}")
-    if config.RESIZE_FRAME:
-        print(f"Resize Resolution: {config.RESIZE_WIDTH}x{config.RESIZE_HEIGHT}")
+    print(f"Inference Backend: {config.INFERENCE_BACKEND}")
+    print(f"Model Input Size: {config.MODEL_INPUT_SIZE}")
     print(f"Max Detections: {config.MAX_DETECTIONS}")
     print(f"IoU Threshold: {config.IOU_THRESHOLD}")
     print(f"Confidence Threshold: {config.CONFIDENCE_THRESHOLD}")
@@ -111,10 +111,10 @@ def main():
         print()
         if config.FRAME_SKIP < 60:
             print(f"   1. Increase FRAME_SKIP to 60 (currently {config.FRAME_SKIP})")
-        if not config.RESIZE_FRAME:
-            print("   2. Enable RESIZE_FRAME = True")
-        if config.RESIZE_FRAME and config.RESIZE_WIDTH > 416:
-            print(f"   3. Reduce RESIZE_WIDTH to 416 (currently {config.RESIZE_WIDTH})")
+        if config.INFERENCE_BACKEND != "onnxruntime":
+            print(f"   2. Set INFERENCE_BACKEND = \"onnxruntime\" (currently {config.INFERENCE_BACKEND})")
+        if config.MODEL_INPUT_SIZE > 416:
+            print(f"   3. Re-export the model at imgsz=416 and set MODEL_INPUT_SIZE = 416 (currently {config.MODEL_INPUT_SIZE})")
         if config.MAX_DETECTIONS > 30:
             print(f"   4. Reduce MAX_DETECTIONS to 30 (currently {config.MAX_DETECTIONS})")
         if config.CONFIDENCE_THRESHOLD < 0.6:
@@ -125,8 +125,8 @@ def main():
         print()
         if config.FRAME_SKIP > 15:
             print(f"   • Reduce FRAME_SKIP to {config.FRAME_SKIP // 2} for better detection")
-        if config.RESIZE_FRAME and config.RESIZE_WIDTH < 640:
-            print("   • Increase resolution to 640x480 for better accuracy")
+        if config.MODEL_INPUT_SIZE < 640:
+            print("   • Increase MODEL_INPUT_SIZE to 640 for better accuracy")
         print()
     else:
         print("\n👍 Good performance! Your current settings are well balanced.")
@@ -0,0 +1,83 @@
+"""
+Test Raw-Detection Cache (no model required)
+"""
+import os
+import tempfile
+import cv2
+import numpy as np
+from detection_cache import DetectionCache
+
+print("💾 Testing Detection Cache...")
+print("="*80)
+
+
+def detections(x):
+    """Two fake detections at horizontal position x: one strong, one weak"""
+    return (np.array([[x, 10, x + 50, 100], [x, 120, x + 40, 200]], dtype=np.float32),
+            np.array([0.9, 0.1], dtype=np.float32),
+            np.array([2, 0], dtype=np.int64))
+
+
+try:
+    workdir = tempfile.mkdtemp()
+    cache_dir = os.path.join(workdir, "cache")
+
+    # A short video to analyze and a stand-in model file (only hashed, never loaded)
+    video_path = os.path.join(workdir, "clip.avi")
+    writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*"MJPG"), 10, (64, 48))
+    for i in range(20):
+        writer.write(np.full((48, 64, 3), i * 10, np.uint8))
+    writer.release()
+    model_path = os.path.join(workdir, "model.onnx")
+    with open(model_path, 'wb') as f:
+        f.write(b"model-v1")
+
+    # Test 1: Stored detections are filtered by the requested threshold
+    print("\n🎯 Test 1: Threshold Filtering")
+    cache = DetectionCache(video_path, model_path, cache_dir=cache_dir, min_conf=0.05)
+    cache.class_names = {0: 'helmet', 2: 'no_helmet'}
+    cache.put(0, detections(10))
+    boxes, scores, class_ids = cache.get(0, conf=0.5)
+    assert len(scores) == 1 and class_ids[0] == 2
+    assert len(cache.get(0, conf=0.05)[1]) == 2
+    assert cache.get(0, conf=0.01) is None  # below what was stored
+    assert cache.get(1) is None
+    print(f"✅ Thresholds answered from stored boxes: {cache.get_stats()}")
+
+    # Test 2: Saved cache is reloaded by a new instance
+    print("\n📂 Test 2: Save and Reload")
+    for frame_index in range(0, 20, 5):
+        cache.put(frame_index, detections(frame_index))
+    path = cache.save()
+    reloaded = DetectionCache(video_path, model_path, cache_dir=cache_dir, min_conf=0.05)
+    assert reloaded.path == path and sorted(reloaded.frames) == [0, 5, 10, 15]
+    assert reloaded.class_names == {0: 'helmet', 2: 'no_helmet'}
+    np.testing.assert_array_equal(reloaded.get(10, conf=0.05)[0], detections(10)[0])
+    print(f"✅ {len(reloaded.frames)} frames reloaded from {os.path.basename(path)}")
+
+    # Test 3: Fully cached analysis never loads the model
+    print("\n⚡ Test 3: Analysis From Cache")
+    results = list(reloaded.analyze(stride=5, conf=0.5))
+    assert [frame_index for frame_index, _ in results] == [0, 5, 10, 15]
+    assert all(len(scores) == 1 for _, (_, scores, _) in results)
+    assert reloaded.backend is None
+    print(f"✅ {len(results)} frames served without inference: {reloaded.get_stats()}")
+
+    # Test 4: Another model file gets its own cache
+    print("\n🔑 Test 4: Model Hash Is Part of the Key")
+    with open(model_path, 'wb') as f:
+        f.write(b"model-v2")
+    retrained = DetectionCache(video_path, model_path, cache_dir=cache_dir, min_conf=0.05)
+    assert retrained.path != path and not retrained.frames
+    print("✅ Changed model starts with an empty cache")
+
+    print("\n" + "="*80)
+    print("✅ All Detection Cache Tests PASSED!")
+    print("="*80)
+
+except Exception as e:
+    print(f"\n❌ ERROR: {e}")
+    import traceback
+    traceback.print_exc()
+    print("\n❌ Detection cache tests FAILED!")
+    exit(1)
@@ -0,0 +1,118 @@
+"""
+Test Evidence Writer overflow policies (no model required)
+"""
+import os
+import tempfile
+import threading
+import time
+import numpy as np
+from evidence_writer import EvidenceWriter
+
+print("🖼️  Testing Evidence Writer...")
+print("="*80)
+
+
+class SlowWriter(EvidenceWriter):
+    """Writer whose threads hold every write until release() so the queue can be filled"""
+
+    def __init__(self, **kwargs):
+        self.gate = threading.Event()
+        self.started = threading.Event()
+        super().__init__(**kwargs)
+
+    def _write(self, image, path, quality):
+        self.started.set()
+        self.gate.wait(10)
+        return super()._write(image, path, quality)
+
+    def release(self):
+        self.gate.set()
+
+
+def fill(policy, directory):
+    """
+    One group being written plus a full queue of two
+
+    Returns:
+        Tuple of (writer, callbacks as {name: [paths]}, submit(name) for further groups)
+    """
+    writer = SlowWriter(threads=1, queue_size=2, overflow=policy)
+    callbacks = {}
+    image = np.zeros((8, 8, 3), np.uint8)
+
+    def submit(name):
+        path = os.path.join(directory, f"{policy}_{name}.jpg")
+        on_done = lambda done_path: callbacks.setdefault(name, []).append(done_path)
+        return writer.submit_group([(image, path, None), (image, path.replace('.jpg', '_crop.jpg'), None)],
+                                   on_done=on_done)
+
+    submit("a")
+    assert writer.started.wait(5)  # "a" is on the writer thread, the queue is empty
+    submit("b")
+    submit("c")
+    return writer, callbacks, submit
+
+
+try:
+    directory = tempfile.mkdtemp()
+
+    # Test 1: drop_newest refuses the new group and reports it at once
+    print("\n🚫 Test 1: drop_newest")
+    writer, callbacks, submit = fill("drop_newest", directory)
+    assert submit("d") is None
+    assert callbacks == {'d': [None]}
+    writer.release()
+    writer.close()
+    assert sorted(callbacks) == ['a', 'b', 'c', 'd']
+    assert all(len(paths) == 1 for paths in callbacks.values())
+    assert all(os.path.exists(callbacks[name][0]) for name in "abc")
+    assert writer.get_stats()['dropped'] == 2  # both images of "d"
+    print(f"✅ Newest group dropped, every callback ran once: {writer.get_stats()}")
+
+    # Test 2: drop_oldest discards the oldest queued group (not the one being written)
+    print("\n♻️  Test 2: drop_oldest")
+    writer, callbacks, submit = fill("drop_oldest", directory)
+    assert submit("d").endswith("drop_oldest_d.jpg")
+    assert callbacks == {'b': [None]}
+    writer.release()
+    writer.close()
+    assert sorted(callbacks) == ['a', 'b', 'c', 'd']
+    assert all(len(paths) == 1 for paths in callbacks.values())
+    assert all(os.path.exists(callbacks[name][0]) for name in "acd")
+    assert not os.path.exists(os.path.join(directory, "drop_oldest_b.jpg"))
+    print(f"✅ Oldest queued group dropped, every callback ran once: {writer.get_stats()}")
+
+    # Test 3: block waits for room and drops nothing
+    print("\n⏳ Test 3: block")
+    writer, callbacks, submit = fill("block", directory)
+    blocked = threading.Thread(target=submit, args=("d",))
+    blocked.start()
+    time.sleep(0.2)
+    assert blocked.is_alive() and not callbacks
+    writer.release()
+    blocked.join(5)
+    assert not blocked.is_alive()
+    writer.close()
+    assert sorted(callbacks) == ['a', 'b', 'c', 'd']
+    assert all(len(paths) == 1 and os.path.exists(paths[0]) for paths in callbacks.values())
+    assert writer.get_stats()['dropped'] == 0
+    print(f"✅ Submitter waited for room, nothing dropped: {writer.get_stats()}")
+
+    # Test 4: wait_for returns once a queued image is on disk
+    print("\n📄 Test 4: wait_for")
+    writer = EvidenceWriter(threads=1, queue_size=4)
+    path = writer.submit(np.zeros((8, 8, 3), np.uint8), os.path.join(directory, "wait.jpg"))
+    assert writer.wait_for(path, timeout=5)
+    writer.close()
+    print("✅ Image available after wait_for")
+
+    print("\n" + "="*80)
+    print("✅ All Evidence Writer Tests PASSED!")
+    print("="*80)
+
+except Exception as e:
+    print(f"\n❌ ERROR: {e}")
+    import traceback
+    traceback.print_exc()
+    print("\n❌ Evidence writer tests FAILED!")
+    exit(1)
@@ -0,0 +1,67 @@
+"""
+Test Near-Duplicate Frame Cache (no model required)
+"""
+import time
+import numpy as np
+from frame_cache import FrameHashCache
+
+print("🗂️  Testing Frame Cache...")
+print("="*80)
+
+
+def detections(x):
+    """One fake detection at horizontal position x"""
+    return (np.array([[x, 10, x + 50, 100]], dtype=np.float32),
+            np.array([0.9], dtype=np.float32),
+            np.array([2], dtype=np.int64))
+
+
+try:
+    rng = np.random.default_rng(0)
+    scene = rng.integers(0, 255, (360, 640, 3), dtype=np.uint8)
+    other_scene = rng.integers(0, 255, (360, 640, 3), dtype=np.uint8)
+
+    # Test 1: Near-duplicate frames hit, different scenes miss
+    print("\n🔍 Test 1: Near-Duplicate Lookup")
+    cache = FrameHashCache(size=2, max_distance=4, hash_size=16, ttl=0)
+    cache.put(cache.frame_hash(scene), scene.shape, detections(10))
+    noisy = np.clip(scene.astype(np.int16) + rng.integers(-2, 3, scene.shape), 0, 255).astype(np.uint8)
+    assert cache.get(cache.frame_hash(noisy), noisy.shape) is not None
+    assert cache.get(cache.frame_hash(other_scene), other_scene.shape) is None
+    print(f"✅ Noisy copy hit, new scene missed: {cache.get_stats()}")
+
+    # Test 2: Same content at another resolution never matches (boxes would be wrong)
+    print("\n📐 Test 2: Frame Shape Is Part of the Key")
+    small = scene[::2, ::2].copy()
+    assert cache.get(cache.frame_hash(small), small.shape) is None
+    print("✅ Different resolution missed")
+
+    # Test 3: LRU eviction keeps the cache bounded
+    print("\n♻️  Test 3: LRU Eviction")
+    cache.put(cache.frame_hash(other_scene), other_scene.shape, detections(20))
+    cache.get(cache.frame_hash(scene), scene.shape)  # scene is now most recently used
+    third = rng.integers(0, 255, (360, 640, 3), dtype=np.uint8)
+    cache.put(cache.frame_hash(third), third.shape, detections(30))
+    assert len(cache.entries) == 2 and cache.evictions == 1
+    assert cache.get(cache.frame_hash(scene), scene.shape) is not None
+    assert cache.get(cache.frame_hash(other_scene), other_scene.shape) is None
+    print(f"✅ Least recently used entry evicted: {cache.get_stats()}")
+
+    # Test 4: Entries expire after the TTL
+    print("\n⌛ Test 4: Time-To-Live")
+    cache = FrameHashCache(size=4, max_distance=4, hash_size=16, ttl=0.05)
+    cache.put(cache.frame_hash(scene), scene.shape, detections(10))
+    time.sleep(0.1)
+    assert cache.get(cache.frame_hash(scene), scene.shape) is None
+    print("✅ Expired entry not reused")
+
+    print("\n" + "="*80)
+    print("✅ All Frame Cache Tests PASSED!")
+    print("="*80)
+
+except Exception as e:
+    print(f"\n❌ ERROR: {e}")
+    import traceback
+    traceback.print_exc()
+    print("\n❌ Frame cache tests FAILED!")
+    exit(1)
@@ -0,0 +1,72 @@
+"""
+Test Incident Aggregator (no model required)
+"""
+from datetime import datetime, timedelta
+from incident_aggregator import IncidentAggregator
+
+print("🧩 Testing Incident Aggregator...")
+print("="*80)
+
+
+def violation(class_name, confidence, timestamp, track_id=None):
+    """Minimal violation dictionary as produced by ViolationDetector"""
+    return {'class_name': class_name, 'confidence': confidence, 'timestamp': timestamp,
+            'bbox': (0, 0, 10, 10), 'track_id': track_id}
+
+
+try:
+    start = datetime(2024, 1, 1, 8, 0, 0)
+    at = lambda seconds: start + timedelta(seconds=seconds)
+
+    # Test 1: A persistent violation becomes one incident, reported when it closes
+    print("\n🚧 Test 1: One Incident Per Event")
+    aggregator = IncidentAggregator(gap=2.0, min_detections=2, report_on="close", max_duration=0)
+    reported = []
+    for second in range(10):
+        confidence = 0.9 if second == 4 else 0.6
+        reported += aggregator.update([violation('no_helmet', confidence, at(second), 1)], f"frame{second}")
+    assert not reported
+    reported += aggregator.update([], None, now=at(12))
+    assert len(reported) == 1
+    incident = reported[0].to_violation()
+    assert incident['detection_count'] == 10 and incident['duration'] == 9.0
+    assert incident['peak_confidence'] == 0.9 and reported[0].best_frame == "frame4"
+    print(f"✅ 10 detections -> 1 incident ({incident['duration']:.0f}s, best frame {reported[0].best_frame})")
+
+    # Test 2: Single-frame flickers are discarded
+    print("\n✨ Test 2: Flicker Filtering")
+    aggregator.update([violation('no_gloves', 0.5, at(20), 2)], "flicker")
+    assert aggregator.update([], None, now=at(30)) == []
+    assert aggregator.get_stats()['incidents_discarded'] == 1
+    print("✅ Unconfirmed incident discarded")
+
+    # Test 3: Confirm mode reports once, as soon as the incident is confirmed
+    print("\n⚡ Test 3: Report On Confirm")
+    aggregator = IncidentAggregator(gap=2.0, min_detections=3, report_on="confirm", max_duration=0)
+    counts = [len(aggregator.update([violation('no_helmet', 0.7, at(s), 1)], s)) for s in range(6)]
+    assert counts == [0, 0, 1, 0, 0, 0]
+    assert aggregator.flush() == []
+    print(f"✅ Reports per frame: {counts}")
+
+    # Test 4: Separate tracks are separate incidents; long incidents are split
+    print("\n👷 Test 4: Per-Track Incidents and Max Duration")
+    aggregator = IncidentAggregator(gap=2.0, min_detections=1, report_on="close", max_duration=5)
+    reported = []
+    for second in range(8):
+        reported += aggregator.update([violation('no_helmet', 0.7, at(second), 1),
+                                       violation('no_helmet', 0.7, at(second), 2)], second)
+    assert len(reported) == 2 and {i.key[1] for i in reported} == {1, 2}
+    reported += aggregator.flush()
+    assert len(reported) == 4
+    print(f"✅ {len(reported)} incidents for 2 workers over 8 seconds (max duration 5s)")
+
+    print("\n" + "="*80)
+    print("✅ All Incident Aggregator Tests PASSED!")
+    print("="*80)
+
+except Exception as e:
+    print(f"\n❌ ERROR: {e}")
+    import traceback
+    traceback.print_exc()
+    print("\n❌ Incident aggregator tests FAILED!")
+    exit(1)
@@ -0,0 +1,56 @@
+"""
+Test Letterbox Preprocessing (no model required)
+"""
+import cv2
+import numpy as np
+from preprocessing import LetterboxPreprocessor
+
+print("🖼️  Testing Letterbox Preprocessing...")
+print("="*80)
+
+try:
+    preprocessor = LetterboxPreprocessor(640, 640)
+    frame = np.random.randint(0, 255, (720, 1280, 3), dtype=np.uint8)
+
+    # Test 1: Geometry of a 16:9 frame
+    print("\n📐 Test 1: Letterbox Geometry")
+    transform = preprocessor.process(frame)
+    assert (transform.resized_width, transform.resized_height) == (640, 360)
+    assert (transform.pad_x, transform.pad_y) == (0, 140)
+    print(f"✅ 1280x720 -> 640x360, padding ({transform.pad_x}, {transform.pad_y})")
+
+    # Test 2: Buffer contents match a reference resize (RGB, CHW, [0, 1])
+    print("\n🎨 Test 2: Buffer Contents")
+    reference = cv2.resize(frame, (640, 360))[:, :, ::-1].transpose(2, 0, 1) / 255.0
+    error = np.abs(preprocessor.buffer[0, :, 140:500] - reference).max()
+    assert error < 1e-5, f"max error {error}"
+    assert np.allclose(preprocessor.buffer[0, :, :140], 114 / 255.0)
+    print(f"✅ Max error vs reference: {error:.2e}")
+
+    # Test 3: Inverse transform maps boxes back onto the source frame
+    print("\n↩️  Test 3: Inverse Transform")
+    boxes = np.array([[270.0, 270.0, 370.0, 370.0]], dtype=np.float32)
+    transform.to_source(boxes)
+    assert np.allclose(boxes, [[540, 260, 740, 460]])
+    print(f"✅ Box mapped back to {boxes[0].tolist()}")
+
+    # Test 4: Batches reuse the buffer
+    print("\n📦 Test 4: Batch Buffer Reuse")
+    small = np.random.randint(0, 255, (480, 640, 3), dtype=np.uint8)
+    batch, transforms = preprocessor.process_batch([frame, small])
+    buffer_id = id(preprocessor.buffer)
+    preprocessor.process_batch([small, frame])
+    assert batch.shape == (2, 3, 640, 640)
+    assert id(preprocessor.buffer) == buffer_id
+    print(f"✅ Batch shape {batch.shape}, buffer reused")
+
+    print("\n" + "="*80)
+    print("✅ All Preprocessing Tests PASSED!")
+    print("="*80)
+
+except Exception as e:
+    print(f"\n❌ ERROR: {e}")
+    import traceback
+    traceback.print_exc()
+    print("\n❌ Preprocessing tests FAILED!")
+    exit(1)
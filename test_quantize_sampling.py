@@ -0,0 +1,42 @@
+"""
+Test Quantization Frame Sampling (no model required)
+"""
+from quantize_model import sample_indices
+
+print("🔢 Testing Quantization Frame Sampling...")
+print("="*80)
+
+try:
+    # Test 1: Evaluation frames never repeat calibration frames
+    print("\n🧪 Test 1: Held-Out Evaluation Frames")
+    for total in (270, 300, 1000, 51, 7):
+        calibration = sample_indices(total, 50)
+        evaluation = sample_indices(total, 25, offset=0.5, exclude=calibration)
+        overlap = set(calibration) & set(evaluation)
+        assert not overlap, f"{total} frames: {len(overlap)} evaluation frames are calibration frames"
+        assert len(evaluation) == min(25, total - len(calibration))
+        print(f"✅ {total} frames: {len(calibration)} calibration, {len(evaluation)} held-out, no overlap")
+
+    # Test 2: Indices are spread evenly across the video
+    print("\n📏 Test 2: Even Spacing")
+    indices = sample_indices(1000, 10)
+    assert indices == list(range(0, 1000, 100))
+    assert sample_indices(1000, 10, offset=0.5) == list(range(50, 1000, 100))
+    print(f"✅ Evenly spaced: {indices}")
+
+    # Test 3: Nothing left to sample
+    print("\n🈳 Test 3: Everything Excluded")
+    assert sample_indices(5, 3, exclude=range(5)) == []
+    assert sample_indices(0, 3) == []
+    print("✅ No indices when every frame is excluded")
+
+    print("\n" + "="*80)
+    print("✅ All Quantization Sampling Tests PASSED!")
+    print("="*80)
+
+except Exception as e:
+    print(f"\n❌ ERROR: {e}")
+    import traceback
+    traceback.print_exc()
+    print("\n❌ Quantization sampling tests FAILED!")
+    exit(1)
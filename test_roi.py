@@ -0,0 +1,106 @@
+"""
+Test Region of Interest crop and restore (no model required)
+"""
+import json
+import os
+import tempfile
+import numpy as np
+import config
+import inference_backends
+from latency_stats import LatencyRecorder
+from roi import RegionOfInterest
+from violation_detector import ViolationDetector
+
+print("🗺️  Testing Region of Interest...")
+print("="*80)
+
+
+class StubBackend:
+    """Backend returning fixed crop-relative boxes and remembering the input shapes it saw"""
+
+    name = "stub"
+
+    def __init__(self, model_path):
+        self.class_names = {0: 'helmet', 2: 'no_helmet'}
+        self.latency = LatencyRecorder()
+        self.input_shapes = []
+
+    def predict(self, frame, conf=None):
+        self.input_shapes.append(frame.shape)
+        return detections()
+
+    def predict_batch(self, frames, conf=None):
+        return [self.predict(frame, conf=conf) for frame in frames]
+
+
+def detections():
+    """One box centred inside the triangle, one centred outside it (crop coordinates)"""
+    return (np.array([[60, 10, 80, 30], [10, 60, 30, 80]], dtype=np.float32),
+            np.array([0.9, 0.8], dtype=np.float32),
+            np.array([2, 2], dtype=np.int64))
+
+
+try:
+    # Upper-right triangle of the right half of a 200x100 frame
+    roi = RegionOfInterest([[[0.5, 0.0], [1.0, 0.0], [1.0, 1.0]]])
+    frame = np.zeros((100, 200, 3), np.uint8)
+
+    # Test 1: Crop to the polygon's bounding box
+    print("\n✂️  Test 1: Crop to the ROI Bounding Box")
+    crop, offset = roi.crop(frame)
+    assert crop.shape == (100, 100, 3) and offset == (100, 0)
+    assert np.shares_memory(crop, frame)  # a view, not a copy
+    print(f"✅ Crop {crop.shape[1]}x{crop.shape[0]} at offset {offset}")
+
+    # Test 2: Boxes go back to frame coordinates; boxes outside the polygon are dropped
+    print("\n📐 Test 2: Restore to Frame Coordinates")
+    boxes, scores, class_ids = roi.restore(detections(), frame.shape)
+    assert boxes.tolist() == [[160, 10, 180, 30]]
+    assert scores.tolist() == [np.float32(0.9)] and class_ids.tolist() == [2]
+    empty = (np.empty((0, 4), np.float32), np.empty(0, np.float32), np.empty(0, np.int64))
+    assert len(roi.restore(empty, frame.shape)[0]) == 0
+    print(f"✅ Kept {boxes.tolist()}, dropped the box outside the polygon")
+
+    # Test 3: The detector runs the model on the crop only
+    print("\n👁️  Test 3: Crop-Only Inference")
+    inference_backends.BACKENDS[StubBackend.name] = StubBackend
+    config.ENABLE_TRACKING = False
+    config.WARMUP_ITERATIONS = 0
+    detector = ViolationDetector(model_path="stub.onnx", backend="stub", roi=roi)
+    violations = detector.detect_violations(frame)
+    assert detector.backend.input_shapes == [(100, 100, 3)]
+    assert [v['bbox'] for v in violations] == [(160, 10, 180, 30)]
+    print(f"✅ Model saw {detector.backend.input_shapes[0][:2]}, violation at {violations[0]['bbox']}")
+
+    # Test 4: Normalized polygons scale with the stream resolution
+    print("\n🔍 Test 4: Resolution Independence")
+    large = np.zeros((200, 400, 3), np.uint8)
+    crop, offset = roi.crop(large)
+    assert crop.shape == (200, 200, 3) and offset == (200, 0)
+    print(f"✅ Same ROI on 400x200: crop {crop.shape[1]}x{crop.shape[0]} at {offset}")
+
+    # Test 5: Loading from cameras.json
+    print("\n📂 Test 5: Camera Configuration")
+    config_path = os.path.join(tempfile.mkdtemp(), "cameras.json")
+    with open(config_path, 'w') as f:
+        json.dump({'cameras': [{'id': 'gate', 'roi': [[[0, 0], [1, 0], [1, 1]]]}, {'id': 'yard'}]}, f)
+    assert len(RegionOfInterest.from_camera_config('gate', config_path).polygons) == 1
+    assert RegionOfInterest.from_camera_config('yard', config_path) is None
+    assert RegionOfInterest.from_camera_config('gate', config_path + '.missing') is None
+    try:
+        RegionOfInterest([[[0, 0], [1, 1]]])
+        raise AssertionError("Two-point polygon was accepted")
+    except ValueError:
+        pass
+    print("✅ ROI loaded per camera; cameras without one run on the full frame")
+
+    print("\n" + "="*80)
+    print("✅ All Region of Interest Tests PASSED!")
+    print("="*80)
+
+except Exception as e:
+    print(f"\n❌ ERROR: {e}")
+    import traceback
+    traceback.print_exc()
+    print("\n❌ Region of interest tests FAILED!")
+    exit(1)
@@ -0,0 +1,69 @@
+"""
+Test Shared-Memory Frame Ring (no model required)
+"""
+import numpy as np
+from shared_frames import SharedFrameRing, StaleFrameError
+
+print("🧮 Testing Shared Frame Ring...")
+print("="*80)
+
+ring = None
+try:
+    ring = SharedFrameRing(slots=2, slot_bytes=720 * 1280 * 3)
+    consumer = SharedFrameRing.attach(ring.name, 2, 720 * 1280 * 3)
+    frame = np.random.randint(0, 255, (720, 1280, 3), dtype=np.uint8)
+
+    # Test 1: Round trip through shared memory, consumer gets a view
+    print("\n🔁 Test 1: Write and Zero-Copy View")
+    slot, sequence = ring.write(frame)
+    view = consumer.view(slot, sequence)
+    assert np.array_equal(view, frame) and not view.flags.owndata
+    print(f"✅ Slot {slot}, sequence {sequence}, shape {view.shape}")
+
+    # Test 2: Non-contiguous crops are written contiguously
+    print("\n✂️  Test 2: ROI Crop Views")
+    crop = frame[100:400, 200:900]
+    slot2, sequence2 = ring.write(crop)
+    assert np.array_equal(consumer.view(slot2, sequence2), crop)
+    print(f"✅ Crop {crop.shape} stored in slot {slot2}")
+
+    # Test 3: Busy slots are never handed out twice
+    print("\n🚧 Test 3: Slot Exhaustion")
+    assert ring.write(frame) is None
+    ring.release(slot)
+    slot3, sequence3 = ring.write(frame)
+    assert slot3 == slot and sequence3 == sequence + 1
+    print("✅ Full ring refuses writes until a slot is released")
+
+    # Test 4: Overwritten slots are detected
+    print("\n⚠️  Test 4: Stale Sequence Detection")
+    try:
+        consumer.view(slot, sequence)
+        raise AssertionError("stale read not detected")
+    except StaleFrameError:
+        pass
+    print("✅ Reading an overwritten slot raises StaleFrameError")
+
+    # Test 5: Oversized frames fall back to the caller
+    print("\n📏 Test 5: Oversized Frames")
+    ring.release(slot3)
+    assert ring.write(np.zeros((1080, 1920, 3), dtype=np.uint8)) is None
+    print("✅ Frames larger than a slot are refused")
+
+    del view
+    consumer.close()
+
+    print("\n" + "="*80)
+    print("✅ All Shared Frame Ring Tests PASSED!")
+    print("="*80)
+
+except Exception as e:
+    print(f"\n❌ ERROR: {e}")
+    import traceback
+    traceback.print_exc()
+    print("\n❌ Shared frame ring tests FAILED!")
+    exit(1)
+
+finally:
+    if ring:
+        ring.close()
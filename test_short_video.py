@@ -77,20 +77,16 @@ while True:
     print(f"Checking frame {frame_count}/{total_frames}...", end=" ")
     
     # Detect objects
-    results = detector.model(frame, conf=config.CONFIDENCE_THRESHOLD, verbose=False)
+    boxes, scores, class_ids = detector.detect_raw(frame, conf=config.CONFIDENCE_THRESHOLD)
     
     frame_detections = []
-    for r in results:
-        boxes = r.boxes
-        for box in boxes:
-            class_id = int(box.cls[0])
-            class_name = detector.class_names[class_id]
-            confidence = float(box.conf[0])
-            frame_detections.append({
-                'class_name': class_name,
-                'confidence': confidence,
-                'frame': frame_count
-            })
+    for class_id, confidence in zip(class_ids.tolist(), scores.tolist()):
+        class_name = detector.class_names[class_id]
+        frame_detections.append({
+            'class_name': class_name,
+            'confidence': confidence,
+            'frame': frame_count
+        })
     
     if frame_detections:
         print(f"✅ Found {len(frame_detections)} objects")
@@ -0,0 +1,77 @@
+"""
+Test Violation Tracker and per-track reporting (no model required)
+"""
+from datetime import datetime, timedelta
+import config
+from tracker import IoUTracker
+
+print("🧭 Testing Violation Tracker...")
+print("="*80)
+
+
+def violation(class_name, bbox, timestamp=None):
+    """Minimal violation dictionary as produced by ViolationDetector"""
+    return {'class_name': class_name, 'bbox': bbox, 'timestamp': timestamp or datetime.now()}
+
+
+try:
+    tracker = IoUTracker(iou_threshold=0.3, max_missed=2, use_motion=True)
+
+    # Test 1: Two workers without helmets get different IDs
+    print("\n👷 Test 1: Separate Identities")
+    frame1 = tracker.update([
+        violation('no_helmet', (100, 100, 200, 300)),
+        violation('no_helmet', (500, 100, 600, 300))
+    ])
+    ids = [v['track_id'] for v in frame1]
+    assert ids[0] != ids[1]
+    print(f"✅ Track IDs: {ids}")
+
+    # Test 2: IDs persist while workers move
+    print("\n🚶 Test 2: Identity Persists Across Frames")
+    frame2 = tracker.update([
+        violation('no_helmet', (510, 105, 610, 305)),
+        violation('no_helmet', (110, 100, 210, 300))
+    ])
+    assert [v['track_id'] for v in frame2] == [ids[1], ids[0]]
+    print(f"✅ Track IDs after movement: {[v['track_id'] for v in frame2]}")
+
+    # Test 3: Classes never share a track
+    print("\n🧤 Test 3: No Cross-Class Matching")
+    frame3 = tracker.update([violation('no_gloves', (120, 100, 220, 300))])
+    assert frame3[0]['track_id'] not in ids
+    print(f"✅ New track for different class: {frame3[0]['track_id']}")
+
+    # Test 4: Tracks expire after max_missed frames
+    print("\n⌛ Test 4: Track Expiry")
+    for _ in range(3):
+        tracker.update([])
+    removed = tracker.pop_removed()
+    assert set(ids) <= set(removed) and not tracker.tracks
+    print(f"✅ Expired tracks: {removed}")
+
+    # Test 5: Per-track cooldown in ViolationDetector.should_report_violation
+    print("\n🔔 Test 5: Per-Track Reporting")
+    from violation_detector import ViolationDetector
+    detector = ViolationDetector.__new__(ViolationDetector)
+    detector.recent_violations = {}
+    now = datetime.now()
+    worker_a = dict(violation('no_helmet', (0, 0, 1, 1), now), track_id=1)
+    worker_b = dict(violation('no_helmet', (5, 5, 6, 6), now), track_id=2)
+    assert detector.should_report_violation(worker_a)
+    assert detector.should_report_violation(worker_b)
+    later = dict(worker_a, timestamp=now + timedelta(seconds=1))
+    expected = config.VIOLATION_COOLDOWN > 0 and config.VIOLATION_COOLDOWN <= 1
+    assert detector.should_report_violation(later) == expected
+    print("✅ Two workers reported separately, same worker deduplicated")
+
+    print("\n" + "="*80)
+    print("✅ All Tracker Tests PASSED!")
+    print("="*80)
+
+except Exception as e:
+    print(f"\n❌ ERROR: {e}")
+    import traceback
+    traceback.print_exc()
+    print("\n❌ Tracker tests FAILED!")
+    exit(1)
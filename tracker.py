@@ -0,0 +1,120 @@
+"""
+Violation Tracker - Lightweight NumPy IoU tracker
+Purpose: Give every violation a track ID so cooldowns and reporting work per
+worker instead of per class, without the overhead of the ultralytics tracker.
+
+Association is greedy IoU matching between detections and existing tracks of
+the same class, with an optional constant-velocity prediction of each box.
+"""
+
+import numpy as np
+import config
+from inference_backends import box_iou
+
+
+class Track:
+    """One tracked violation (a worker + violation class)"""
+
+    def __init__(self, track_id, class_name, bbox):
+        self.track_id = track_id
+        self.class_name = class_name
+        self.bbox = np.asarray(bbox, dtype=np.float32)
+        self.velocity = np.zeros(4, dtype=np.float32)
+        self.hits = 1
+        self.missed = 0
+
+    def predict(self, use_motion):
+        """Expected box position in the next analyzed frame"""
+        return self.bbox + self.velocity if use_motion else self.bbox
+
+    def update(self, bbox):
+        """Move the track to a newly matched box"""
+        bbox = np.asarray(bbox, dtype=np.float32)
+        self.velocity = 0.5 * self.velocity + 0.5 * (bbox - self.bbox)
+        self.bbox = bbox
+        self.hits += 1
+        self.missed = 0
+
+
+class IoUTracker:
+    """Assigns persistent track IDs to per-frame violation dictionaries"""
+
+    def __init__(self,
+                 iou_threshold=config.TRACK_IOU_THRESHOLD,
+                 max_missed=config.TRACK_MAX_MISSED_FRAMES,
+                 use_motion=config.TRACK_MOTION_MODEL):
+        """
+        Args:
+            iou_threshold: Minimum IoU between a track and a detection to match
+            max_missed: Analyzed frames a track survives without a match
+            use_motion: Predict boxes with a constant-velocity model before matching
+        """
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.use_motion = use_motion
+
+        self.tracks = []
+        self.next_id = 1
+        # IDs of tracks dropped since the last call to pop_removed()
+        self.removed_ids = []
+
+    def update(self, violations):
+        """
+        Match this frame's violations to tracks and set violation['track_id']
+
+        Args:
+            violations: List of violation dictionaries from one frame
+
+        Returns:
+            The same list, each violation carrying a 'track_id'
+        """
+        matched_tracks = set()
+        matched_detections = set()
+
+        if self.tracks and violations:
+            predicted = np.array([track.predict(self.use_motion) for track in self.tracks])
+            detected = np.array([violation['bbox'] for violation in violations], dtype=np.float32)
+            iou = box_iou(predicted, detected)
+
+            # Never match across violation classes
+            track_classes = np.array([track.class_name for track in self.tracks])
+            detection_classes = np.array([violation['class_name'] for violation in violations])
+            iou[track_classes[:, None] != detection_classes[None, :]] = 0
+
+            # Greedy assignment, best overlaps first
+            track_indices, detection_indices = np.nonzero(iou >= self.iou_threshold)
+            order = np.argsort(-iou[track_indices, detection_indices])
+            for t, d in zip(track_indices[order].tolist(), detection_indices[order].tolist()):
+                if t in matched_tracks or d in matched_detections:
+                    continue
+                matched_tracks.add(t)
+                matched_detections.add(d)
+                self.tracks[t].update(violations[d]['bbox'])
+                violations[d]['track_id'] = self.tracks[t].track_id
+
+        # Unmatched tracks coast on their prediction until they expire
+        surviving = []
+        for index, track in enumerate(self.tracks):
+            if index not in matched_tracks:
+                track.missed += 1
+                track.bbox = track.predict(self.use_motion)
+            if track.missed > self.max_missed:
+                self.removed_ids.append(track.track_id)
+            else:
+                surviving.append(track)
+        self.tracks = surviving
+
+        # Unmatched detections start new tracks
+        for index, violation in enumerate(violations):
+            if index not in matched_detections:
+                track = Track(self.next_id, violation['class_name'], violation['bbox'])
+                self.next_id += 1
+                self.tracks.append(track)
+                violation['track_id'] = track.track_id
+
+        return violations
+
+    def pop_removed(self):
+        """Return and clear the IDs of tracks that expired"""
+        removed, self.removed_ids = self.removed_ids, []
+        return removed
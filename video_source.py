@@ -0,0 +1,167 @@
+"""
+Video Source - Capture thread decoupled from inference
+Purpose: With cap.read() and detection on one thread, frames from live streams
+pile up in the OpenCV/FFmpeg buffer while the model runs and we end up
+analyzing frames that are seconds old (CAP_PROP_BUFFERSIZE is only a hint).
+FrameReader decodes on its own thread into a small bounded queue. For live
+sources the oldest frame is dropped when the queue is full, so the detector
+always gets the freshest frame. For files the reader blocks instead, so
+every frame is still delivered.
+
+Given a FrameSkipController, the reader only decodes the sampled frames:
+skipped frames are advanced with cap.grab() (no decode, no colour
+conversion), sampled ones are decoded with cap.retrieve(). File sources can
+also seek straight to the next sampled frame.
+"""
+
+import threading
+import time
+from collections import deque
+import cv2
+import config
+from latency_stats import LatencyHistogram
+
+
+def is_live_source(source):
+    """True for webcams and network streams, False for video files"""
+    if isinstance(source, int) or (isinstance(source, str) and source.isdigit()):
+        return True
+    return isinstance(source, str) and source.startswith(('rtsp://', 'http://', 'https://'))
+
+
+class FrameReader:
+    """cv2.VideoCapture wrapper that reads frames on a background thread"""
+
+    def __init__(self, cap, drop_oldest=True, queue_size=config.CAPTURE_QUEUE_SIZE, loop=False,
+                 sampler=None, seek=False):
+        """
+        Args:
+            cap: Opened cv2.VideoCapture
+            drop_oldest: Drop the oldest queued frame when full (live) instead of waiting (files)
+            queue_size: Frames buffered between capture and inference (1 = freshest frame only)
+            loop: Rewind to the first frame at the end of the source (files)
+            sampler: Optional FrameSkipController; only the frames it claims are decoded and returned
+            seek: Jump straight to the next sampled frame instead of grabbing through (files only)
+        """
+        self.cap = cap
+        self.drop_oldest = drop_oldest
+        self.queue_size = max(1, queue_size)
+        self.loop = loop
+        self.sampler = sampler
+        self.seek = seek and sampler is not None
+
+        # Entries are (frame_number, capture_time, frame)
+        self.frames = deque()
+        self.condition = threading.Condition()
+        self.stopped = False
+        self.thread = None
+
+        # Number and age of the frame last returned by read()
+        self.frame_number = 0
+        self.frame_age = LatencyHistogram()
+
+        # Statistics
+        self.frames_captured = 0
+        self.frames_decoded = 0
+        self.frames_dropped = 0
+
+    def start(self):
+        """Start the capture thread"""
+        self.thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self.thread.start()
+        return self
+
+    def _capture_loop(self):
+        """Decode frames into the queue until the source ends or release() is called"""
+        # Source position of frame number 1 after the last rewind
+        position_offset = 0
+
+        while not self.stopped:
+            next_frame = self.sampler.next_due() if self.seek else 0
+            if next_frame > self.frames_captured + 1:
+                # Jump over the frames the sampler would skip anyway
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, next_frame - 1 - position_offset)
+                self.frames_captured = next_frame - 1
+
+            if not self.cap.grab():
+                if self.loop:
+                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    position_offset = self.frames_captured
+                    continue
+                break
+            self.frames_captured += 1
+            frame_number = self.frames_captured
+
+            # Skipped frames are only grabbed, never decoded
+            if self.sampler and not self.sampler.claim(frame_number):
+                continue
+            ret, frame = self.cap.retrieve()
+            if not ret:
+                continue
+            self.frames_decoded += 1
+
+            with self.condition:
+                if len(self.frames) >= self.queue_size:
+                    if self.drop_oldest:
+                        self.frames.popleft()
+                        self.frames_dropped += 1
+                    else:
+                        # Files: wait for the consumer instead of losing frames
+                        self.condition.wait_for(lambda: len(self.frames) < self.queue_size or self.stopped)
+                        if self.stopped:
+                            break
+                self.frames.append((frame_number, time.time(), frame))
+                self.condition.notify_all()
+
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+    def read(self, timeout=None):
+        """
+        Get the next queued frame, waiting for the capture thread if needed
+
+        Args:
+            timeout: Max seconds to wait (None = until a frame arrives or the source ends)
+
+        Returns:
+            Tuple of (ret, frame) like cv2.VideoCapture.read(); self.frame_number
+            holds the source frame number, which skips ahead when frames were dropped
+        """
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.frames or self.stopped, timeout=timeout):
+                return False, None
+            if not self.frames:
+                return False, None
+
+            self.frame_number, capture_time, frame = self.frames.popleft()
+            self.condition.notify_all()
+
+        self.frame_age.record(time.time() - capture_time)
+        return True, frame
+
+    def get(self, prop):
+        """Pass-through to cv2.VideoCapture.get"""
+        return self.cap.get(prop)
+
+    def release(self):
+        """Stop the capture thread and release the capture"""
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+        if self.thread:
+            self.thread.join(timeout=2)
+        self.cap.release()
+
+    def get_stats(self):
+        """Get capture/decode/drop counters and the age of frames when inference picked them up"""
+        age = self.frame_age.summary()
+        return {
+            'frames_captured': self.frames_captured,
+            'frames_decoded': self.frames_decoded,
+            'frames_dropped': self.frames_dropped,
+            'drop_rate': self.frames_dropped / self.frames_decoded if self.frames_decoded else 0.0,
+            'frame_age_p50_ms': age['p50_ms'] if age else None,
+            'frame_age_p95_ms': age['p95_ms'] if age else None,
+            'frame_age_max_ms': age['max_ms'] if age else None
+        }
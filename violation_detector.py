@@ -1,26 +1,135 @@
-from ultralytics import YOLO
 import cv2
+import time
 import numpy as np
+from concurrent.futures import Future
 from datetime import datetime
 import config
+from inference_backends import create_backend, warmup_frame
+from frame_cache import FrameHashCache
+from evidence_profiles import profile_path
+from tracker import IoUTracker
+
+def default_model_path():
+    """Model file selected by config.MODEL_PRECISION"""
+    if config.MODEL_PRECISION == "int8":
+        return config.INT8_MODEL_PATH
+    return config.MODEL_PATH
 
 class ViolationDetector:
     """Wrapper for YOLO model to detect PPE violations"""
     
-    def __init__(self, model_path=config.MODEL_PATH):
-        """Initialize the YOLO model"""
-        print(f"Loading model from {model_path}...")
-        self.model = YOLO(model_path)
-        self.class_names = self.model.names
-        print(f"Model loaded. Classes: {self.class_names}")
+    def __init__(self, model_path=None, backend=config.INFERENCE_BACKEND, roi=None, evidence_writer=None,
+                 backend_options=None):
+        """
+        Initialize the YOLO model
+        
+        Args:
+            model_path: Path to the exported model (default: chosen by config.MODEL_PRECISION)
+            backend: Inference backend name (see inference_backends.BACKENDS)
+            roi: Optional RegionOfInterest; inference then runs on the ROI crop only
+            evidence_writer: Optional EvidenceWriter; violation images are then written in the background
+            backend_options: Optional backend constructor arguments (e.g. {'intra_op_threads': 2})
+        """
+        model_path = model_path or default_model_path()
+        print(f"Loading model from {model_path} ({backend} backend)...")
+        load_start = time.time()
+        self.backend = create_backend(backend, model_path, **(backend_options or {}))
+        self.cold_load_time = time.time() - load_start
+        self.class_names = self.backend.class_names
+        # Per-stage latency histograms; the backend records preprocess/forward/decode
+        self.latency = self.backend.latency
+        print(f"Model loaded in {self.cold_load_time*1000:.0f}ms. Classes: {self.class_names}")
+        
+        # Class ids that count as violations, for vectorized filtering
+        self.violation_class_ids = np.array(
+            [class_id for class_id, name in self.class_names.items() if name in config.VIOLATION_CLASSES],
+            dtype=np.int64
+        )
+        
+        self.roi = roi
+        if roi:
+            print(f"Region of interest: {len(roi.polygons)} polygon(s), crop-only inference")
+        
+        # Per-worker identity for violations (cheap NumPy IoU tracker)
+        self.tracker = IoUTracker() if config.ENABLE_TRACKING else None
         
         # Track recent violations to avoid spam
         self.recent_violations = {}
         
+        # Near-duplicate frames reuse cached detections instead of running the model
+        self.frame_cache = FrameHashCache() if config.FRAME_CACHE_ENABLED else None
+        
+        # Reused annotation buffer (see annotate())
+        self.annotation_buffer = None
+        self.evidence_writer = evidence_writer
+        self.evidence_count = 0
+        
         # Performance stats
         self.total_detections = 0
         self.total_time = 0
         
+        # Warm-up: pay lazy graph init and allocator costs before the first real frame;
+        # pool workers warm up their own sessions while loading (part of the cold load)
+        self.warmup_time = 0
+        self.first_inference_time = None
+        if config.WARMUP_ITERATIONS > 0 and not getattr(self.backend, 'warms_up_workers', False):
+            self.warmup(config.WARMUP_ITERATIONS)
+    
+    def warmup(self, iterations):
+        """
+        Run dummy frames through the model so the first real frame runs at steady-state speed
+        
+        Warm-up runs are not counted in get_performance_stats().
+        
+        Args:
+            iterations: Number of dummy inferences
+        """
+        dummy = warmup_frame(getattr(self.backend, 'input_width', config.MODEL_INPUT_SIZE),
+                             getattr(self.backend, 'input_height', config.MODEL_INPUT_SIZE))
+        
+        warmup_start = time.time()
+        for i in range(iterations):
+            start = time.time()
+            self.backend.predict(dummy)
+            if i == 0:
+                self.first_inference_time = time.time() - start
+        self.warmup_time = time.time() - warmup_start
+        self.latency.reset()
+        
+        print(f"Model warmed up: {iterations} runs in {self.warmup_time*1000:.0f}ms "
+              f"(first call {self.first_inference_time*1000:.0f}ms)")
+    
+    def get_latency_stats(self):
+        """
+        Get rolling per-stage latency percentiles
+        
+        Returns:
+            {stage: {count, window, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}} for
+            preprocess, forward, decode (backend) and postprocess, total (detector)
+        """
+        return self.latency.summary()
+    
+    def get_startup_stats(self):
+        """Get cold-start timings (model load and warm-up)"""
+        return {
+            'cold_load_ms': self.cold_load_time * 1000,
+            'warmup_ms': self.warmup_time * 1000,
+            'first_inference_ms': self.first_inference_time * 1000 if self.first_inference_time is not None else None
+        }
+    
+    def detect_raw(self, frame, conf=None):
+        """
+        Run the model and return every detection, not only violation classes
+        
+        Args:
+            frame: OpenCV image frame
+            conf: Confidence threshold (default: config.CONFIDENCE_THRESHOLD)
+            
+        Returns:
+            Tuple of (boxes, scores, class_ids) NumPy arrays in frame coordinates
+        """
+        return self.backend.predict(frame, conf=conf)
+        
     def detect_violations(self, frame):
         """
         Detect PPE violations in a frame with CPU optimizations
@@ -31,138 +140,275 @@ class ViolationDetector:
         Returns:
             List of violation dictionaries
         """
-        import time
+        return self.collect(self.submit(frame))
+    
+    def submit(self, frame):
+        """
+        Start violation detection on a frame without waiting for the result
+        
+        With the "pool" backend the frame runs on a worker process while the
+        caller keeps reading frames; other backends run it right away.
+        
+        Args:
+            frame: OpenCV image frame
+            
+        Returns:
+            Pending detection handle for collect()
+        """
         start_time = time.time()
         
-        violations = []
+        frame_hash = None
+        if self.frame_cache:
+            frame_hash = self.frame_cache.frame_hash(frame)
+            cached = self.frame_cache.get(frame_hash, frame.shape)
+            if cached is not None:
+                future = Future()
+                future.set_result(cached)
+                return future, frame.shape, start_time, frame_hash, True
         
-        # CPU OPTIMIZATION 1: Resize frame for faster processing
-        original_frame = frame
-        if config.RESIZE_FRAME:
-            frame_resized = cv2.resize(frame, (config.RESIZE_WIDTH, config.RESIZE_HEIGHT))
-            # Calculate scaling factors for bounding boxes
-            scale_x = frame.shape[1] / config.RESIZE_WIDTH
-            scale_y = frame.shape[0] / config.RESIZE_HEIGHT
+        model_input = self.roi.crop(frame)[0] if self.roi else frame
+        if hasattr(self.backend, 'submit'):
+            future = self.backend.submit(model_input)
         else:
-            frame_resized = frame
-            scale_x = scale_y = 1.0
-        
-        # CPU OPTIMIZATION 2: Run detection with optimized parameters
-        results = self.model(
-            frame_resized,
-            conf=config.CONFIDENCE_THRESHOLD,
-            iou=config.IOU_THRESHOLD,  # NMS threshold
-            max_det=config.MAX_DETECTIONS,  # Limit detections
-            verbose=False,
-            half=config.USE_HALF_PRECISION  # FP16 (GPU only)
-        )
+            future = Future()
+            future.set_result(self.backend.predict(model_input))
+        return future, frame.shape, start_time, frame_hash, False
+    
+    def collect(self, pending):
+        """
+        Wait for a submitted frame and turn its detections into violations
         
-        for r in results:
-            boxes = r.boxes
-            for box in boxes:
-                # Extract box details
-                x1, y1, x2, y2 = box.xyxy[0]
-                
-                # Scale back to original frame size
-                x1 = int(x1 * scale_x)
-                y1 = int(y1 * scale_y)
-                x2 = int(x2 * scale_x)
-                y2 = int(y2 * scale_y)
-                
-                confidence = float(box.conf[0])
-                class_id = int(box.cls[0])
-                class_name = self.class_names[class_id]
-                
-                # Check if it's a violation class
-                if class_name in config.VIOLATION_CLASSES:
-                    violation = {
-                        'timestamp': datetime.now(),
-                        'class_name': class_name,
-                        'class_id': class_id,
-                        'confidence': confidence,
-                        'bbox': (x1, y1, x2, y2),
-                        'description': config.VIOLATION_CLASSES[class_name],
-                        'osha_regulation': config.OSHA_REGULATIONS.get(class_name, "N/A")
-                    }
-                    violations.append(violation)
+        Collect handles in submission order so track IDs follow the video.
+        
+        Args:
+            pending: Handle returned by submit()
+            
+        Returns:
+            List of violation dictionaries
+        """
+        future, frame_shape, start_time, frame_hash, cache_hit = pending
+        result = future.result()
+        
+        postprocess_start = time.time()
+        # Cached detections are already in frame coordinates
+        if not cache_hit:
+            if self.roi:
+                result = self.roi.restore(result, frame_shape)
+            if frame_hash is not None:
+                self.frame_cache.put(frame_hash, frame_shape, result)
+        boxes, scores, class_ids = result
+        violations = self._build_violations(boxes, scores, class_ids)
+        
+        if self.tracker:
+            self.tracker.update(violations)
+            # Forget cooldowns of workers that left the scene
+            for track_id in self.tracker.pop_removed():
+                for key in [k for k in self.recent_violations if isinstance(k, tuple) and k[1] == track_id]:
+                    del self.recent_violations[key]
         
         # Performance tracking
-        detection_time = time.time() - start_time
+        end_time = time.time()
+        detection_time = end_time - start_time
+        self.latency.record("postprocess", end_time - postprocess_start)
+        self.latency.record("total", detection_time)
         self.total_detections += 1
         self.total_time += detection_time
         
         return violations
     
+    def detect_violations_batch(self, frames, rois=None):
+        """
+        Detect PPE violations in several frames with one forward pass
+        
+        Useful when one host serves several cameras: frames from all streams
+        are stacked into one input tensor instead of N batch-size-1 calls.
+        Bounding boxes are returned in each source frame's own coordinates.
+        Frames may come from different streams, so no track IDs are assigned;
+        give each stream its own IoUTracker if identity is needed.
+        
+        Args:
+            frames: List of OpenCV image frames (sizes may differ)
+            rois: Optional list of RegionOfInterest (or None) per frame
+                  (default: the detector's own ROI for every frame)
+            
+        Returns:
+            List of violation lists, one per input frame
+        """
+        start_time = time.time()
+        
+        if not frames:
+            return []
+        
+        rois = rois or [self.roi] * len(frames)
+        inputs = [roi.crop(frame)[0] if roi else frame for frame, roi in zip(frames, rois)]
+        predictions = self.backend.predict_batch(inputs)
+        
+        postprocess_start = time.time()
+        results = [
+            roi.restore(result, frame.shape) if roi else result
+            for result, frame, roi in zip(predictions, frames, rois)
+        ]
+        violations_per_frame = [
+            self._build_violations(boxes, scores, class_ids)
+            for boxes, scores, class_ids in results
+        ]
+        
+        # Performance tracking: one per-frame share of the call per frame, so the
+        # histograms detect_violations also fills keep per-frame samples only
+        end_time = time.time()
+        detection_time = end_time - start_time
+        for _ in frames:
+            self.latency.record("postprocess", (end_time - postprocess_start) / len(frames))
+            self.latency.record("total", detection_time / len(frames))
+        self.total_detections += len(frames)
+        self.total_time += detection_time
+        
+        return violations_per_frame
+    
+    def _build_violations(self, boxes, scores, class_ids):
+        """
+        Convert raw detections into violation dictionaries
+        
+        Args:
+            boxes: (N, 4) array of x1, y1, x2, y2 in frame coordinates
+            scores: (N,) array of confidences
+            class_ids: (N,) array of class ids
+            
+        Returns:
+            List of violation dictionaries
+        """
+        # One class mask for the whole result set; dicts only for survivors
+        mask = np.isin(class_ids, self.violation_class_ids)
+        if not mask.any():
+            return []
+        
+        boxes = boxes[mask].astype(np.int64).tolist()
+        scores = scores[mask].tolist()
+        class_ids = class_ids[mask].tolist()
+        timestamp = datetime.now()
+        
+        violations = []
+        for bbox, confidence, class_id in zip(boxes, scores, class_ids):
+            class_name = self.class_names[class_id]
+            violations.append({
+                'timestamp': timestamp,
+                'class_name': class_name,
+                'class_id': class_id,
+                'confidence': confidence,
+                'bbox': tuple(bbox),
+                'description': config.VIOLATION_CLASSES[class_name],
+                'osha_regulation': config.OSHA_REGULATIONS.get(class_name, "N/A")
+            })
+        
+        return violations
+    
     def get_performance_stats(self):
-        """Get average detection performance"""
+        """Get average steady-state detection performance (warm-up excluded)"""
         if self.total_detections > 0:
             avg_time = self.total_time / self.total_detections
             fps = 1.0 / avg_time if avg_time > 0 else 0
-            return {
+            stats = {
                 'avg_time_ms': avg_time * 1000,
                 'avg_fps': fps,
                 'total_detections': self.total_detections
             }
+            stats.update(self.get_startup_stats())
+            stats['latency'] = self.get_latency_stats()
+            return stats
         return None
     
-    def draw_violations(self, frame, violations):
+    def draw_violations(self, frame, violations, out=None):
         """
         Draw bounding boxes and labels on frame
         
         Args:
             frame: OpenCV image frame
             violations: List of violation dictionaries
+            out: Optional buffer of the frame's shape to draw into instead of a new copy
+                 (pass the frame itself to draw in place)
             
         Returns:
             Annotated frame
         """
-        annotated_frame = frame.copy()
+        if out is None:
+            annotated_frame = frame.copy()
+        else:
+            annotated_frame = out
+            if out is not frame:
+                np.copyto(out, frame)
         
         for violation in violations:
-            x1, y1, x2, y2 = violation['bbox']
-            class_name = violation['class_name']
-            confidence = violation['confidence']
-            
-            # Color coding: Red for violations
-            color = (0, 0, 255)  # BGR Red
-            
-            # Draw bounding box
-            cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, 3)
-            
-            # Prepare label
-            label = f"{violation['description']}: {confidence:.2f}"
-            
-            # Calculate text size and position
-            (text_width, text_height), baseline = cv2.getTextSize(
-                label, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2
-            )
-            
-            # Draw label background
-            cv2.rectangle(
-                annotated_frame,
-                (x1, y1 - text_height - 10),
-                (x1 + text_width, y1),
-                color,
-                -1
-            )
-            
-            # Draw label text
-            cv2.putText(
-                annotated_frame,
-                label,
-                (x1, y1 - 5),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.7,
-                (255, 255, 255),
-                2,
-                cv2.LINE_AA
-            )
+            self._draw_violation(annotated_frame, violation)
         
         return annotated_frame
     
+    def annotate(self, frame, violations):
+        """
+        Draw every violation of a frame once, into a buffer reused across frames
+        
+        The returned image is overwritten by the next call; use it for display
+        and evidence of this frame only.
+        
+        Args:
+            frame: OpenCV image frame
+            violations: List of violation dictionaries
+            
+        Returns:
+            Annotated frame (the detector's annotation buffer)
+        """
+        if self.annotation_buffer is None or self.annotation_buffer.shape != frame.shape:
+            self.annotation_buffer = np.empty_like(frame)
+        return self.draw_violations(frame, violations, out=self.annotation_buffer)
+    
+    def _draw_violation(self, image, violation, offset=(0, 0)):
+        """Draw one violation's box and label; offset is the image's origin in frame coordinates"""
+        x1, y1, x2, y2 = violation['bbox']
+        x1, x2 = x1 - offset[0], x2 - offset[0]
+        y1, y2 = y1 - offset[1], y2 - offset[1]
+        confidence = violation['confidence']
+        
+        # Color coding: Red for violations
+        color = (0, 0, 255)  # BGR Red
+        
+        # Draw bounding box
+        cv2.rectangle(image, (x1, y1), (x2, y2), color, 3)
+        
+        # Prepare label
+        label = f"{violation['description']}: {confidence:.2f}"
+        
+        # Calculate text size and position
+        (text_width, text_height), baseline = cv2.getTextSize(
+            label, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2
+        )
+        
+        # Draw label background
+        cv2.rectangle(
+            image,
+            (x1, y1 - text_height - 10),
+            (x1 + text_width, y1),
+            color,
+            -1
+        )
+        
+        # Draw label text
+        cv2.putText(
+            image,
+            label,
+            (x1, y1 - 5),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.7,
+            (255, 255, 255),
+            2,
+            cv2.LINE_AA
+        )
+    
     def should_report_violation(self, violation):
         """
-        Check if enough time has passed since last report of same violation type
+        Check if enough time has passed since last report of same violation
+        
+        With tracking enabled the cooldown is kept per track (one worker),
+        otherwise per violation type. A tracked violation with a cooldown of 0
+        is reported once for the lifetime of its track.
         
         Args:
             violation: Violation dictionary
@@ -172,38 +418,115 @@ class ViolationDetector:
         """
         class_name = violation['class_name']
         current_time = violation['timestamp']
+        track_id = violation.get('track_id')
+        key = (class_name, track_id) if track_id is not None else class_name
         
-        if class_name in self.recent_violations:
-            last_time = self.recent_violations[class_name]
+        if key in self.recent_violations:
+            if track_id is not None and config.VIOLATION_COOLDOWN <= 0:
+                return False
+            
+            last_time = self.recent_violations[key]
             time_diff = (current_time - last_time).total_seconds()
             
             if time_diff < config.VIOLATION_COOLDOWN:
                 return False
         
         # Update last violation time
-        self.recent_violations[class_name] = current_time
+        self.recent_violations[key] = current_time
         return True
     
-    def save_violation_image(self, frame, violation):
+    def save_violation_image(self, frame, violation, annotated=None, profiles=None, on_done=None, directory=None):
         """
-        Save violation screenshot
+        Save violation evidence, one image per evidence profile
+        
+        With an evidence writer the images are queued and written in the
+        background; the returned path is final but the file may not exist yet
+        (see EvidenceWriter.wait_for).
         
         Args:
             frame: OpenCV image frame
             violation: Violation dictionary
+            annotated: Frame already annotated with annotate() (reused instead of redrawing)
+            profiles: Dict of profile name -> settings (default: config.EVIDENCE_PROFILES)
+            on_done: Optional callback(path) once the images are done; path is None
+                     if the primary image was dropped or could not be written
+            directory: Directory for the images (default: config.VIOLATIONS_DIR)
             
         Returns:
-            Path to saved image
+            Path to the primary (first profile's) image, or None if the evidence writer dropped it
         """
-        timestamp_str = violation['timestamp'].strftime("%Y%m%d_%H%M%S")
-        filename = f"{timestamp_str}_{violation['class_name']}.jpg"
-        filepath = f"{config.VIOLATIONS_DIR}/{filename}"
+        profiles = profiles or config.EVIDENCE_PROFILES
+        base_path = self.evidence_path(violation, directory)
         
-        # Draw violation on frame
-        annotated_frame = self.draw_violations(frame, [violation])
+        if annotated is None and any(profile.get('region') != 'crop' for profile in profiles.values()):
+            # Draw violation on frame, once for every scene profile
+            annotated = self.draw_violations(frame, [violation])
         
-        # Save image
-        cv2.imwrite(filepath, annotated_frame)
+        images = [
+            (self._evidence_image(frame, violation, annotated, profile),
+             profile_path(base_path, name), profile.get('quality'))
+            for name, profile in profiles.items()
+        ]
+        
+        if self.evidence_writer:
+            return self.evidence_writer.submit_group(images, on_done=on_done)
+        
+        # Save images
+        results = [
+            cv2.imwrite(filepath, image, [cv2.IMWRITE_JPEG_QUALITY, quality or config.EVIDENCE_JPEG_QUALITY])
+            for image, filepath, quality in images
+        ]
+        filepath = images[0][1]
         print(f"Saved violation image: {filepath}")
+        if on_done:
+            on_done(filepath if results[0] else None)
         
         return filepath
+    
+    def _evidence_image(self, frame, violation, annotated, profile):
+        """Render one evidence profile: the crop or the whole annotated scene, downscaled to max_size"""
+        if profile.get('region') == 'crop':
+            rx1, ry1, rx2, ry2 = self._evidence_region(frame.shape, violation['bbox'])
+            if annotated is not None:
+                # A view of the annotated frame: no copy at all
+                image = annotated[ry1:ry2, rx1:rx2]
+            else:
+                # Copy only the crop and draw this violation on it
+                image = frame[ry1:ry2, rx1:rx2].copy()
+                self._draw_violation(image, violation, offset=(rx1, ry1))
+        else:
+            image = annotated
+        
+        max_size = profile.get('max_size', 0)
+        height, width = image.shape[:2]
+        if max_size and max(height, width) > max_size:
+            scale = max_size / max(height, width)
+            image = cv2.resize(image, (max(1, round(width * scale)), max(1, round(height * scale))),
+                               interpolation=cv2.INTER_AREA)
+        return image
+    
+    def evidence_path(self, violation, directory=None):
+        """
+        Unique evidence base path for a violation (see evidence_profiles.profile_path)
+        
+        Microsecond timestamp plus a running number, so several violations of
+        the same class in one second (or one frame) never overwrite each other.
+        Images go to directory, or config.VIOLATIONS_DIR by default.
+        """
+        self.evidence_count += 1
+        timestamp_str = violation['timestamp'].strftime("%Y%m%d_%H%M%S_%f")
+        filename = f"{timestamp_str}_{violation['class_name']}_{self.evidence_count:04d}.jpg"
+        return f"{directory or config.VIOLATIONS_DIR}/{filename}"
+    
+    def _evidence_region(self, frame_shape, bbox):
+        """Crop box around a violation, padded by EVIDENCE_CROP_MARGIN and room for the label"""
+        height, width = frame_shape[:2]
+        x1, y1, x2, y2 = bbox
+        margin_x = int((x2 - x1) * config.EVIDENCE_CROP_MARGIN)
+        margin_y = int((y2 - y1) * config.EVIDENCE_CROP_MARGIN)
+        return (
+            max(0, x1 - margin_x),
+            max(0, y1 - margin_y - 30),  # label sits above the box
+            min(width, x2 + margin_x),
+            min(height, y2 + margin_y)
+        )